@@ -1,22 +1,211 @@
+import json
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from django.conf import settings
 from django.contrib import admin
-from app.models import Room, Booking
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
+from app.sharding import is_sharded
+from app.models import (Hotel, Room, RoomRate, RoomType, Booking, CustomUser, RequestProfile,
+                        WaitlistEntry, OutboxEvent)
 
-@admin.register(Room)
-class RoomAdmin(admin.ModelAdmin):
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """
+    Estimate the number of rows in a queryset from PostgreSQL statistics.
+    Uses `pg_class.reltuples` for an unfiltered table and the planner's
+    row estimate otherwise.
+
+    Returns:
+        int: estimated row count, or None on other databases
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids an exact COUNT(*) on large tables.
+    Counts are estimated when the table holds more than
+    `ADMIN_ESTIMATED_COUNT_THRESHOLD` rows.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        table_estimate: Optional[int] = estimate_count(
+            self.object_list.model._default_manager.using(self.object_list.db))
+        if table_estimate is None or table_estimate < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        return estimate_count(self.object_list)
+
+
+class ShardedModelAdmin(admin.ModelAdmin):
+    """
+    Admin of a model stored on the room shards. The admin reads `default`
+    only, so the model is hidden while rooms are sharded.
+    """
+
+    def has_view_permission(self, request, obj=None):
+        return not is_sharded() and super().has_view_permission(request, obj)
+
+    def has_add_permission(self, request):
+        return not is_sharded() and super().has_add_permission(request)
+
+    def has_change_permission(self, request, obj=None):
+        return not is_sharded() and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return not is_sharded() and super().has_delete_permission(request, obj)
+
+
+@admin.register(Hotel)
+class HotelAdmin(admin.ModelAdmin):
+    list_display = ('name', 'city')
+    search_fields = ('name', 'city')
+
+
+@admin.register(RoomType)
+class RoomTypeAdmin(admin.ModelAdmin):
     list_display = ('name', 'price_per_night', 'capacity')
     search_fields = ('name',)
 
 
+@admin.register(Room)
+class RoomAdmin(ShardedModelAdmin):
+    list_display = ('name', 'price_per_night', 'capacity', 'room_type', 'hotel')
+    list_select_related = ('room_type', 'hotel')
+    list_filter = ('room_type', 'hotel')
+    search_fields = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(RoomRate)
+class RoomRateAdmin(ShardedModelAdmin):
+    list_display = ('room', 'capacity', 'start_date', 'end_date',
+                    'weekdays', 'price_per_night', 'priority')
+    list_select_related = ('room',)
+    list_filter = ('capacity',)
+    raw_id_fields = ('room',)
+
+
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(ShardedModelAdmin):
     list_display = ('booking_number', 'user', 'room',
-                    'start_date', 'end_date', 'status')
-    search_fields = ('booking_number', 'user__username', 'room__name')
+                    'start_date', 'end_date', 'status', 'room_type')
+    list_select_related = ('user', 'room', 'room_type')
+    search_fields = ('=booking_number', '=user__email', 'room__name')
+    search_help_text = "Booking number, guest email or room name."
     list_filter = ('status',)
+    date_hierarchy = 'start_date'
     readonly_fields = ('booking_number',)
+    raw_id_fields = ('user', 'room')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def get_readonly_fields(self, request, obj=None):
         if obj:
             return self.readonly_fields + ('user', 'room')
         return self.readonly_fields
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search by exact booking number or guest email, which are both
+        backed by unique indexes, and by room name otherwise.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        try:
+            return queryset.filter(booking_number=UUID(search_term)), False
+        except ValueError:
+            pass
+        if '@' in search_term:
+            email: str = CustomUser.objects.normalize_email(search_term)
+            return queryset.filter(user__email=email), False
+        return queryset.filter(room__in=Room.objects.filter(name__icontains=search_term)), False
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(ShardedModelAdmin):
+    list_display = ('user', 'room', 'capacity', 'max_price', 'start_date',
+                    'end_date', 'auto_book', 'status', 'created_at')
+    list_select_related = ('user', 'room')
+    list_filter = ('status', 'auto_book')
+    raw_id_fields = ('user', 'room', 'booking')
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(ShardedModelAdmin):
+    list_display = ('id', 'event_type', 'booking_number', 'created_at', 'dispatched_at')
+    list_filter = ('event_type', ('dispatched_at', admin.EmptyFieldListFilter))
+    search_fields = ('booking_number',)
+    readonly_fields = ('event_type', 'booking_number', 'payload', 'created_at', 'dispatched_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Recent profiled requests per URL name, with links to download the
+    collapsed stacks (for flamegraph.pl or speedscope) and the SQL log.
+    """
+    list_display = ('created_at', 'url_name', 'method', 'path', 'status_code',
+                    'duration', 'query_count', 'query_time', 'trigger', 'files')
+    list_filter = ('url_name', 'trigger', 'method')
+    search_fields = ('path',)
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Files')
+    def files(self, obj: RequestProfile) -> str:
+        return format_html(
+            '<a href="{}">stacks</a> / <a href="{}">sql</a>',
+            reverse('admin:app_requestprofile_file', args=[obj.pk, 'stacks']),
+            reverse('admin:app_requestprofile_file', args=[obj.pk, 'sql']))
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/file/<str:kind>/', self.admin_site.admin_view(self.file_view),
+                 name='app_requestprofile_file'),
+        ] + super().get_urls()
+
+    def file_view(self, request, pk: int, kind: str):
+        profile: RequestProfile = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile) or kind not in ('stacks', 'sql'):
+            raise Http404
+        file: Path = Path(profile.stacks_file if kind == 'stacks' else profile.sql_file)
+        if not file.exists():
+            raise Http404
+        return FileResponse(file.open('rb'), as_attachment=True, filename=file.name,
+                            content_type='text/plain')
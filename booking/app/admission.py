@@ -0,0 +1,205 @@
+"""
+In-process admission control for the booking write path.
+
+Booking creation is limited by a token bucket per user, a global token
+bucket and a cap on concurrently executing requests. Requests over the
+limits are rejected right away with 429 or 503 and a Retry-After header
+instead of queueing on the database.
+"""
+
+import math
+import threading
+from contextlib import contextmanager
+from time import monotonic
+from typing import Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+
+class Overloaded(APIException):
+    """
+    Raised when too many booking writes are already in flight.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many bookings are being processed, please retry.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait: float, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second
+    up to `capacity` tokens.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens +
+                          (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self) -> float:
+        """Take one token.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+        with self.lock:
+            self._refill(monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def is_full(self) -> bool:
+        with self.lock:
+            self._refill(monotonic())
+            return self.tokens >= self.capacity
+
+
+class ConcurrencyLimiter:
+    """
+    Non-blocking cap on the number of concurrently executing requests.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+
+class Admission:
+    """
+    Limits and counters of the booking write path, built from
+    `settings.BOOKING_ADMISSION`.
+    """
+    # Idle (full) per-user buckets are dropped past this many users.
+    MAX_USER_BUCKETS = 10000
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.global_bucket = TokenBucket(
+            config['GLOBAL_RATE'], config['GLOBAL_BURST'])
+        self.user_buckets: dict[int, TokenBucket] = {}
+        self.limiter = ConcurrencyLimiter(config['MAX_CONCURRENT'])
+        self.lock = threading.Lock()
+        self.counters: dict[str, int] = {
+            'admitted': 0,
+            'user_throttled': 0,
+            'global_throttled': 0,
+            'overloaded': 0,
+        }
+
+    def count(self, counter: str) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+
+    def user_bucket(self, user_id: int) -> TokenBucket:
+        with self.lock:
+            bucket: Optional[TokenBucket] = self.user_buckets.get(user_id)
+            if bucket is None:
+                if len(self.user_buckets) >= self.MAX_USER_BUCKETS:
+                    self.user_buckets = {key: value for key, value in self.user_buckets.items()
+                                         if not value.is_full()}
+                bucket = self.user_buckets[user_id] = TokenBucket(
+                    self.config['USER_RATE'], self.config['USER_BURST'])
+            return bucket
+
+    def throttle(self, user_id: int) -> float:
+        """Take a token from the user's and the global bucket.
+
+        Args:
+            user_id (int): the requesting user
+
+        Returns:
+            float: 0 if admitted, otherwise seconds to wait before retrying
+        """
+        wait: float = self.user_bucket(user_id).consume()
+        if wait:
+            self.count('user_throttled')
+            return wait
+        wait = self.global_bucket.consume()
+        if wait:
+            self.count('global_throttled')
+        return wait
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one of the concurrent write slots for the duration of the block.
+        Raises Overloaded if none is free.
+        """
+        if not self.limiter.try_acquire():
+            self.count('overloaded')
+            raise Overloaded(wait=self.config['RETRY_AFTER'])
+        self.count('admitted')
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+        return {
+            'in_flight': self.limiter.in_flight,
+            'max_concurrent': self.limiter.limit,
+            'tracked_users': len(self.user_buckets),
+            **counters,
+        }
+
+
+_admission: Optional[Admission] = None
+
+
+def get_admission() -> Admission:
+    """Return the process-wide admission control of booking writes."""
+    global _admission
+    if _admission is None:
+        _admission = Admission(settings.BOOKING_ADMISSION)
+    return _admission
+
+
+@receiver(setting_changed)
+def reset_admission(setting, **kwargs) -> None:
+    global _admission
+    if setting == 'BOOKING_ADMISSION':
+        _admission = None
+
+
+class BookingCreateThrottle(BaseThrottle):
+    """
+    Token bucket throttle per user and globally for booking creation.
+    """
+
+    def allow_request(self, request, view) -> bool:
+        self.wait_seconds: float = get_admission().throttle(request.user.pk)
+        return not self.wait_seconds
+
+    def wait(self) -> int:
+        return math.ceil(self.wait_seconds)
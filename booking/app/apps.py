@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app"
+
+    def ready(self):
+        from . import signals, rollups, waitlist, next_availability, bitmap, booking_cache, catalog, outbox, sharding  # noqa: F401
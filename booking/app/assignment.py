@@ -0,0 +1,206 @@
+"""
+Room assignment for bookings made by room type.
+
+A booking made by type gets the best fitting free room of the type: the
+one whose previous booking ends the latest before the stay, then whose
+next booking starts the soonest after it. `optimize_room_type` repacks the
+future bookings of a type the same way, with a greedy sweep over their
+start dates. The sweep never needs more rooms than the busiest night, and
+it closes the short gaps left by cancellations and earlier choices. With
+several shards, the rooms of each shard are repacked separately, as a
+booking can't move to another database.
+"""
+
+from bisect import bisect_right, insort
+from collections import defaultdict
+from datetime import date
+from typing import NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from .models import Booking, Room, RoomType
+from .sharding import shard_aliases, use_shard
+from .signals import BookingChange, notify_bookings_changed
+
+
+class Stay(NamedTuple):
+    """
+    A booked date range in a room, identified by `key`.
+    """
+    key: int
+    start_date: date
+    end_date: date
+    room_id: int
+
+
+class OptimizationResult(NamedTuple):
+    """
+    Outcome of repacking a room type. `feasible` is False when the pinned
+    bookings leave no valid assignment, and nothing was moved (on that shard).
+    """
+    bookings: int
+    moved: int
+    gaps_before: int
+    gaps_after: int
+    feasible: bool
+
+
+def best_fit_room(room_type: RoomType, start_date: date, end_date: date) -> Optional[Room]:
+    """Return the free room of a type that leaves the smallest gaps around a stay.
+
+    Args:
+        room_type (RoomType): the booked type
+        start_date (date): start date of the stay
+        end_date (date): end date of the stay
+
+    Returns:
+        Room: the best fitting room, or None if every room of the type is taken
+    """
+    active = Booking.objects.filter(room=OuterRef('pk'), status="active")
+    return Room.objects.filter(room_type=room_type).available(start_date, end_date).annotate(
+        previous_end=Subquery(active.filter(end_date__lte=start_date)
+                              .order_by('-end_date').values('end_date')[:1]),
+        next_start=Subquery(active.filter(start_date__gte=end_date)
+                            .order_by('start_date').values('start_date')[:1]),
+    ).order_by(F('previous_end').desc(nulls_last=True),
+               F('next_start').asc(nulls_last=True), 'pk').first()
+
+
+def assign_rooms(room_ids: list[int], pinned: list[Stay], movable: list[Stay]) -> Optional[dict[int, int]]:
+    """Assign rooms to stays with a best-fit greedy sweep over start dates.
+
+    Each movable stay goes to the room that became free the latest before
+    it starts, preferring its current room on ties, and skipping rooms
+    with a pinned stay starting before it ends. Pinned stays keep their room.
+
+    Args:
+        room_ids (list[int]): rooms to assign
+        pinned (list[Stay]): stays that can't be moved
+        movable (list[Stay]): stays to assign
+
+    Returns:
+        dict[int, int]: room id of each movable stay by key, or None if a
+        stay fits in no room
+    """
+    ends: dict[int, date] = dict.fromkeys(room_ids, date.min)
+    free: list[tuple[date, int]] = sorted((date.min, room_id) for room_id in room_ids)
+    upcoming: dict[int, list[date]] = defaultdict(list)
+    for stay in sorted(pinned, key=lambda stay: stay.start_date, reverse=True):
+        upcoming[stay.room_id].append(stay.start_date)
+
+    def occupy(room_id: int, end_date: date) -> None:
+        free.remove((ends[room_id], room_id))
+        ends[room_id] = max(ends[room_id], end_date)
+        insort(free, (ends[room_id], room_id))
+
+    assignment: dict[int, int] = {}
+    events = sorted([(stay.start_date, 0, stay) for stay in pinned] +
+                    [(stay.start_date, 1, stay) for stay in movable])
+    for start_date, is_movable, stay in events:
+        if not is_movable:
+            if ends[stay.room_id] > start_date:
+                return None
+            upcoming[stay.room_id].pop()
+            occupy(stay.room_id, stay.end_date)
+            continue
+
+        chosen: Optional[int] = None
+        best_end: Optional[date] = None
+        for position in range(bisect_right(free, (start_date, float('inf'))) - 1, -1, -1):
+            end_date, room_id = free[position]
+            if best_end is not None and end_date < best_end:
+                break
+            if upcoming[room_id] and upcoming[room_id][-1] < stay.end_date:
+                continue
+            if best_end is None:
+                chosen, best_end = room_id, end_date
+            if room_id == stay.room_id:
+                chosen = room_id
+                break
+        if chosen is None:
+            return None
+        assignment[stay.key] = chosen
+        occupy(chosen, stay.end_date)
+    return assignment
+
+
+def count_gap_nights(stays: list[Stay], max_nights: int) -> int:
+    """Count the nights in gaps of at most `max_nights` between stays of the same room."""
+    by_room: dict[int, list[Stay]] = defaultdict(list)
+    for stay in stays:
+        by_room[stay.room_id].append(stay)
+    nights: int = 0
+    for room_stays in by_room.values():
+        room_stays.sort(key=lambda stay: stay.start_date)
+        for previous, following in zip(room_stays, room_stays[1:]):
+            gap: int = (following.start_date - previous.end_date).days
+            if 0 < gap <= max_nights:
+                nights += gap
+    return nights
+
+
+def optimize_room_type(room_type: RoomType, max_gap: int = 1, dry_run: bool = False) -> OptimizationResult:
+    """Reassign the future bookings made by type among the rooms of the type.
+
+    Bookings of specific rooms, and stays starting today or earlier, keep
+    their room. Nothing is moved unless it reduces the gap nights. Moves
+    are reported with `bookings_changed`, as the old range being freed and
+    the new one occupied.
+
+    Args:
+        room_type (RoomType): the type to repack
+        max_gap (int): gaps of at most this many nights are counted as unsellable
+        dry_run (bool): compute the result without moving bookings
+
+    Returns:
+        OptimizationResult: the number of moved bookings and unsellable gap
+        nights before and after, summed over the shards
+    """
+    results: list[OptimizationResult] = [optimize_shard(room_type, alias, max_gap, dry_run)
+                                         for alias in shard_aliases()]
+    totals: list[int] = [sum(counts) for counts in zip(*(result[:4] for result in results))]
+    return OptimizationResult(*totals, all(result.feasible for result in results))
+
+
+def optimize_shard(room_type: RoomType, alias: str, max_gap: int, dry_run: bool) -> OptimizationResult:
+    """Repack the rooms of a type stored on one shard, see `optimize_room_type`."""
+    today: date = date.today()
+    with use_shard(alias), transaction.atomic(using=alias):
+        room_ids: list[int] = list(Room.objects.filter(
+            room_type=room_type).values_list('pk', flat=True))
+        rows: dict[int, tuple] = {row[0]: row for row in Booking.objects.select_for_update().filter(
+            room__room_type=room_type, status="active", end_date__gt=today,
+        ).values_list('pk', 'start_date', 'end_date', 'room_id', 'room_type_id',
+                      'booking_number', 'user_id')}
+
+        pinned: list[Stay] = []
+        movable: list[Stay] = []
+        for pk, start_date, end_date, room_id, booked_type, _, _ in rows.values():
+            stays = movable if booked_type == room_type.pk and start_date > today else pinned
+            stays.append(Stay(pk, start_date, end_date, room_id))
+
+        gaps_before: int = count_gap_nights(pinned + movable, max_gap)
+        assignment: Optional[dict[int, int]] = assign_rooms(room_ids, pinned, movable)
+        if assignment is None:
+            return OptimizationResult(len(rows), 0, gaps_before, gaps_before, False)
+
+        moved: list[Stay] = [stay for stay in movable if assignment[stay.key] != stay.room_id]
+        gaps_after: int = count_gap_nights(
+            pinned + [stay._replace(room_id=assignment[stay.key]) for stay in movable], max_gap)
+        if gaps_after >= gaps_before:
+            # moves that close no gap would only disturb guests and consumers
+            return OptimizationResult(len(rows), 0, gaps_before, gaps_before, True)
+        if not dry_run and moved:
+            Booking.objects.bulk_update(
+                [Booking(pk=stay.key, room_id=assignment[stay.key]) for stay in moved],
+                ['room'], batch_size=1000)
+            changes: list[BookingChange] = []
+            for stay in moved:
+                booking_number, user_id = rows[stay.key][5:]
+                changes.append(BookingChange(booking_number, user_id, stay.room_id,
+                                             stay.start_date, stay.end_date, "cancelled"))
+                changes.append(BookingChange(booking_number, user_id, assignment[stay.key],
+                                             stay.start_date, stay.end_date, "active"))
+            notify_bookings_changed(changes, alias)
+        return OptimizationResult(len(rows), len(moved), gaps_before, gaps_after, True)
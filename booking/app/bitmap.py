@@ -0,0 +1,323 @@
+"""
+Shared-memory availability bitmap.
+
+A memory-mapped file holds one row of bits per room id, one bit per night
+from `base_day`: set when an active booking covers the night. Every worker
+process maps the same file and reads it zero-copy with numpy, so
+availability checks need no SQL and no per-process copy.
+
+Writers take an exclusive flock and bracket their writes with a sequence
+counter, made odd while writing (a seqlock). Readers retry when the
+counter is odd or changed while they read, and fall back to SQL (None)
+for rooms or dates outside the bitmap. Writers read the bookings while
+holding the lock, so a refresh can't overwrite a newer one with older
+bookings. A failed refresh marks the bitmap stale: readers fall back to
+SQL until the next write rebuilds it.
+
+Layout: a 64 byte header (magic, sequence, base day ordinal, days, rows),
+then `rows` rows of `days / 8` bytes, bits in little-endian order.
+"""
+
+import fcntl
+import logging
+import mmap
+import os
+import struct
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional, TypeVar
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Max
+from django.dispatch import receiver
+
+from .models import Booking, Room
+from .sharding import is_sharded
+from .signals import BookingChange, bookings_changed
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'AVBM'
+STALE = b'AVBS'
+HEADER = struct.Struct('<4s4xQQQQ')
+HEADER_SIZE = 64
+SEQUENCE_OFFSET = 8
+READ_RETRIES = 100
+# rows to allocate beyond the largest room id, so new rooms fit without a rebuild
+SPARE_ROWS = 1024
+
+T = TypeVar('T')
+
+
+def set_nights(row: np.ndarray, first: int, last: int, occupied: bool) -> None:
+    """Set the bits of nights `first` up to, excluding, `last` of a packed row."""
+    start_byte, end_byte = first // 8, (last + 7) // 8
+    bits: np.ndarray = np.unpackbits(row[start_byte:end_byte], bitorder='little')
+    bits[first - start_byte * 8:last - start_byte * 8] = occupied
+    row[start_byte:end_byte] = np.packbits(bits, bitorder='little')
+
+
+class AvailabilityBitmap:
+    """
+    Reader and writer of the bitmap file at `path`.
+    """
+
+    def __init__(self, path: Path, days: int):
+        self.path: Path = Path(path)
+        self.days: int = (days + 7) // 8 * 8
+        self._map: Optional[mmap.mmap] = None
+
+    # reading
+
+    def _mapping(self, size: int = 0) -> Optional[mmap.mmap]:
+        """Map the file read-only, again if it grew past the current mapping."""
+        if self._map is not None and len(self._map) >= max(size, HEADER_SIZE):
+            return self._map
+        try:
+            with open(self.path, 'rb') as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # missing or still empty file
+            return None
+        return self._map if len(self._map) >= max(size, HEADER_SIZE) else None
+
+    def read(self, reader: Callable[[np.ndarray, date], T]) -> Optional[T]:
+        """Run `reader` on a consistent view of the bits, rooms x packed nights.
+
+        Args:
+            reader (Callable): called with the bits and the first night; must
+                not keep references to the bits
+
+        Returns:
+            the result of reader, or None if the bitmap is unavailable or kept
+            changing during all the retries
+        """
+        size: int = HEADER_SIZE
+        for _ in range(READ_RETRIES):
+            mapping: Optional[mmap.mmap] = self._mapping(size)
+            if mapping is None:
+                return None
+            magic, sequence, base_day, days, rows = HEADER.unpack_from(mapping)
+            if magic == STALE:
+                return None
+            if magic != MAGIC or sequence % 2:
+                continue
+            size = HEADER_SIZE + rows * days // 8
+            if len(mapping) < size:
+                continue
+            bits: np.ndarray = np.frombuffer(
+                mapping, np.uint8, rows * days // 8, HEADER_SIZE).reshape(rows, days // 8)
+            result: T = reader(bits, date.fromordinal(base_day))
+            if struct.unpack_from('<Q', mapping, SEQUENCE_OFFSET)[0] == sequence:
+                return result
+        return None
+
+    @staticmethod
+    def nights(bits: np.ndarray, base_day: date, start_date: date, end_date: date) -> Optional[slice]:
+        first: int = (start_date - base_day).days
+        last: int = (end_date - base_day).days
+        if first < 0 or last > bits.shape[1] * 8 or first >= last:
+            return None
+        return slice(first, last)
+
+    def is_busy(self, room_id: int, start_date: date, end_date: date) -> Optional[bool]:
+        """Tell if an active booking of a room overlaps a stay, or None if unknown."""
+        def reader(bits: np.ndarray, base_day: date) -> Optional[bool]:
+            nights: Optional[slice] = self.nights(bits, base_day, start_date, end_date)
+            if nights is None or room_id >= bits.shape[0]:
+                return None
+            start_byte: int = nights.start // 8
+            row: np.ndarray = np.unpackbits(
+                bits[room_id, start_byte:(nights.stop + 7) // 8], bitorder='little')
+            return bool(row[nights.start - start_byte * 8:nights.stop - start_byte * 8].any())
+        return self.read(reader)
+
+    def busy_rooms(self, start_date: date, end_date: date) -> Optional[np.ndarray]:
+        """Return the ids of the rooms with an active booking overlapping a stay.
+
+        Rooms with ids beyond the bitmap have never been booked; they are
+        added by the writer with their first booking.
+        """
+        def reader(bits: np.ndarray, base_day: date) -> Optional[np.ndarray]:
+            nights: Optional[slice] = self.nights(bits, base_day, start_date, end_date)
+            if nights is None:
+                return None
+            start_byte: int = nights.start // 8
+            window: np.ndarray = np.unpackbits(
+                bits[:, start_byte:(nights.stop + 7) // 8], axis=1, bitorder='little')
+            return np.flatnonzero(
+                window[:, nights.start - start_byte * 8:nights.stop - start_byte * 8].any(axis=1))
+        return self.read(reader)
+
+    # writing
+
+    @contextmanager
+    def locked(self) -> Iterator[BinaryIO]:
+        """Open the file and hold the exclusive writer lock."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a+b') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield file
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def mapped(self, file: BinaryIO, size: int = HEADER_SIZE) -> Iterator[mmap.mmap]:
+        """
+        Grow the locked file to at least `size` bytes and map it writable,
+        with the sequence odd until the block exits. The file never shrinks,
+        as readers may still map its end.
+        """
+        length: int = file.seek(0, os.SEEK_END)
+        if length < HEADER_SIZE:
+            file.truncate(0)
+            file.write(HEADER.pack(MAGIC, 0, date.today().toordinal(), self.days, 0)
+                       .ljust(HEADER_SIZE, b'\0'))
+            file.flush()
+        if length < size:
+            file.truncate(size)
+        with mmap.mmap(file.fileno(), 0) as mapping:
+            sequence: int = struct.unpack_from('<Q', mapping, SEQUENCE_OFFSET)[0] | 1
+            struct.pack_into('<Q', mapping, SEQUENCE_OFFSET, sequence)
+            try:
+                yield mapping
+            finally:
+                struct.pack_into('<Q', mapping, SEQUENCE_OFFSET, sequence + 1)
+
+    @contextmanager
+    def writing(self, size: int = HEADER_SIZE) -> Iterator[mmap.mmap]:
+        """Lock the file, then map it writable as `mapped` does."""
+        with self.locked() as file, self.mapped(file, size) as mapping:
+            yield mapping
+
+    def rebuild(self) -> int:
+        """Rewrite the bitmap from active bookings, starting today.
+
+        Returns:
+            int: number of rows (largest room id plus spare rows)
+        """
+        with self.locked() as file:
+            return self._rebuild(file)
+
+    def _rebuild(self, file: BinaryIO) -> int:
+        base_day: date = date.today()
+        end_day: date = base_day + timedelta(days=self.days)
+        rows: int = (Room.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1 + SPARE_ROWS
+        occupied: np.ndarray = np.zeros((rows, self.days), dtype=bool)
+        for room_id, start_date, end_date in Booking.objects.filter(
+                status="active", start_date__lt=end_day, end_date__gt=base_day,
+        ).values_list('room_id', 'start_date', 'end_date').iterator():
+            occupied[room_id, max((start_date - base_day).days, 0):(end_date - base_day).days] = True
+        packed: bytes = np.packbits(occupied, axis=1, bitorder='little').tobytes()
+
+        with self.mapped(file, HEADER_SIZE + len(packed)) as mapping:
+            sequence: int = HEADER.unpack_from(mapping)[1]
+            HEADER.pack_into(mapping, 0, MAGIC, sequence, base_day.toordinal(), self.days, rows)
+            mapping[HEADER_SIZE:HEADER_SIZE + len(packed)] = packed
+        return rows
+
+    def refresh(self, ranges: dict[int, tuple[date, date]]) -> None:
+        """Recompute the bits of rooms over date ranges from active bookings.
+
+        The bitmap is rebuilt instead when a room has no row yet, or when
+        it was marked stale.
+
+        Args:
+            ranges (dict[int, tuple[date, date]]): changed range of each room
+        """
+        with self.locked() as file:
+            bookings: dict[int, list[tuple[date, date]]] = defaultdict(list)
+            for room_id, start_date, end_date in Booking.objects.filter(
+                    room_id__in=ranges, status="active",
+                    start_date__lt=max(end for _, end in ranges.values()),
+                    end_date__gt=min(start for start, _ in ranges.values()),
+            ).values_list('room_id', 'start_date', 'end_date'):
+                bookings[room_id].append((start_date, end_date))
+
+            with self.mapped(file) as mapping:
+                magic, _, base_ordinal, days, rows = HEADER.unpack_from(mapping)
+                if magic == MAGIC and max(ranges) < rows:
+                    self._write_ranges(mapping, date.fromordinal(base_ordinal), days, rows,
+                                       ranges, bookings)
+                    return
+            self._rebuild(file)
+
+    def mark_stale(self) -> None:
+        """Send readers to SQL until the next write rebuilds the bitmap."""
+        with self.writing() as mapping:
+            mapping[:len(STALE)] = STALE
+
+    @staticmethod
+    def _write_ranges(mapping: mmap.mmap, base_day: date, days: int, rows: int,
+                      ranges: dict[int, tuple[date, date]],
+                      bookings: dict[int, list[tuple[date, date]]]) -> None:
+        bits: np.ndarray = np.frombuffer(
+            mapping, np.uint8, rows * days // 8, HEADER_SIZE).reshape(rows, days // 8)
+
+        def nights(start_date: date, end_date: date) -> tuple[int, int]:
+            return max((start_date - base_day).days, 0), min((end_date - base_day).days, days)
+
+        for room_id, (start_date, end_date) in ranges.items():
+            first, last = nights(start_date, end_date)
+            if first >= last:
+                continue
+            set_nights(bits[room_id], first, last, False)
+            for booked_start, booked_end in bookings[room_id]:
+                booked_first, booked_last = nights(max(booked_start, start_date),
+                                                   min(booked_end, end_date))
+                if booked_first < booked_last:
+                    set_nights(bits[room_id], booked_first, booked_last, True)
+
+
+_bitmap: Optional[AvailabilityBitmap] = None
+
+
+def get_bitmap() -> Optional[AvailabilityBitmap]:
+    """
+    Return the process-wide bitmap, or None if `AVAILABILITY_BITMAP` is
+    disabled or rooms are sharded.
+    """
+    global _bitmap
+    config: dict = settings.AVAILABILITY_BITMAP
+    if not config['ENABLED'] or is_sharded():
+        return None
+    if _bitmap is None:
+        _bitmap = AvailabilityBitmap(config['PATH'], config['DAYS'])
+    return _bitmap
+
+
+@receiver(setting_changed)
+def reset_bitmap(setting: str, **kwargs) -> None:
+    global _bitmap
+    if setting == 'AVAILABILITY_BITMAP':
+        _bitmap = None
+
+
+@receiver(bookings_changed)
+def update_bitmap(sender, changes: list[BookingChange], **kwargs) -> None:
+    """
+    Update the bitmap once the changes are committed, so it never shows
+    bookings of a rolled back transaction.
+    """
+    bitmap: Optional[AvailabilityBitmap] = get_bitmap()
+    if bitmap is None:
+        return
+    ranges: dict[int, tuple[date, date]] = {}
+    for change in changes:
+        start_date, end_date = ranges.get(change.room_id, (change.start_date, change.end_date))
+        ranges[change.room_id] = (min(start_date, change.start_date), max(end_date, change.end_date))
+
+    def refresh() -> None:
+        try:
+            bitmap.refresh(ranges)
+        except Exception:
+            logger.exception("Could not update the availability bitmap, marking it stale")
+            bitmap.mark_stale()
+
+    transaction.on_commit(refresh)
@@ -0,0 +1,79 @@
+"""
+Per-user cache of the active bookings list.
+
+The serialized active bookings of a regular user are cached under a key
+holding the user's generation, a random token replaced whenever one of
+their bookings, or a room they booked, changes. Payloads of an older
+generation are never read again and expire after the TTL.
+
+A generation is replaced when the change is made, so the user reads
+their own writes within the transaction, and again after commit, so a
+list read concurrently from the previous state is left under a
+generation nobody reads.
+"""
+
+import hashlib
+from typing import Iterable, Optional
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Booking, Room
+from .sharding import pin_using
+from .signals import BookingChange, bookings_changed
+
+
+def generation_key(user_id: int) -> str:
+    return f'bookings:{user_id}:generation'
+
+
+def booking_list_key(user_id: int, fields: Optional[list[str]]) -> str:
+    """Return the cache key of a user's booking list in its current generation.
+
+    Read it before the bookings, so that a change committed meanwhile
+    leaves the payload under an outdated key.
+
+    Args:
+        user_id (int): owner of the bookings
+        fields (list[str], optional): fields requested with `?fields=`
+
+    Returns:
+        str: the cache key of the serialized list
+    """
+    generation: Optional[str] = cache.get(generation_key(user_id))
+    if generation is None:
+        cache.add(generation_key(user_id), uuid4().hex, None)
+        generation = cache.get(generation_key(user_id))
+    variant: str = hashlib.sha256(','.join(sorted(fields)).encode()).hexdigest()[:16] if fields else 'all'
+    return f'bookings:{user_id}:{generation}:{variant}'
+
+
+def invalidate_booking_lists(user_ids: Iterable[int]) -> None:
+    """Start a new generation of the users' booking lists, now and after commit."""
+    keys: list[str] = [generation_key(user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+
+    def replace() -> None:
+        cache.set_many({key: uuid4().hex for key in keys}, None)
+
+    replace()
+    transaction.on_commit(replace, using=router.db_for_write(Booking))
+
+
+@receiver(bookings_changed)
+def booking_lists_changed(sender, changes: list[BookingChange], **kwargs) -> None:
+    invalidate_booking_lists(change.user_id for change in changes)
+
+
+@receiver(post_save, sender=Room)
+@receiver(pre_delete, sender=Room)
+@pin_using
+def room_changed(sender, instance: Room, created: bool = False, **kwargs) -> None:
+    """Invalidate the lists showing the room in their bookings' room details."""
+    if not created:
+        invalidate_booking_lists(Booking.objects.filter(
+            room=instance, status="active").values_list('user_id', flat=True).distinct())
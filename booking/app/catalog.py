@@ -0,0 +1,123 @@
+"""
+In-memory room catalog.
+
+Each worker keeps the ids, capacities and base prices of all rooms in
+numpy arrays, and answers the price and capacity filters and sorts of the
+room list with vectorized masks. Only the rooms of the returned page are
+loaded from the database.
+
+Room saves and deletes replace a version token in the cache shared by the
+workers, and a worker reloads its snapshot when the token changed. As for
+booking lists, the token is replaced when the change is made and again
+after commit. Bulk `Room.objects.update()` and `bulk_create()` calls send
+no signal and must call `invalidate_catalog`.
+"""
+
+from decimal import Decimal
+from typing import NamedTuple, Optional
+from uuid import uuid4
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Room
+from .sharding import is_sharded
+
+VERSION_KEY = 'room_catalog:version'
+# ?ordering= values and the catalog column they sort by
+ORDERINGS: dict[str, str] = {'price_per_night': 'prices', 'capacity': 'capacities'}
+
+
+class RoomCatalog(NamedTuple):
+    """
+    Snapshot of all rooms by ascending id, with base prices in cents.
+    """
+    version: str
+    room_ids: np.ndarray
+    capacities: np.ndarray
+    prices: np.ndarray
+
+    @classmethod
+    def load(cls, version: str) -> 'RoomCatalog':
+        # One text row instead of a row per room, which psycopg would
+        # decode one by one, parsed by numpy.
+        with connections[Room.objects.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT string_agg(concat_ws(',', id, capacity, (price_per_night * 100)::bigint), "
+                f"',' ORDER BY id) FROM {Room._meta.db_table}")
+            text: Optional[str] = cursor.fetchone()[0]
+        catalog: np.ndarray = np.array(text.split(',') if text else [], dtype=np.int64).reshape(-1, 3)
+        return cls(version, catalog[:, 0].copy(), catalog[:, 1].astype(np.int32),
+                   catalog[:, 2].copy())
+
+    def select(self, min_price: Optional[Decimal] = None, max_price: Optional[Decimal] = None,
+               capacity: Optional[int] = None, excluded: Optional[np.ndarray] = None,
+               ordering: Optional[str] = None) -> np.ndarray:
+        """Filter and sort rooms like the room list.
+
+        Args:
+            min_price (Decimal, optional): lowest price per night
+            max_price (Decimal, optional): highest price per night
+            capacity (int, optional): smallest capacity
+            excluded (np.ndarray, optional): ids of rooms to leave out
+            ordering (str, optional): a key of ORDERINGS, descending with a
+                leading '-'; ties and unordered results are by id
+
+        Returns:
+            np.ndarray: ids of the selected rooms, in order
+        """
+        mask: np.ndarray = np.ones(len(self.room_ids), dtype=bool)
+        if min_price is not None:
+            mask &= self.prices >= float(min_price * 100)
+        if max_price is not None:
+            mask &= self.prices <= float(max_price * 100)
+        if capacity is not None:
+            mask &= self.capacities >= capacity
+        if excluded is not None and len(excluded):
+            mask &= ~np.isin(self.room_ids, excluded)
+        rows: np.ndarray = np.flatnonzero(mask)
+
+        if ordering:
+            keys: np.ndarray = getattr(self, ORDERINGS[ordering.lstrip('-')])[rows]
+            # stable sorts keep ties by ascending id
+            rows = rows[np.argsort(-keys if ordering.startswith('-') else keys, kind='stable')]
+        return self.room_ids[rows]
+
+
+_catalog: Optional[RoomCatalog] = None
+
+
+def get_catalog() -> Optional[RoomCatalog]:
+    """
+    Return the room catalog, reloaded if rooms changed, or None if disabled,
+    sharded or without a shared cache to tell workers of room changes.
+    """
+    global _catalog
+    if not settings.ROOM_CATALOG_SNAPSHOT or not settings.SHARED_CACHE or is_sharded():
+        return None
+    version: Optional[str] = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    if _catalog is None or _catalog.version != version:
+        _catalog = RoomCatalog.load(version)
+    return _catalog
+
+
+def invalidate_catalog() -> None:
+    """Make every worker reload the catalog, now and after commit."""
+    def replace() -> None:
+        cache.set(VERSION_KEY, uuid4().hex, None)
+
+    replace()
+    transaction.on_commit(replace)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_changed(sender, **kwargs) -> None:
+    invalidate_catalog()
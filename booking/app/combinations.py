@@ -0,0 +1,140 @@
+"""
+Cheapest room combinations for a party.
+
+Available rooms are grouped into classes of interchangeable rooms, with
+the same capacity and the same total price for the stay. A bounded
+knapsack pass over the classes, by descending capacity, keeps the k
+cheapest partial combinations for every capacity still short of the
+party. A combination is complete with the room that makes it cover the
+party, so it is minimal: no room can be left out. The work grows with
+the number of classes, the party size and k, not with the number of rooms.
+
+Only candidate rooms are priced: of each capacity, the cheapest by base
+price that a combination among the k cheapest can use, and any room with
+a rate of its own. Rates of a capacity or of every room keep the order
+of the base prices within a capacity, so no cheaper combination is lost.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+from django.db.models import F, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from .models import Room, RoomRate
+from .pricing import quote_catalog, room_catalog
+
+
+class RoomClass(NamedTuple):
+    """
+    Interchangeable available rooms, cheapest to quote first.
+    """
+    capacity: int
+    price: int
+    room_ids: list[int]
+
+
+class Combination(NamedTuple):
+    """
+    Rooms covering a party, with their total capacity and price in cents.
+    """
+    total: int
+    capacity: int
+    room_ids: list[int]
+
+
+def room_classes(room_ids: np.ndarray, capacities: np.ndarray, totals: np.ndarray) -> list[RoomClass]:
+    """Group rooms by capacity and price, largest capacity first."""
+    rooms: dict[tuple[int, int], list[int]] = defaultdict(list)
+    for room_id, capacity, total in zip(room_ids.tolist(), capacities.tolist(), totals.tolist()):
+        if capacity > 0:
+            rooms[capacity, total].append(room_id)
+    return [RoomClass(capacity, price, sorted(ids))
+            for (capacity, price), ids in sorted(rooms.items(), key=lambda item: (-item[0][0], item[0][1]))]
+
+
+def cheapest_combinations(classes: list[RoomClass], party_size: int, k: int) -> list[Combination]:
+    """Find the k cheapest minimal combinations of rooms covering a party.
+
+    Args:
+        classes (list[RoomClass]): available rooms, by descending capacity
+        party_size (int): guests to accommodate
+        k (int): number of combinations to return
+
+    Returns:
+        list[Combination]: the cheapest combinations, then those with fewer rooms
+    """
+    # covered capacity -> k cheapest (price, ((class, count), ...)) reaching it
+    partial: dict[int, list[tuple[int, tuple]]] = {0: [(0, ())]}
+    complete: list[tuple[int, int, tuple]] = []
+    for index, room_class in enumerate(classes):
+        extended: dict[int, list[tuple[int, tuple]]] = defaultdict(list)
+        for covered, options in partial.items():
+            extended[covered].extend(options)
+            for count in range(1, len(room_class.room_ids) + 1):
+                price: int = count * room_class.price
+                reached: int = covered + count * room_class.capacity
+                chosen = [(total + price, choice + ((index, count),)) for total, choice in options]
+                if reached >= party_size:
+                    complete.extend((total, sum(n for _, n in choice), choice)
+                                    for total, choice in chosen)
+                    break
+                extended[reached].extend(chosen)
+        partial = {covered: heapq.nsmallest(k, options) for covered, options in extended.items()}
+        complete = heapq.nsmallest(k, complete)
+
+    return [Combination(
+        total,
+        sum(classes[index].capacity * count for index, count in choice),
+        [room_id for index, count in choice for room_id in classes[index].room_ids[:count]],
+    ) for total, _, choice in complete]
+
+
+def candidate_rooms(party_size: int, start_date: date, end_date: date, k: int) -> QuerySet:
+    """Select the available rooms that can be part of the k cheapest combinations.
+
+    A minimal combination holds at most ceil(party_size / capacity) rooms of
+    a capacity. Any other room of the capacity beyond the cheapest
+    ceil(party_size / capacity) + k - 1 can be swapped for one of k
+    cheaper ones, so the rest is left out.
+
+    Args:
+        party_size (int): guests to accommodate
+        start_date (date): start date of the stay
+        end_date (date): end date of the stay
+        k (int): number of combinations to return
+
+    Returns:
+        QuerySet: the candidate rooms
+    """
+    available: QuerySet = Room.objects.available(start_date, end_date).filter(capacity__gt=0)
+    cheapest: QuerySet = available.annotate(
+        rank=Window(RowNumber(), partition_by=F('capacity'),
+                    order_by=[F('price_per_night').asc(), F('pk').asc()]),
+        usable=(party_size + F('capacity') - 1) / F('capacity') + (k - 1),
+    ).filter(rank__lte=F('usable'))
+    rated: QuerySet = RoomRate.objects.filter(
+        room__isnull=False, start_date__lt=end_date, end_date__gt=start_date).values('room')
+    return available.filter(
+        Q(pk__in=cheapest.values('pk')) | Q(pk__in=rated))
+
+
+def room_combinations(party_size: int, start_date: date, end_date: date, k: int) -> list[Combination]:
+    """Find the k cheapest combinations of rooms available for a stay.
+
+    Args:
+        party_size (int): guests to accommodate
+        start_date (date): start date of the stay
+        end_date (date): end date of the stay
+        k (int): number of combinations to return
+
+    Returns:
+        list[Combination]: the cheapest combinations, priced with the rate calendar
+    """
+    catalog: np.ndarray = room_catalog(
+        candidate_rooms(party_size, start_date, end_date, k).order_by('pk'))
+    room_ids, totals = quote_catalog(catalog, [(start_date, end_date)])
+    return cheapest_combinations(room_classes(room_ids, catalog[:, 1], totals[:, 0]), party_size, k)
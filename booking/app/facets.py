@@ -0,0 +1,78 @@
+"""
+Facets of the room search.
+
+With `?facets=true`, the room list also returns how many of the matching
+rooms fall in each price bucket and have each capacity, for the price
+histogram and capacity counts shown next to the results. They count every
+matching room, not only the returned page, with one query grouping the
+search by (price bucket, capacity), or from the room catalog without a
+query. Each shard's counts are summed when rooms are sharded.
+"""
+
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, F, QuerySet
+from django.db.models.functions import Floor
+
+from .catalog import RoomCatalog
+
+
+def count_rooms(queryset: QuerySet) -> Counter:
+    """Count the rooms of a search by price bucket and capacity.
+
+    Args:
+        queryset (QuerySet): the filtered rooms
+
+    Returns:
+        Counter: number of rooms by (price bucket, capacity)
+    """
+    rows = queryset.order_by().values(
+        'capacity', bucket=Floor(F('price_per_night') / settings.ROOM_FACET_PRICE_WIDTH),
+    ).annotate(count=Count('pk')).values_list('bucket', 'capacity', 'count')
+    return Counter({(int(bucket), capacity): count for bucket, capacity, count in rows})
+
+
+def count_catalog_rooms(catalog: RoomCatalog, room_ids: np.ndarray) -> Counter:
+    """Count rooms selected from the catalog by price bucket and capacity.
+
+    Args:
+        catalog (RoomCatalog): the room catalog
+        room_ids (np.ndarray): ids of the selected rooms
+
+    Returns:
+        Counter: number of rooms by (price bucket, capacity)
+    """
+    if not len(room_ids):
+        return Counter()
+    rows: np.ndarray = np.searchsorted(catalog.room_ids, room_ids)
+    groups: np.ndarray = np.stack([catalog.prices[rows] // (settings.ROOM_FACET_PRICE_WIDTH * 100),
+                                   catalog.capacities[rows]])
+    pairs, counts = np.unique(groups, axis=1, return_counts=True)
+    return Counter({(int(bucket), int(capacity)): int(count)
+                    for (bucket, capacity), count in zip(pairs.T, counts)})
+
+
+def facets(counts: Counter) -> dict:
+    """Return the price buckets and capacity counts of the room list.
+
+    Args:
+        counts (Counter): number of rooms by (price bucket, capacity)
+
+    Returns:
+        dict: non-empty price buckets from `min` up to, excluding, `max`,
+        and capacities, with their number of rooms, in ascending order
+    """
+    width: int = settings.ROOM_FACET_PRICE_WIDTH
+    prices: Counter = Counter()
+    capacities: Counter = Counter()
+    for (bucket, capacity), count in counts.items():
+        prices[bucket] += count
+        capacities[capacity] += count
+    return {
+        'price': [{'min': bucket * width, 'max': (bucket + 1) * width, 'count': prices[bucket]}
+                  for bucket in sorted(prices)],
+        'capacity': [{'capacity': capacity, 'count': capacities[capacity]}
+                     for capacity in sorted(capacities)],
+    }
@@ -0,0 +1,116 @@
+"""
+Password hashing in a process pool.
+
+Hashing a password is deliberately slow CPU work, hundreds of
+milliseconds with the default PBKDF2 iterations. Registrations hash in a
+small pool of processes instead, so a burst of signups doesn't hold the
+GIL of the server worker serving every other endpoint. The request
+thread still waits for its hash, so registrations occupy worker threads:
+the passwords waiting for the pool are bounded, and past MAX_PENDING
+registrations are rejected with 503 and Retry-After.
+
+There is no async registration path that would release the thread while
+the hash is computed: DRF views are synchronous and the server runs them
+in threaded WSGI workers, where an async view would block its thread all
+the same.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .admission import Overloaded
+
+
+class HashingOverloaded(Overloaded):
+    """
+    Raised when too many passwords are already waiting to be hashed.
+    """
+    default_detail = 'Too many registrations are being processed, please retry.'
+
+
+def setup_worker(settings_module: str) -> None:
+    """Configure Django in a freshly spawned hashing process."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def process_pool(workers: Optional[int]) -> ProcessPoolExecutor:
+    """
+    Start a pool of hashing processes, one per core if `workers` is None.
+    They are spawned rather than forked, as forking a threaded server
+    process is unsafe.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=setup_worker, initargs=(os.environ['DJANGO_SETTINGS_MODULE'],))
+
+
+class PasswordHasherPool:
+    """
+    Process pool of the server worker for registrations, built from
+    `settings.PASSWORD_HASHING`. The processes start on first use, after
+    the server forked its workers.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def reserve(self):
+        """
+        Count a password as waiting for the pool for the duration of the
+        block. Raises HashingOverloaded if MAX_PENDING are already waiting.
+        """
+        with self.lock:
+            if self.pending >= self.config['MAX_PENDING']:
+                raise HashingOverloaded(wait=self.config['RETRY_AFTER'])
+            self.pending += 1
+            if self.executor is None:
+                self.executor = process_pool(self.config['WORKERS'])
+        try:
+            yield self.executor
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def hash(self, password: Optional[str]) -> str:
+        """Hash a password like `make_password`, in the pool, waiting without the GIL."""
+        with self.reserve() as executor:
+            return executor.submit(make_password, password).result()
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[PasswordHasherPool] = None
+
+
+def get_hasher_pool() -> PasswordHasherPool:
+    """Return the process-wide password hashing pool."""
+    global _pool
+    if _pool is None:
+        _pool = PasswordHasherPool(settings.PASSWORD_HASHING)
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_hasher_pool(setting, **kwargs) -> None:
+    global _pool
+    if setting == 'PASSWORD_HASHING' and _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
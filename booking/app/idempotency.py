@@ -0,0 +1,113 @@
+"""
+Idempotency keys for unsafe booking requests.
+
+The first response to a request carrying an `Idempotency-Key` header is
+stored in the cache per user and key, and replayed byte-for-byte for
+retries. Concurrent retries wait for the in-flight request instead of
+executing again. Keys are ignored unless the cache is shared by all
+workers (`SHARED_CACHE`), as retries may reach another worker.
+"""
+
+import hashlib
+from functools import wraps
+from time import monotonic, sleep
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def cache_key_for(user_id: int, key: str) -> str:
+    """Return the cache key of the stored response for a user's idempotency key."""
+    return f'idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def fingerprint(request: Request) -> str:
+    """Hash the parts of a request that must match for a key to be reused."""
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def replay(stored: dict, request_fingerprint: str):
+    """Rebuild the stored response, unless the key was used for another request."""
+    if stored['fingerprint'] != request_fingerprint:
+        return Response({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request.'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    response = HttpResponse(stored['content'], status=stored['status'])
+    for header, value in stored['headers']:
+        response[header] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def wait_for_response(cache_key: str, lock_key: str) -> Optional[dict]:
+    """Wait for the in-flight request holding the lock to store its response."""
+    deadline: float = monotonic() + settings.IDEMPOTENCY['WAIT']
+    while monotonic() < deadline:
+        stored: Optional[dict] = cache.get(cache_key)
+        if stored is not None or cache.get(lock_key) is None:
+            return stored
+        sleep(POLL_INTERVAL)
+    return None
+
+
+def idempotent(view_method):
+    """
+    Make a view method idempotent for requests with an `Idempotency-Key` header.
+    Responses with a 5xx status are not stored so that the request can be retried.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request: Request, *args, **kwargs):
+        key: Optional[str] = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not settings.SHARED_CACHE:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'error': f'{IDEMPOTENCY_HEADER} is too long.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key: str = cache_key_for(request.user.pk, key)
+        lock_key = f'{cache_key}:lock'
+        request_fingerprint: str = fingerprint(request)
+
+        stored: Optional[dict] = cache.get(cache_key)
+        if stored is None and not cache.add(lock_key, True, settings.IDEMPOTENCY['LOCK_TIMEOUT']):
+            stored = wait_for_response(cache_key, lock_key)
+            if stored is None:
+                return Response({'error': f'A request with this {IDEMPOTENCY_HEADER} is in progress.'},
+                                status=status.HTTP_409_CONFLICT)
+        if stored is not None:
+            return replay(stored, request_fingerprint)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(lock_key)
+            raise
+
+        def store(rendered) -> None:
+            if rendered.status_code < 500:
+                cache.set(cache_key, {
+                    'fingerprint': request_fingerprint,
+                    'status': rendered.status_code,
+                    'headers': list(rendered.items()),
+                    'content': rendered.content,
+                }, settings.IDEMPOTENCY['TTL'])
+            cache.delete(lock_key)
+
+        response.add_post_render_callback(store)
+        return response
+
+    return wrapper
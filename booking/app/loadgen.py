@@ -0,0 +1,331 @@
+"""
+Mixed-workload load generator.
+
+Drives a running server with a mix of room searches, logins, token
+refreshes, booking creations and cancellations, and reports latency
+percentiles, error rates and throughput per operation.
+
+The load is open-loop: requests start on schedule at the target rate,
+whether or not earlier ones finished, and latency is measured from the
+scheduled start. A stalled server shows up in the percentiles instead of
+slowing the load down (coordinated omission). Requests go through a
+minimal HTTP/1.1 client over a pool of keep-alive asyncio connections,
+so the client costs little next to the server it measures.
+"""
+
+import asyncio
+import json
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+from urllib.parse import urlencode, urlsplit
+
+# operation -> relative weight
+DEFAULT_MIX: dict[str, int] = {'search': 70, 'login': 8, 'refresh': 7, 'book': 10, 'cancel': 5}
+OPERATIONS: dict[str, tuple[str, str]] = {
+    'search': ('GET', '/app/rooms/'),
+    'login': ('POST', '/api/token/'),
+    'refresh': ('POST', '/api/token/refresh/'),
+    'book': ('POST', '/app/bookings/'),
+    'cancel': ('POST', '/app/bookings/{booking_number}/cancel/'),
+}
+# statuses of a working server: a booking is refused when the room is taken
+EXPECTED_STATUSES: dict[str, set[int]] = {
+    'search': {200}, 'login': {200}, 'refresh': {200}, 'book': {201, 400}, 'cancel': {200},
+}
+BOOKING_WINDOW_DAYS = 365
+
+
+class LoadError(Exception):
+    pass
+
+
+class HTTPResponse(NamedTuple):
+    status: int
+    body: bytes
+
+
+class Connection:
+    """
+    A keep-alive HTTP/1.1 connection, opened on first use and reopened
+    when the server closes it.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host: str = host
+        self.port: int = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None,
+                      token: Optional[str] = None) -> HTTPResponse:
+        """Send a request, retrying once on a connection the server closed while idle."""
+        reused: bool = self.writer is not None
+        try:
+            return await self._request(method, path, body, token)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+        return await self._request(method, path, body, token)
+
+    async def _request(self, method: str, path: str, body: Optional[dict],
+                       token: Optional[str]) -> HTTPResponse:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload: bytes = json.dumps(body).encode() if body is not None else b''
+        lines: list[str] = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                            'Accept: application/json', f'Content-Length: {len(payload)}']
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        if token is not None:
+            lines.append(f'Authorization: Bearer {token}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await self.writer.drain()
+
+        status_line: bytes = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed by the server')
+        status: int = int(status_line.split()[1])
+        headers: dict[str, str] = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks: list[bytes] = []
+            while size := int((await self.reader.readline()).split(b';')[0], 16):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            await self.reader.readline()
+            content: bytes = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return HTTPResponse(status, content)
+
+
+@dataclass
+class VirtualUser:
+    """
+    A guest account used by the load, with its tokens and active bookings.
+    """
+    email: str
+    password: str
+    access: Optional[str] = None
+    refresh: Optional[str] = None
+    bookings: list[str] = field(default_factory=list)
+
+
+@dataclass
+class OperationStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values, q from 0 to 100."""
+    if not ordered:
+        return 0.0
+    rank: int = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def parse_mix(mix: dict) -> dict[str, float]:
+    """Validate a workload mix of operation weights.
+
+    Args:
+        mix (dict): relative weight of each operation, e.g. {"search": 9, "book": 1}
+
+    Returns:
+        dict[str, float]: the weights of the operations with a positive weight
+
+    Raises:
+        LoadError: if the mix names unknown operations or has no positive weight
+    """
+    unknown: set = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise LoadError(f"Unknown operations in the mix: {', '.join(sorted(unknown))}. "
+                        f"Known operations: {', '.join(OPERATIONS)}.")
+    weights: dict[str, float] = {name: float(weight) for name, weight in mix.items() if float(weight) > 0}
+    if not weights:
+        raise LoadError("The mix has no operation with a positive weight.")
+    return weights
+
+
+class LoadGenerator:
+    """
+    Run a workload mix against a server at `base_url` and collect statistics.
+    """
+
+    def __init__(self, base_url: str, users: list[VirtualUser], mix: dict[str, float],
+                 connections: int = 20, seed: Optional[int] = None):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise LoadError(f"Only http:// servers are supported, got {base_url!r}.")
+        if not users:
+            raise LoadError("The load needs at least one user.")
+        self.base_url: str = base_url
+        self.users: list[VirtualUser] = users
+        self.mix: dict[str, float] = parse_mix(mix)
+        self.random: random.Random = random.Random(seed)
+        self.room_ids: list[int] = []
+        self.stats: dict[str, OperationStats] = defaultdict(OperationStats)
+        self.pool: asyncio.Queue = asyncio.Queue()
+        for _ in range(connections):
+            self.pool.put_nowait(Connection(parts.hostname, parts.port or 80))
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None,
+                      token: Optional[str] = None) -> HTTPResponse:
+        connection: Connection = await self.pool.get()
+        try:
+            return await connection.request(method, path, body, token)
+        except BaseException:
+            connection.close()
+            raise
+        finally:
+            self.pool.put_nowait(connection)
+
+    async def setup(self) -> None:
+        """Log in every user and list the rooms to book, outside the measurements."""
+        response: HTTPResponse = await self.request('GET', '/app/rooms/?fields=id')
+        if response.status != 200:
+            raise LoadError(f"Listing rooms failed with status {response.status}.")
+        self.room_ids = [room['id'] for room in json.loads(response.body)]
+        if not self.room_ids and {'book', 'cancel'} & set(self.mix):
+            raise LoadError("There are no rooms to book.")
+        for user in self.users:
+            if await self.login(user) != 200:
+                raise LoadError(f"Could not log in as {user.email}.")
+
+    async def login(self, user: VirtualUser) -> int:
+        response: HTTPResponse = await self.request(
+            'POST', OPERATIONS['login'][1], {'email': user.email, 'password': user.password})
+        if response.status == 200:
+            tokens: dict = json.loads(response.body)
+            user.access, user.refresh = tokens['access'], tokens['refresh']
+        return response.status
+
+    async def perform(self, operation: str, user: VirtualUser) -> tuple[str, int]:
+        """Perform an operation as a user.
+
+        Returns:
+            tuple[str, int]: the operation actually performed, a booking when
+            the user has nothing to cancel, and the response status
+        """
+        if operation == 'cancel' and not user.bookings:
+            operation = 'book'
+        method, path = OPERATIONS[operation]
+
+        if operation == 'search':
+            start: date = date.today() + timedelta(days=self.random.randrange(BOOKING_WINDOW_DAYS))
+            query: dict = {'start_date': start, 'end_date': start + timedelta(days=self.random.randint(1, 7))}
+            if self.random.random() < 0.5:
+                query['capacity'] = self.random.randint(1, 4)
+            return operation, (await self.request(method, f'{path}?{urlencode(query)}')).status
+        if operation == 'login':
+            return operation, await self.login(user)
+        if operation == 'refresh':
+            response: HTTPResponse = await self.request(method, path, {'refresh': user.refresh})
+            if response.status == 200:
+                user.access = json.loads(response.body)['access']
+            return operation, response.status
+        if operation == 'book':
+            start = date.today() + timedelta(days=self.random.randrange(1, BOOKING_WINDOW_DAYS))
+            response = await self.request(method, path, {
+                'room': self.random.choice(self.room_ids), 'start_date': str(start),
+                'end_date': str(start + timedelta(days=self.random.randint(1, 3)))}, user.access)
+            if response.status == 201:
+                user.bookings.append(json.loads(response.body)['booking_number'])
+        else:
+            booking_number: str = user.bookings.pop(self.random.randrange(len(user.bookings)))
+            response = await self.request(
+                method, path.format(booking_number=booking_number), token=user.access)
+        if response.status == 401:
+            # the access token expired: log in again for the next operation
+            await self.login(user)
+        return operation, response.status
+
+    async def execute(self, scheduled: float, measured: bool) -> None:
+        operation: str = self.random.choices(list(self.mix), list(self.mix.values()))[0]
+        user: VirtualUser = self.random.choice(self.users)
+        try:
+            operation, status = await self.perform(operation, user)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            status = 0
+        if not measured:
+            return
+        stats: OperationStats = self.stats[operation]
+        stats.latencies.append(asyncio.get_running_loop().time() - scheduled)
+        stats.statuses[status] += 1
+        if status not in EXPECTED_STATUSES[operation]:
+            stats.errors += 1
+
+    async def run(self, rate: float, duration: float, warmup: float = 0) -> dict:
+        """Start operations at `rate` per second for `warmup` then `duration` seconds.
+
+        Returns:
+            dict: the report of the measured `duration`, see `report`
+        """
+        await self.setup()
+        loop = asyncio.get_running_loop()
+        tasks: set[asyncio.Task] = set()
+        start: float = loop.time()
+        for index in range(int(rate * (warmup + duration))):
+            scheduled: float = start + index / rate
+            delay: float = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self.execute(scheduled, scheduled - start >= warmup))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
+        return self.report(rate, duration, loop.time() - start - warmup)
+
+    def report(self, rate: float, duration: float, elapsed: float) -> dict:
+        """Summarize the measured requests per operation.
+
+        Latencies are in milliseconds from the scheduled start. Throughput
+        is per second over the measured time, until the last response.
+        """
+        operations: dict[str, dict] = {}
+        for operation, stats in sorted(self.stats.items()):
+            ordered: list[float] = sorted(stats.latencies)
+            requests: int = len(ordered)
+            operations[operation] = {
+                'method': OPERATIONS[operation][0],
+                'path': OPERATIONS[operation][1],
+                'requests': requests,
+                'throughput': round(requests / elapsed, 2),
+                'errors': stats.errors,
+                'error_rate': round(stats.errors / requests, 4),
+                'latency_ms': {name: round(percentile(ordered, q) * 1000, 2)
+                               for name, q in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))},
+                'statuses': {str(status): count for status, count in sorted(stats.statuses.items())},
+            }
+        requests = sum(operation['requests'] for operation in operations.values())
+        errors: int = sum(operation['errors'] for operation in operations.values())
+        return {
+            'target': self.base_url,
+            'rate': rate,
+            'duration': duration,
+            'mix': self.mix,
+            'requests': requests,
+            'throughput': round(requests / elapsed, 2),
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+            'operations': operations,
+        }
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.bitmap import get_bitmap
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the shared availability bitmap from active bookings, "
+            "starting today. Run daily.")
+
+    def handle(self, *args, **options):
+        bitmap = get_bitmap()
+        if bitmap is None:
+            raise CommandError('The availability bitmap is disabled (AVAILABILITY_BITMAP).')
+        rows: int = bitmap.rebuild()
+        self.stdout.write(f'Built the availability bitmap of {rows} rooms x {bitmap.days} nights '
+                          f'at {bitmap.path}.')
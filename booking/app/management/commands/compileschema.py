@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.schema import artifact_path, generate_schema, render_schema
+
+
+class Command(BaseCommand):
+    help = "Precompile the OpenAPI schema served at /api/schema/."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Exit with a non-zero status if the artifact does not match the code.')
+
+    def handle(self, *args, **options):
+        rendered: dict[str, bytes] = render_schema(generate_schema())
+
+        if options['check']:
+            stale: list[str] = [
+                str(artifact_path(fmt)) for fmt, content in rendered.items()
+                if not artifact_path(fmt).exists() or artifact_path(fmt).read_bytes() != content
+            ]
+            if stale:
+                raise CommandError(
+                    'Schema artifact is out of date, run compileschema: ' + ', '.join(stale))
+            self.stdout.write('Schema artifact is up to date.')
+            return
+
+        for fmt, content in rendered.items():
+            path = artifact_path(fmt)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            self.stdout.write(f'Wrote {path}')
@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.outbox import DispatchStats, drain, pending_count, purge_dispatched, sink_for
+
+
+class Command(BaseCommand):
+    help = ("Deliver pending booking events of the outbox in batches to a JSON lines file "
+            "or an HTTP endpoint, and print the lag and throughput.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('sink', help='File to append JSON lines to, or http(s):// URL '
+                                         'to POST JSON arrays to.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Events per delivery.')
+        parser.add_argument('--follow', action='store_true',
+                            help='Keep polling for new events after the outbox is drained.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds between polls with --follow.')
+        parser.add_argument('--purge-after', type=int, metavar='DAYS',
+                            help='Delete events delivered more than DAYS days ago.')
+
+    def handle(self, *args, **options):
+        sink = sink_for(options['sink'])
+        while True:
+            try:
+                stats: DispatchStats = drain(sink, options['batch_size'])
+            except (OSError, URLError) as exc:
+                raise CommandError(f'Delivery failed, the batch stays pending: {exc}') from exc
+            if stats.events or not options['follow']:
+                self.report(stats)
+            if options['purge_after'] is not None:
+                purged: int = purge_dispatched(timedelta(days=options['purge_after']))
+                if purged:
+                    self.stdout.write(f'Purged {purged} delivered events.')
+            if not options['follow']:
+                return
+            time.sleep(options['interval'])
+
+    def report(self, stats: DispatchStats) -> None:
+        pending: int = pending_count()
+        self.stdout.write(
+            f'Dispatched {stats.events} events in {stats.batches} batches '
+            f'({stats.throughput:.0f} events/s), lag p50 {stats.lag(50):.3f}s, '
+            f'max {stats.lag(100):.3f}s, {pending} pending.')
@@ -0,0 +1,66 @@
+import asyncio
+import json
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from app.loadgen import DEFAULT_MIX, LoadError, LoadGenerator, VirtualUser
+from app.models import CustomUser
+from app.sharding import replicate
+
+
+class Command(BaseCommand):
+    help = ("Drive a running server with a mix of room searches, logins, token refreshes, "
+            "booking creations and cancellations, and print latency percentiles, error "
+            "rates and throughput per operation as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', default='http://127.0.0.1:8000',
+                            help='Base URL of the server.')
+        parser.add_argument('--mix', type=Path,
+                            help='JSON file of operation weights, default: '
+                                 + json.dumps(DEFAULT_MIX))
+        parser.add_argument('--rate', type=float, default=50,
+                            help='Operations started per second.')
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Measured seconds.')
+        parser.add_argument('--warmup', type=float, default=5,
+                            help='Seconds of load before measuring.')
+        parser.add_argument('--connections', type=int, default=20,
+                            help='Keep-alive connections to the server.')
+        parser.add_argument('--users', type=int, default=20,
+                            help='Guest accounts loadtest-<n>@example.com to use.')
+        parser.add_argument('--password', default='loadtest-password',
+                            help='Password of the guest accounts.')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Create the missing guest accounts in the database first.')
+        parser.add_argument('--seed', type=int, help='Seed of the random workload.')
+        parser.add_argument('--output', type=Path, help='Write the report to this file.')
+
+    def handle(self, *args, **options):
+        emails: list[str] = [f'loadtest-{n}@example.com' for n in range(options['users'])]
+        if options['create_users']:
+            password: str = make_password(options['password'])
+            CustomUser.objects.bulk_create(
+                [CustomUser(email=email, password=password) for email in emails],
+                ignore_conflicts=True)
+            replicate(CustomUser.objects.filter(email__in=emails))
+
+        try:
+            mix: dict = json.loads(options['mix'].read_text()) if options['mix'] else DEFAULT_MIX
+            report: dict = asyncio.run(self.run(emails, mix, options))
+        except (OSError, ValueError, LoadError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        output: str = json.dumps(report, indent=2)
+        if options['output']:
+            options['output'].write_text(output + '\n')
+        self.stdout.write(output)
+
+    @staticmethod
+    async def run(emails: list[str], mix: dict, options: dict) -> dict:
+        generator = LoadGenerator(
+            options['url'], [VirtualUser(email, options['password']) for email in emails],
+            mix, options['connections'], options['seed'])
+        return await generator.run(options['rate'], options['duration'], options['warmup'])
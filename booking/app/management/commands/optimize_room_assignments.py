@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from app.assignment import OptimizationResult, optimize_room_type
+from app.models import RoomType
+
+
+class Command(BaseCommand):
+    help = ("Reassign future bookings made by room type among the rooms of the type "
+            "to close short gaps between stays.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room-type', type=int, action='append', dest='room_types',
+                            help='ID of a room type to optimize, all types by default.')
+        parser.add_argument('--max-gap', type=int, default=1,
+                            help='Gaps of at most this many nights count as unsellable.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report the result without moving bookings.')
+
+    def handle(self, *args, **options):
+        room_types = RoomType.objects.order_by('pk')
+        if options['room_types']:
+            room_types = room_types.filter(pk__in=options['room_types'])
+        for room_type in room_types:
+            result: OptimizationResult = optimize_room_type(
+                room_type, options['max_gap'], options['dry_run'])
+            if not result.feasible:
+                self.stderr.write(f'{room_type}: no valid assignment, bookings left unchanged.')
+                continue
+            self.stdout.write(
+                f'{room_type}: moved {result.moved} of {result.bookings} bookings, '
+                f'gap nights {result.gaps_before} -> {result.gaps_after}.')
@@ -0,0 +1,68 @@
+import csv
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+
+from app.hashing import process_pool
+from app.models import CustomUser
+from app.sharding import replicate
+
+
+class Command(BaseCommand):
+    help = ("Create users from a CSV file of `email[,password]` rows, hashing the passwords "
+            "in parallel on all cores. Users without a password get an unusable one and "
+            "must reset it. Existing emails are skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', type=Path, help='CSV file without a header row.')
+        parser.add_argument('--workers', type=int,
+                            help='Hashing processes, one per core by default.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users hashed and inserted together.')
+
+    def handle(self, *args, **options):
+        users: dict[str, str] = {}
+        invalid: int = 0
+        try:
+            with open(options['csv_file'], newline='') as file:
+                for row in csv.reader(file):
+                    if not row or not row[0].strip():
+                        continue
+                    email: str = CustomUser.objects.normalize_email(row[0].strip())
+                    try:
+                        validate_email(email)
+                    except ValidationError:
+                        invalid += 1
+                        self.stderr.write(f'Skipping invalid email: {row[0]}')
+                        continue
+                    users.setdefault(email, row[1] if len(row) > 1 and row[1] else None)
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+
+        emails: list[str] = list(users)
+        existing: set[str] = set()
+        for start in range(0, len(emails), options['batch_size']):
+            existing.update(CustomUser.objects.filter(
+                email__in=emails[start:start + options['batch_size']]).values_list('email', flat=True))
+        emails = [email for email in emails if email not in existing]
+
+        created: int = 0
+        with process_pool(options['workers']) as executor:
+            for start in range(0, len(emails), options['batch_size']):
+                batch: list[str] = emails[start:start + options['batch_size']]
+                passwords: list[str] = list(executor.map(
+                    make_password, [users[email] for email in batch], chunksize=16))
+                CustomUser.objects.bulk_create(
+                    [CustomUser(email=email, password=password)
+                     for email, password in zip(batch, passwords)], ignore_conflicts=True)
+                # conflicting rows, e.g. of users registering meanwhile, are skipped:
+                # count the rows holding the new hashes, which are salted and unique
+                created += CustomUser.objects.filter(
+                    email__in=batch, password__in=passwords).count()
+                # bulk inserts send no post_save to copy the users to the shards
+                replicate(CustomUser.objects.filter(email__in=batch))
+        self.stdout.write(f'Created {created} users, skipped {len(existing)} existing '
+                          f'and {invalid} invalid.')
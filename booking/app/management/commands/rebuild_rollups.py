@@ -0,0 +1,19 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily occupancy and revenue rollups from active bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', type=date.fromisoformat,
+                            help='First night to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--end-date', type=date.fromisoformat,
+                            help='End of the range to rebuild, excluded (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        written: int = rebuild_rollups(options['start_date'], options['end_date'])
+        self.stdout.write(f'Rebuilt rollups: {written} occupied nights.')
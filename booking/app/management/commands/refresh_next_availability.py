@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app.next_availability import refresh_stale_next_availability
+
+
+class Command(BaseCommand):
+    help = ("Refresh the next available dates of rooms that fell into the past. "
+            "Run daily.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Refresh every room.')
+
+    def handle(self, *args, **options):
+        refreshed: int = refresh_stale_next_availability(options['all'])
+        self.stdout.write(f'Refreshed next availability of {refreshed} rooms.')
@@ -0,0 +1,157 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+from typing import Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import RequestProfile
+from .profiling import QueryRecorder, StackSampler, write_profile
+from .querylog import NPlusOneError, QueryLog, RepeatedQuery, describe
+
+logger = logging.getLogger(__name__)
+
+
+class ApiExemptMixin:
+    """
+    Skip the middleware for paths in `LEAN_MIDDLEWARE_EXEMPT_PATHS`.
+    API views authenticate with JWT only and never use sessions, messages
+    or CSRF cookies, so only browser routes such as /admin/ need them.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.exempt_paths: tuple[str, ...] = tuple(
+            settings.LEAN_MIDDLEWARE_EXEMPT_PATHS)
+
+    def is_exempt(self, request: HttpRequest) -> bool:
+        return request.path_info.startswith(self.exempt_paths)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_exempt(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class LeanSessionMiddleware(ApiExemptMixin, SessionMiddleware):
+    pass
+
+
+class LeanCsrfViewMiddleware(ApiExemptMixin, CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if self.is_exempt(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class LeanAuthenticationMiddleware(ApiExemptMixin, AuthenticationMiddleware):
+    pass
+
+
+class LeanMessageMiddleware(ApiExemptMixin, MessageMiddleware):
+    pass
+
+
+class ProfilingMiddleware:
+    """
+    Profile a sample of requests, at `PROFILING['SAMPLE_RATE']`, and any
+    request of a superuser sending the `X-Profile` header. The stack
+    samples and SQL log are written to `PROFILING['DIR']` and the request
+    is recorded as a RequestProfile, listed in the admin.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_superuser(self, request: HttpRequest) -> bool:
+        """
+        Check the session user on browser routes, and the JWT on API routes
+        where authentication otherwise only happens in the view.
+        """
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_superuser:
+            return True
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return authenticated is not None and authenticated[0].is_superuser
+
+    def get_trigger(self, request: HttpRequest) -> Optional[str]:
+        if 'X-Profile' in request.headers and self.is_superuser(request):
+            return 'header'
+        if random.random() < settings.PROFILING['SAMPLE_RATE']:
+            return 'sample'
+        return None
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        trigger: Optional[str] = self.get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start: float = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            with StackSampler(settings.PROFILING['INTERVAL']) as sampler:
+                response: HttpResponse = self.get_response(request)
+        duration: float = time.perf_counter() - start
+
+        try:
+            self.save_profile(request, response, trigger, duration, sampler, recorder)
+        except Exception:
+            logger.exception("Could not save the profile of %s", request.path)
+        return response
+
+    def save_profile(self, request: HttpRequest, response: HttpResponse, trigger: str,
+                     duration: float, sampler: StackSampler, recorder: QueryRecorder) -> None:
+        url_name: str = request.resolver_match.url_name if request.resolver_match else ''
+        name: str = f"{timezone.now():%Y%m%d-%H%M%S}-{url_name or 'unresolved'}-{uuid4().hex[:8]}"
+        stacks_file, sql_file = write_profile(
+            settings.PROFILING['DIR'], name, sampler, recorder)
+        RequestProfile.objects.create(
+            url_name=url_name, method=request.method, path=request.path[:255],
+            status_code=response.status_code, duration=duration * 1000,
+            query_count=len(recorder.queries), query_time=recorder.total_time * 1000,
+            trigger=trigger, stacks_file=str(stacks_file), sql_file=str(sql_file))
+
+
+class QueryLogMiddleware:
+    """
+    Development and test aid configured by `QUERY_LOG`: report SQL
+    templates repeated at least N_PLUS_ONE_THRESHOLD times in a request
+    as N+1 queries, raising NPlusOneError if RAISE is set, and log
+    queries slower than SLOW_QUERY_MS.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_LOG['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        config: dict = settings.QUERY_LOG
+        with QueryLog(slow_query_ms=config['SLOW_QUERY_MS']) as log:
+            response: HttpResponse = self.get_response(request)
+
+        repeated: list[RepeatedQuery] = log.repeated(config['N_PLUS_ONE_THRESHOLD'])
+        if repeated:
+            message: str = f"N+1 queries in {request.method} {request.path}:\n{describe(repeated)}"
+            if config['RAISE']:
+                raise NPlusOneError(message)
+            logger.warning(message)
+        return response
@@ -1,7 +1,77 @@
 import uuid
-from django.db import models
+from django.db import models, connections
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from datetime import date
+from typing import Optional
+
+
+class RoomType(models.Model):
+    """
+    A class of interchangeable rooms. Guests can book a type instead of a
+    room, and the room is assigned by the system.
+
+    Attributes:
+        name (CharField): The name of the room type.
+        price_per_night (DecimalField): The price per night of rooms of the type.
+        capacity (IntegerField): The capacity of rooms of the type.
+    """
+    name: str = models.CharField(max_length=100)
+    price_per_night: float = models.DecimalField(
+        max_digits=6, decimal_places=2)
+    capacity: int = models.IntegerField()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class Hotel(models.Model):
+    """
+    A property. Its rooms and their bookings are stored together on one
+    of the `ROOM_SHARDS` databases.
+
+    Attributes:
+        name (CharField): The name of the hotel.
+        city (CharField): The city of the hotel.
+    """
+    name: str = models.CharField(max_length=100)
+    city: str = models.CharField(max_length=100, blank=True)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class RoomQuerySet(models.QuerySet):
+
+    def available(self, start_date: date, end_date: date) -> 'RoomQuerySet':
+        """
+        Filter rooms without an active booking between start_date and end_date,
+        in one query instead of one `is_available` query per room.
+        """
+        return self.exclude(models.Exists(Booking.objects.filter(
+            room=models.OuterRef('pk'),
+            status="active",
+            start_date__lt=end_date,
+            end_date__gt=start_date
+        )))
+
+    def create(self, **kwargs) -> 'Room':
+        """
+        Create a room on the shard of its hotel, unless `using()` picked a
+        database; `QuerySet.create` would bypass the router's placement.
+        """
+        room: Room = self.model(**kwargs)
+        room.save(force_insert=True, using=self._db)
+        return room
+
+    def with_ids(self, ids: list[int], include: bool = True) -> 'RoomQuerySet':
+        """
+        Keep (or with include=False, drop) the rooms with the given ids. The
+        ids are bound as one array parameter, so any number of them fits.
+        """
+        column: str = f'"{self.model._meta.db_table}"."{self.model._meta.pk.column}"'
+        condition: str = f'{column} = ANY(%s)' if include else f'NOT ({column} = ANY(%s))'
+        return self.filter(models.expressions.RawSQL(
+            condition, (list(ids),), output_field=models.BooleanField()))
 
 
 class Room(models.Model):
@@ -12,17 +82,31 @@ class Room(models.Model):
         name (CharField): The name of the room.
         price_per_night (DecimalField): The price per night for booking the room.
         capacity (IntegerField): The maximum number of people the room can accommodate.
+        room_type (ForeignKey): The type of the room, if it can be booked by type.
+        hotel (ForeignKey): The hotel of the room, which picks its database shard.
     """
     name: str = models.CharField(max_length=100)
     price_per_night: float = models.DecimalField(
         max_digits=6, decimal_places=2)
     capacity: int = models.IntegerField()
+    room_type: RoomType = models.ForeignKey(
+        RoomType, on_delete=models.SET_NULL, null=True, blank=True, related_name='rooms')
+    hotel: Hotel = models.ForeignKey(
+        Hotel, on_delete=models.PROTECT, null=True, blank=True, related_name='rooms')
+
+    objects = RoomQuerySet.as_manager()
 
     def is_available(self, start_date: date, end_date: date) -> bool:
         """
         Check if the room is available for booking between start_date and end_date.
-        Only considers active bookings.
+        Only considers active bookings, read from the availability bitmap
+        when it covers the room and the dates.
         """
+        from .bitmap import get_bitmap
+        bitmap = get_bitmap()
+        busy: Optional[bool] = bitmap.is_busy(self.pk, start_date, end_date) if bitmap else None
+        if busy is not None:
+            return not busy
         overlapping_bookings = Booking.objects.filter(
             room=self,
             status="active",
@@ -32,6 +116,45 @@ class Room(models.Model):
         return not overlapping_bookings.exists()
 
 
+class RoomRate(models.Model):
+    """
+    Price per night over a date range, overriding `Room.price_per_night`.
+    A rate applies to one room, to every room of a capacity (room group),
+    or to every room when neither is set. Room rates take precedence over
+    group rates, which take precedence over rates for every room; ties are
+    broken by priority, then by the most recently created rate.
+
+    Attributes:
+        room (ForeignKey): The room the rate applies to, if any.
+        capacity (IntegerField): The capacity of the rooms the rate applies to, if any.
+        start_date (DateField): The first night of the rate.
+        end_date (DateField): The end of the rate, excluded.
+        weekdays (IntegerField): Bitmask of the weekdays the rate applies to,
+            Monday = 1 to Sunday = 64.
+        price_per_night (DecimalField): The price per night.
+        priority (IntegerField): Precedence among rates of the same kind.
+    """
+    MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = (
+        1 << day for day in range(7))
+    EVERY_DAY = 127
+    WEEKEND = FRIDAY | SATURDAY
+
+    room: Room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, null=True, blank=True, related_name='rates')
+    capacity: int = models.IntegerField(null=True, blank=True)
+    start_date: date = models.DateField()
+    end_date: date = models.DateField()
+    weekdays: int = models.IntegerField(default=EVERY_DAY)
+    price_per_night: float = models.DecimalField(
+        max_digits=6, decimal_places=2)
+    priority: int = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_date', 'end_date']),
+        ]
+
+
 class CustomUserManager(BaseUserManager):
     """
     Custom user manager where email is the unique identifier
@@ -47,6 +170,21 @@ class CustomUserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def create_user_in_pool(self, email, password=None, **extra_fields):
+        """
+        Like create_user, with the password hashed in the process pool
+        of `app.hashing` instead of the calling thread.
+        """
+        from .hashing import get_hasher_pool
+        if not email:
+            raise ValueError('The Email must be set')
+        email: str = self.normalize_email(email)
+        user: CustomUser = self.model(email=email, **extra_fields)
+        user.password = get_hasher_pool().hash(password)
+        user._password = password
+        user.save(using=self._db)
+        return user
+
     def create_superuser(self, email, password, **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
@@ -68,6 +206,41 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = []
 
 
+class BookingQuerySet(models.QuerySet):
+    """
+    QuerySet with bulk operations on bookings.
+    """
+
+    def create(self, **kwargs) -> 'Booking':
+        """
+        Create a booking on the shard of its room, unless `using()` picked a
+        database; `QuerySet.create` would bypass the router's placement.
+        """
+        booking: Booking = self.model(**kwargs)
+        booking.save(force_insert=True, using=self._db)
+        return booking
+
+    def cancel(self) -> list[tuple]:
+        """
+        Cancel all active bookings in the queryset with a single
+        `UPDATE ... WHERE status = 'active' RETURNING ...` statement.
+
+        Returns:
+            list[tuple]: (booking_number, user_id, room_id, start_date, end_date)
+            of every booking that was cancelled
+        """
+        selected_sql, params = self.values('pk').query.sql_with_params()
+        table: str = self.model._meta.db_table
+        sql = (
+            f'UPDATE "{table}" SET "status" = %s '
+            f'WHERE "status" = %s AND "id" IN ({selected_sql}) '
+            'RETURNING "booking_number", "user_id", "room_id", "start_date", "end_date"'
+        )
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, ["cancelled", "active", *params])
+            return cursor.fetchall()
+
+
 class Booking(models.Model):
     """
     Represents a booking of a room by a user.
@@ -78,6 +251,8 @@ class Booking(models.Model):
         start_date (DateField): The start date of the booking.
         end_date (DateField): The end date of the booking.
         status (CharField): Status of the booking: active or cancelled.
+        room_type (ForeignKey): The type booked, if the room was assigned by the
+            system and may be moved to another room of the type.
     """
 
     STATUS_CHOICES = [
@@ -92,3 +267,203 @@ class Booking(models.Model):
     room: Room = models.ForeignKey(Room, on_delete=models.CASCADE)
     start_date: date = models.DateField()
     end_date: date = models.DateField()
+    room_type: RoomType = models.ForeignKey(
+        RoomType, on_delete=models.SET_NULL, null=True, blank=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    # the fields whose stored values are remembered, to free the old range
+    # of an edited booking
+    RANGE_FIELDS = ('room_id', 'start_date', 'end_date', 'status')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_date']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        booking: Booking = super().from_db(db, field_names, values)
+        booking.remember_stored_range()
+        return booking
+
+    def remember_stored_range(self) -> None:
+        """Remember the room, dates and status as stored, if they are loaded."""
+        if all(name in self.__dict__ for name in self.RANGE_FIELDS):
+            self._stored_range = tuple(getattr(self, name) for name in self.RANGE_FIELDS)
+
+
+class WaitlistEntry(models.Model):
+    """
+    A guest waiting for a cancellation to free a room. Entries either name
+    a room or match any room with at least `capacity` and at most
+    `max_price` per night.
+
+    Attributes:
+        user (ForeignKey): The waiting guest.
+        room (ForeignKey): The wanted room, or null to match by criteria.
+        capacity (IntegerField): Minimum capacity of a matching room.
+        max_price (DecimalField): Maximum price per night of a matching room.
+        start_date (DateField): The start date of the wanted stay.
+        end_date (DateField): The end date of the wanted stay.
+        auto_book (BooleanField): Book the freed room, or only notify the guest.
+        status (CharField): waiting, booked or notified.
+        booking (ForeignKey): The booking made for the entry.
+        created_at (DateTimeField): Entries are matched first come, first served.
+    """
+
+    STATUS_CHOICES = [
+        ("waiting", "Waiting"),
+        ("booked", "Booked"),
+        ("notified", "Notified"),
+    ]
+    user: CustomUser = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    room: Room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, null=True, blank=True, related_name='waitlist')
+    capacity: int = models.IntegerField(null=True, blank=True)
+    max_price: float = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True)
+    start_date: date = models.DateField()
+    end_date: date = models.DateField()
+    auto_book: bool = models.BooleanField(default=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="waiting")
+    booking: Booking = models.ForeignKey(
+        Booking, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # range scan of the entries starting inside a freed interval
+            models.Index(fields=['room', 'status', 'start_date']),
+        ]
+
+
+class RoomDailyRollup(models.Model):
+    """
+    Occupancy and revenue of a room for one night, maintained incrementally
+    from bookings. A missing row means the room was not occupied.
+
+    Attributes:
+        room (ForeignKey): The room.
+        date (DateField): The night.
+        occupied (BooleanField): Whether an active booking covers the night.
+        revenue (DecimalField): Revenue of the night.
+    """
+    room: Room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name='daily_rollups')
+    date: date = models.DateField()
+    occupied: bool = models.BooleanField(default=False)
+    revenue: float = models.DecimalField(
+        max_digits=8, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['room', 'date'], name='unique_room_daily_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+
+class RequestProfile(models.Model):
+    """
+    A request sampled by the profiling middleware. The stack samples and
+    the SQL log are written to files in `PROFILING['DIR']`.
+
+    Attributes:
+        url_name (CharField): Name of the matched URL pattern, e.g. room-list.
+        method (CharField): HTTP method of the request.
+        path (CharField): Path of the request.
+        status_code (IntegerField): Status code of the response.
+        duration (FloatField): Wall time of the request in milliseconds.
+        query_count (IntegerField): Number of SQL queries.
+        query_time (FloatField): Time spent in SQL in milliseconds.
+        trigger (CharField): Why the request was profiled: header or sample.
+        stacks_file (CharField): Path of the collapsed stacks, for flame graphs.
+        sql_file (CharField): Path of the SQL log.
+        created_at (DateTimeField): When the request was served.
+    """
+
+    TRIGGER_CHOICES = [
+        ("header", "Header"),
+        ("sample", "Sample"),
+    ]
+    url_name: str = models.CharField(max_length=100, blank=True)
+    method: str = models.CharField(max_length=10)
+    path: str = models.CharField(max_length=255)
+    status_code: int = models.IntegerField()
+    duration: float = models.FloatField()
+    query_count: int = models.IntegerField()
+    query_time: float = models.FloatField()
+    trigger: str = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    stacks_file: str = models.CharField(max_length=255)
+    sql_file: str = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['url_name', '-created_at']),
+        ]
+
+
+class RoomNextAvailability(models.Model):
+    """
+    The first date from which a room is free for a stay of a given number
+    of nights, maintained from bookings for stays of 1 to 7 nights.
+
+    Attributes:
+        room (ForeignKey): The room.
+        nights (PositiveSmallIntegerField): The length of the stay.
+        next_start (DateField): The first free start date, today or later.
+    """
+    room: Room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name='next_availability')
+    nights: int = models.PositiveSmallIntegerField()
+    next_start: date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['room', 'nights'], name='unique_room_next_availability'),
+        ]
+        indexes = [
+            models.Index(fields=['nights', 'next_start']),
+        ]
+
+
+class OutboxEvent(models.Model):
+    """
+    A booking event for downstream consumers, written in the transaction
+    of the booking change and delivered later by `dispatch_outbox`.
+
+    Attributes:
+        event_type (CharField): booking.active when the booking occupies
+            its room and dates (created or reactivated), booking.cancelled
+            when it frees them (cancelled or deleted), booking.moved when
+            its room or dates changed (edited or reassigned).
+        booking_number (UUIDField): The booking.
+        payload (JSONField): The booking change, as sent to consumers.
+        created_at (DateTimeField): When the change was made.
+        dispatched_at (DateTimeField): When the event was delivered, if it was.
+    """
+
+    EVENT_TYPE_CHOICES = [
+        ("booking.active", "Booking active"),
+        ("booking.cancelled", "Booking cancelled"),
+        ("booking.moved", "Booking moved"),
+    ]
+
+    event_type: str = models.CharField(max_length=30, choices=EVENT_TYPE_CHOICES)
+    booking_number: uuid.UUID = models.UUIDField()
+    payload: dict = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # pending events in order, the dispatcher's scan
+            models.Index(fields=['id'], condition=models.Q(dispatched_at__isnull=True),
+                         name='outbox_pending'),
+        ]
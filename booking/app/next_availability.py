@@ -0,0 +1,102 @@
+"""
+Next available start date of every room for short stays.
+
+For stays of 1 to `MAX_NIGHTS` nights, RoomNextAvailability holds the
+first date from today on when the room is free for the whole stay. Rows
+are recomputed for the rooms of every changed booking and for new rooms,
+so listing rooms by how soon they are free is an index scan. Dates are
+relative to today: `manage.py refresh_next_availability` should run
+daily to refresh the rows that fell into the past.
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Iterable
+
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Booking, Room, RoomNextAvailability
+from .sharding import pin_using
+from .signals import BookingChange, bookings_changed
+
+MAX_NIGHTS = 7
+
+
+def next_starts(bookings: Iterable[tuple[date, date]], today: date) -> dict[int, date]:
+    """Find the first free start date for each stay length.
+
+    Args:
+        bookings (Iterable[tuple[date, date]]): active (start_date, end_date)
+            of the room ending after today, ordered by start_date
+        today (date): the earliest start date
+
+    Returns:
+        dict[int, date]: first free start date by number of nights
+    """
+    found: dict[int, date] = {}
+    cursor: date = today
+    for start_date, end_date in bookings:
+        free_nights: int = (start_date - cursor).days
+        for nights in range(len(found) + 1, min(free_nights, MAX_NIGHTS) + 1):
+            found[nights] = cursor
+        if len(found) == MAX_NIGHTS:
+            return found
+        cursor = max(cursor, end_date)
+    for nights in range(len(found) + 1, MAX_NIGHTS + 1):
+        found[nights] = cursor
+    return found
+
+
+def refresh_next_availability(room_ids: Iterable[int]) -> None:
+    """Recompute the next available dates of rooms.
+
+    Args:
+        room_ids (Iterable[int]): rooms to refresh
+    """
+    today: date = date.today()
+    room_ids = set(Room.objects.filter(pk__in=set(room_ids)).values_list('pk', flat=True))
+    bookings: dict[int, list[tuple[date, date]]] = defaultdict(list)
+    for room_id, start_date, end_date in Booking.objects.filter(
+            room_id__in=room_ids, status="active", end_date__gt=today,
+    ).order_by('room_id', 'start_date').values_list('room_id', 'start_date', 'end_date'):
+        bookings[room_id].append((start_date, end_date))
+
+    RoomNextAvailability.objects.bulk_create(
+        [RoomNextAvailability(room_id=room_id, nights=nights, next_start=next_start)
+         for room_id in room_ids
+         for nights, next_start in next_starts(bookings[room_id], today).items()],
+        update_conflicts=True,
+        unique_fields=['room', 'nights'],
+        update_fields=['next_start'],
+    )
+
+
+def refresh_stale_next_availability(everything: bool = False, batch_size: int = 1000) -> int:
+    """Refresh the rooms without rows or with dates in the past, or all rooms.
+
+    Returns:
+        int: number of refreshed rooms
+    """
+    rooms = Room.objects.order_by('pk')
+    if not everything:
+        # the 1 night date is the earliest, it falls into the past first
+        rooms = rooms.exclude(Exists(RoomNextAvailability.objects.filter(
+            room=OuterRef('pk'), nights=1, next_start__gte=date.today())))
+    room_ids: list[int] = list(rooms.values_list('pk', flat=True))
+    for offset in range(0, len(room_ids), batch_size):
+        refresh_next_availability(room_ids[offset:offset + batch_size])
+    return len(room_ids)
+
+
+@receiver(bookings_changed)
+def update_next_availability(sender, changes: list[BookingChange], **kwargs) -> None:
+    refresh_next_availability({change.room_id for change in changes})
+
+
+@receiver(post_save, sender=Room)
+@pin_using
+def room_saved(sender, instance: Room, created: bool, **kwargs) -> None:
+    if created:
+        refresh_next_availability([instance.pk])
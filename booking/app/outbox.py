@@ -0,0 +1,195 @@
+"""
+Transactional outbox of booking events.
+
+Every booking change reported with `bookings_changed` is written to the
+OutboxEvent table in the transaction of the change, so events exist if
+and only if the change was committed, without calling consumers on the
+write path. `dispatch_batch` delivers pending events in order to a sink.
+It locks them with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+dispatchers take disjoint batches, and it marks them dispatched in the
+same transaction. Delivery is at least once: a batch whose commit fails
+after the sink accepted it is sent again, and consumers deduplicate by
+event id and shard. With sharded rooms, each shard has its own outbox,
+and `drain` visits every shard.
+"""
+
+import json
+import urllib.request
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Optional, Protocol
+
+from django.db import router, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import OutboxEvent
+from .sharding import shard_aliases, use_shard
+from .signals import BookingChange, bookings_changed
+
+
+class Sink(Protocol):
+    def send(self, events: list[dict]) -> None:
+        """Deliver a batch of events, raising an exception if it failed."""
+
+
+class FileSink:
+    """
+    Append events as JSON lines to a local file.
+    """
+
+    def __init__(self, path: Path):
+        self.path: Path = Path(path)
+
+    def send(self, events: list[dict]) -> None:
+        with open(self.path, 'a') as file:
+            file.writelines(json.dumps(event) + '\n' for event in events)
+
+
+class HTTPSink:
+    """
+    POST batches of events as a JSON array to a URL, expecting a 2xx status.
+    """
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url: str = url
+        self.timeout: float = timeout
+
+    def send(self, events: list[dict]) -> None:
+        request = urllib.request.Request(
+            self.url, data=json.dumps(events).encode(), method='POST',
+            headers={'Content-Type': 'application/json'})
+        # non-2xx statuses raise HTTPError
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def sink_for(target: str) -> Sink:
+    """Return an HTTPSink for http(s):// URLs, a FileSink for paths."""
+    if target.startswith(('http://', 'https://')):
+        return HTTPSink(target)
+    return FileSink(Path(target.removeprefix('file://')))
+
+
+def serialize(event: OutboxEvent) -> dict:
+    return {'id': event.pk, 'shard': event._state.db, 'type': event.event_type,
+            'created_at': event.created_at.isoformat(), **event.payload}
+
+
+@dataclass
+class DispatchStats:
+    """
+    Delivered events, with their lag from creation to delivery in seconds.
+    """
+    events: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    lags: list[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+    def lag(self, q: float) -> float:
+        """Nearest-rank percentile of the lags, q from 0 to 100."""
+        if not self.lags:
+            return 0.0
+        ordered: list[float] = sorted(self.lags)
+        return ordered[max(1, -(-len(ordered) * q // 100)) - 1]
+
+
+def dispatch_batch(sink: Sink, batch_size: int, stats: Optional[DispatchStats] = None) -> int:
+    """Deliver the oldest pending events not locked by another dispatcher.
+
+    Args:
+        sink (Sink): where to deliver the events
+        batch_size (int): most events to deliver
+        stats (DispatchStats, optional): statistics to update
+
+    Returns:
+        int: number of delivered events, 0 when none is pending
+    """
+    with transaction.atomic(using=router.db_for_write(OutboxEvent)):
+        events: list[OutboxEvent] = list(OutboxEvent.objects.filter(
+            dispatched_at__isnull=True).order_by('pk').select_for_update(skip_locked=True)[:batch_size])
+        if not events:
+            return 0
+        sink.send([serialize(event) for event in events])
+        dispatched_at: datetime = timezone.now()
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            dispatched_at=dispatched_at)
+    if stats is not None:
+        stats.events += len(events)
+        stats.batches += 1
+        stats.lags.extend((dispatched_at - event.created_at).total_seconds() for event in events)
+    return len(events)
+
+
+def drain(sink: Sink, batch_size: int = 500, max_batches: Optional[int] = None) -> DispatchStats:
+    """Deliver batches from each shard until none is pending, or `max_batches` were delivered."""
+    stats = DispatchStats()
+    start: float = perf_counter()
+    for alias in shard_aliases():
+        with use_shard(alias):
+            while max_batches is None or stats.batches < max_batches:
+                if not dispatch_batch(sink, batch_size, stats):
+                    break
+    stats.elapsed = perf_counter() - start
+    return stats
+
+
+def purge_dispatched(older_than: timedelta) -> int:
+    """Delete events delivered more than `older_than` ago."""
+    deleted: int = 0
+    for alias in shard_aliases():
+        deleted += OutboxEvent.objects.using(alias).filter(
+            dispatched_at__lt=timezone.now() - older_than).delete()[0]
+    return deleted
+
+
+def pending_count() -> int:
+    """Return the number of events waiting for delivery on every shard."""
+    return sum(OutboxEvent.objects.using(alias).filter(dispatched_at__isnull=True).count()
+               for alias in shard_aliases())
+
+
+def booking_events(changes: list[BookingChange]) -> list[OutboxEvent]:
+    """
+    Describe booking changes as events. A booking whose old range is freed
+    and new range occupied by the same change was moved or edited: it gets
+    one booking.moved event, with the old range under `previous`.
+    """
+    freed: dict = {change.booking_number: change for change in changes if change.status == "cancelled"}
+    occupied: set = {change.booking_number for change in changes if change.status == "active"}
+    events: list[OutboxEvent] = []
+    for change in changes:
+        if change.status == "cancelled" and change.booking_number in occupied:
+            continue
+        payload: dict = {
+            'booking_number': str(change.booking_number),
+            'user_id': change.user_id,
+            'room_id': change.room_id,
+            'start_date': change.start_date.isoformat(),
+            'end_date': change.end_date.isoformat(),
+            'status': change.status,
+        }
+        previous: Optional[BookingChange] = freed.get(change.booking_number)
+        if change.status == "active" and previous is not None:
+            payload['previous'] = {
+                'room_id': previous.room_id,
+                'start_date': previous.start_date.isoformat(),
+                'end_date': previous.end_date.isoformat(),
+            }
+            event_type: str = 'booking.moved'
+        else:
+            event_type = f'booking.{change.status}'
+        events.append(OutboxEvent(event_type=event_type, booking_number=change.booking_number,
+                                  payload=payload))
+    return events
+
+
+@receiver(bookings_changed)
+def record_booking_events(sender, changes: list[BookingChange], **kwargs) -> None:
+    OutboxEvent.objects.bulk_create(booking_events(changes))
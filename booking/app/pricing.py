@@ -0,0 +1,115 @@
+"""
+Vectorized stay quotes.
+
+Nightly prices of many rooms over a date span are loaded into a
+rooms x nights matrix of cents, with rates applied as array slices.
+Cumulative sums along the nights then give the total of any stay of any
+room with two lookups, without per-night Python loops.
+"""
+
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from django.db.models import Q, QuerySet
+
+from .models import RoomRate
+
+
+def to_cents(price: Decimal) -> int:
+    return int(price * 100)
+
+
+def from_cents(cents: int) -> Decimal:
+    return (Decimal(int(cents)) / 100).quantize(Decimal('0.01'))
+
+
+def rate_precedence(rate: RoomRate) -> tuple[int, int, int]:
+    """Sort key applying rates from the lowest to the highest precedence."""
+    specificity: int = 2 if rate.room_id else 1 if rate.capacity is not None else 0
+    return specificity, rate.priority, rate.pk
+
+
+def price_matrix(room_ids: np.ndarray, capacities: np.ndarray, base_prices: np.ndarray,
+                 start_date: date, end_date: date) -> np.ndarray:
+    """Build the nightly prices of rooms over a date span.
+
+    Args:
+        room_ids (np.ndarray): ids of the rooms, one per row
+        capacities (np.ndarray): capacity of each room
+        base_prices (np.ndarray): price_per_night of each room in cents
+        start_date (date): first night of the span
+        end_date (date): end of the span, excluded
+
+    Returns:
+        np.ndarray: int64 matrix of prices in cents, rooms x nights
+    """
+    days: int = (end_date - start_date).days
+    prices: np.ndarray = np.repeat(
+        base_prices.astype(np.int64)[:, None], days, axis=1)
+    weekday_bits: np.ndarray = 1 << ((start_date.weekday() + np.arange(days)) % 7)
+    row_of_room: dict[int, int] = {
+        int(room_id): row for row, room_id in enumerate(room_ids)}
+
+    rates: list[RoomRate] = sorted(RoomRate.objects.filter(
+        Q(room__in=row_of_room.keys()) | Q(room__isnull=True),
+        start_date__lt=end_date, end_date__gt=start_date), key=rate_precedence)
+    for rate in rates:
+        first: int = max(0, (rate.start_date - start_date).days)
+        last: int = min(days, (rate.end_date - start_date).days)
+        columns: np.ndarray = first + np.flatnonzero(
+            weekday_bits[first:last] & rate.weekdays)
+        if rate.room_id:
+            rows: np.ndarray = np.array([row_of_room[rate.room_id]])
+        elif rate.capacity is not None:
+            rows = np.flatnonzero(capacities == rate.capacity)
+        else:
+            rows = np.arange(len(room_ids))
+        prices[np.ix_(rows, columns)] = to_cents(rate.price_per_night)
+    return prices
+
+
+def room_catalog(rooms: QuerySet) -> np.ndarray:
+    """Load the id, capacity and base price in cents of rooms, one row per room."""
+    return np.array([(pk, capacity, to_cents(price)) for pk, capacity, price in
+                     rooms.values_list('pk', 'capacity', 'price_per_night')],
+                    dtype=np.int64).reshape(-1, 3)
+
+
+def quote_stays(rooms: QuerySet, stays: list[tuple[date, date]]) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the total price of every stay for every room.
+
+    Args:
+        rooms (QuerySet): rooms to quote
+        stays (list[tuple[date, date]]): (start_date, end_date) of each stay
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: room ids, and totals in cents as a
+        rooms x stays matrix
+    """
+    return quote_catalog(room_catalog(rooms), stays)
+
+
+def quote_catalog(catalog: np.ndarray, stays: list[tuple[date, date]]) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the total price of every stay for every room of a `room_catalog`.
+
+    Args:
+        catalog (np.ndarray): rooms to quote, as loaded by `room_catalog`
+        stays (list[tuple[date, date]]): (start_date, end_date) of each stay
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: room ids, and totals in cents as a
+        rooms x stays matrix
+    """
+    room_ids, capacities, base_prices = catalog.T
+    span_start: date = min(start for start, _ in stays)
+    span_end: date = max(end for _, end in stays)
+
+    prices: np.ndarray = price_matrix(
+        room_ids, capacities, base_prices, span_start, span_end)
+    cumulative: np.ndarray = np.zeros(
+        (len(room_ids), prices.shape[1] + 1), dtype=np.int64)
+    np.cumsum(prices, axis=1, out=cumulative[:, 1:])
+
+    starts = np.array([(start - span_start).days for start, _ in stays])
+    ends = np.array([(end - span_start).days for _, end in stays])
+    return room_ids, cumulative[:, ends] - cumulative[:, starts]
@@ -0,0 +1,110 @@
+"""
+Sampling request profiler.
+
+A background thread samples the stack of the thread serving the request
+at a fixed interval, so the request itself runs unmodified. Samples are
+written in the collapsed stack format (`frame;frame;frame count` per line)
+read by flamegraph.pl, speedscope and inferno, next to a log of the
+request's SQL with timings.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Optional
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    name: str = getattr(code, 'co_qualname', code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}.{name}".replace(';', ':')
+
+
+def collapse(frame: Optional[FrameType]) -> str:
+    """Render a stack as root-first frame names separated by semicolons."""
+    names: list[str] = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Count the stacks of one thread, sampled every `interval` seconds
+    from a background thread.
+    """
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None):
+        self.interval: float = interval
+        self.thread_id: int = thread_id or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame: Optional[FrameType] = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def __enter__(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+@dataclass
+class QueryRecorder:
+    """
+    Database execute wrapper recording each query with its duration.
+    """
+    queries: list[tuple[float, str]] = field(default_factory=list)
+
+    def __call__(self, execute, sql, params, many, context):
+        start: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(time.perf_counter() - start, sql)
+
+    def record(self, duration: float, sql: str) -> None:
+        self.queries.append((duration, sql))
+
+    @property
+    def total_time(self) -> float:
+        return sum(duration for duration, _ in self.queries)
+
+    def log(self) -> str:
+        return ''.join(f"{duration * 1000:10.3f} ms  {sql}\n" for duration, sql in self.queries)
+
+
+def write_profile(directory: Path, name: str, sampler: StackSampler,
+                  recorder: QueryRecorder) -> tuple[Path, Path]:
+    """Write the flame graph input and the SQL log of a profiled request.
+
+    Args:
+        directory (Path): directory for the profile files, created if missing
+        name (str): base name of the files
+        sampler (StackSampler): the request's stack samples
+        recorder (QueryRecorder): the request's SQL
+
+    Returns:
+        tuple[Path, Path]: the `.folded` stacks and the `.sql` log
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    stacks: Path = directory / f"{name}.folded"
+    sql: Path = directory / f"{name}.sql"
+    stacks.write_text(sampler.collapsed())
+    sql.write_text(recorder.log())
+    return stacks, sql
@@ -0,0 +1,105 @@
+"""
+N+1 query detection and slow query log for development and tests.
+
+QueryLog records the SQL executed in a block grouped by normalized
+template, with the project code that issued each query. A template
+repeated many times in one request is the signature of an N+1 loop,
+such as one `Room.is_available` query per listed room.
+"""
+
+import logging
+import re
+import sys
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections
+
+from .profiling import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r"\(\?(?:, \?)*\)")
+CALL_SITE_DEPTH = 3
+INTERNAL_FILES = {__file__, sys.modules[QueryRecorder.__module__].__file__}
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+class RepeatedQuery(NamedTuple):
+    """
+    A SQL template executed `count` times, from the given call sites.
+    """
+    template: str
+    count: int
+    call_sites: list[tuple[str, int]]
+
+
+def normalize(sql: str) -> str:
+    """Replace the literals and parameters of a query with placeholders."""
+    sql = LITERALS.sub('?', ' '.join(sql.replace('%s', '?').split()))
+    return IN_LISTS.sub('(...)', sql)
+
+
+def call_site() -> str:
+    """
+    Describe the innermost frames of project code, outside this module
+    and installed packages, e.g. `app/views.py:42 in get_queryset`.
+    """
+    base_dir: str = str(settings.BASE_DIR)
+    sites: list[str] = []
+    frame = sys._getframe(1)
+    while frame is not None and len(sites) < CALL_SITE_DEPTH:
+        filename: str = frame.f_code.co_filename
+        if (filename.startswith(base_dir) and 'site-packages' not in filename
+                and filename not in INTERNAL_FILES):
+            sites.append(f"{filename[len(base_dir) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return ' <- '.join(sites) or '<unknown>'
+
+
+@dataclass
+class QueryLog(QueryRecorder):
+    """
+    Database execute wrapper grouping queries by template, and logging
+    the ones slower than `slow_query_ms`. Used as a context manager it
+    wraps every database connection.
+    """
+    slow_query_ms: float = float('inf')
+    templates: dict[str, list[str]] = field(default_factory=lambda: defaultdict(list))
+
+    def record(self, duration: float, sql: str) -> None:
+        super().record(duration, sql)
+        site: str = call_site()
+        self.templates[normalize(sql)].append(site)
+        if duration * 1000 >= self.slow_query_ms:
+            logger.warning("Slow query (%.1f ms) at %s: %s", duration * 1000, site, sql)
+
+    def repeated(self, threshold: int) -> list[RepeatedQuery]:
+        """Return the templates executed at least `threshold` times, most repeated first."""
+        return sorted((RepeatedQuery(template, len(sites), Counter(sites).most_common())
+                       for template, sites in self.templates.items() if len(sites) >= threshold),
+                      key=lambda query: -query.count)
+
+    def __enter__(self) -> 'QueryLog':
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stack.close()
+
+
+def describe(repeated: list[RepeatedQuery]) -> str:
+    lines: list[str] = []
+    for query in repeated:
+        lines.append(f"{query.count} x {query.template}")
+        lines.extend(f"    {count} x at {site}" for site, count in query.call_sites)
+    return '\n'.join(lines)
@@ -0,0 +1,71 @@
+"""
+orjson based JSON renderer and parser.
+
+Drop-in replacements for DRF's JSONRenderer and JSONParser, selected in
+`REST_FRAMEWORK`. Dates, datetimes and UUIDs are encoded natively by
+orjson; everything else orjson does not know (Decimal, lazy strings,
+querysets, ...) goes through DRF's own encoder, so the output is the same
+bytes as DRF's compact JSON. The stdlib implementation is used when orjson
+is not installed, or for output orjson can't produce (indented or ASCII-only
+JSON).
+
+Floats are the one difference: orjson writes exponents as `1e16` where the
+stdlib writes `1e+16`, and it renders NaN and infinity as null instead of
+rejecting them.
+"""
+
+import codecs
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON_OPTIONS = 0 if orjson is None else orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+JS_ESCAPES = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer which serializes to JSON with orjson.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret: bytes = orjson.dumps(data, default=self.encoder_class().default,
+                                  option=ORJSON_OPTIONS)
+        # Same as JSONRenderer: keep the output a strict javascript subset.
+        for raw, escaped in JS_ESCAPES:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """
+    Parses JSON-serialized data with orjson.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding: str = (parser_context or {}).get('encoding', 'utf-8')
+        try:
+            body: bytes = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                body = body.decode(encoding).encode()
+            return orjson.loads(body)
+        except (ValueError, LookupError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
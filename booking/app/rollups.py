@@ -0,0 +1,141 @@
+"""
+Daily occupancy and revenue rollups.
+
+Rollup rows are recomputed for the nights of every changed booking range,
+so reports never have to scan the bookings table. Only nights up to
+`ROLLUP_HORIZON_DAYS` ahead are rolled up. The revenue of a night is the
+room's price for it with the rate calendar applied, as quoted.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import Booking, Room, RoomDailyRollup
+from .pricing import from_cents, price_matrix, room_catalog, to_cents
+from .sharding import shard_aliases, use_shard
+from .signals import BookingChange, bookings_changed
+
+# rooms whose nightly prices are computed together by rebuild_rollups
+REBUILD_BATCH_ROOMS = 500
+
+
+def nights(start_date: date, end_date: date) -> list[date]:
+    """Return the nights from start_date up to, excluding, end_date."""
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days)]
+
+
+def horizon() -> date:
+    """Return the first night that is too far ahead to be rolled up."""
+    return date.today() + timedelta(days=settings.ROLLUP_HORIZON_DAYS)
+
+
+def refresh_rollups(room_id: int, start_date: date, end_date: date) -> None:
+    """Recompute the rollups of a room for the nights in a date range.
+
+    Args:
+        room_id (int): the room
+        start_date (date): first night
+        end_date (date): end of the range, excluded
+    """
+    end_date = min(end_date, horizon())
+    if start_date >= end_date:
+        return
+    room: Optional[tuple[int, Decimal]] = Room.objects.filter(
+        pk=room_id).values_list('capacity', 'price_per_night').first()
+    if room is None:
+        return
+    capacity, price = room
+    prices: np.ndarray = price_matrix(np.array([room_id]), np.array([capacity]),
+                                      np.array([to_cents(price)]), start_date, end_date)[0]
+    occupied: set[date] = set()
+    for booked_start, booked_end in Booking.objects.filter(
+            room_id=room_id, status="active",
+            start_date__lt=end_date, end_date__gt=start_date).values_list('start_date', 'end_date'):
+        occupied.update(nights(max(booked_start, start_date),
+                        min(booked_end, end_date)))
+
+    RoomDailyRollup.objects.bulk_create(
+        [RoomDailyRollup(room_id=room_id, date=night, occupied=night in occupied,
+                         revenue=from_cents(prices[index]) if night in occupied else 0)
+         for index, night in enumerate(nights(start_date, end_date))],
+        update_conflicts=True,
+        unique_fields=['room', 'date'],
+        update_fields=['occupied', 'revenue'],
+    )
+
+
+@receiver(bookings_changed)
+def update_rollups(sender, changes: list[BookingChange], **kwargs) -> None:
+    ranges: dict[int, list[tuple[date, date]]] = defaultdict(list)
+    for change in changes:
+        ranges[change.room_id].append((change.start_date, change.end_date))
+    for room_id, room_ranges in ranges.items():
+        refresh_rollups(room_id, min(start for start, _ in room_ranges),
+                        max(end for _, end in room_ranges))
+
+
+def rebuild_rollups(start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """Rebuild all rollups, or those in a date range, from active bookings,
+    on every shard.
+
+    Args:
+        start_date (date, optional): first night to rebuild
+        end_date (date, optional): end of the range to rebuild, excluded
+
+    Returns:
+        int: number of occupied nights written
+    """
+    start_date = start_date or date.min
+    end_date = min(end_date, horizon()) if end_date else horizon()
+    written: int = 0
+    for alias in shard_aliases():
+        with use_shard(alias), transaction.atomic(using=alias):
+            RoomDailyRollup.objects.filter(
+                date__gte=start_date, date__lt=end_date).delete()
+            catalog: np.ndarray = room_catalog(Room.objects.order_by('pk'))
+            for first in range(0, len(catalog), REBUILD_BATCH_ROOMS):
+                written += rebuild_rooms(catalog[first:first + REBUILD_BATCH_ROOMS],
+                                         start_date, end_date)
+    return written
+
+
+def rebuild_rooms(catalog: np.ndarray, start_date: date, end_date: date) -> int:
+    """Write the occupied nights of some rooms, priced with the rate calendar.
+
+    Args:
+        catalog (np.ndarray): the rooms, as loaded by `room_catalog`
+        start_date (date): first night to rebuild
+        end_date (date): end of the range to rebuild, excluded
+
+    Returns:
+        int: number of occupied nights written
+    """
+    room_ids, capacities, base_prices = catalog.T
+    stays: list[tuple[int, date, date]] = list(Booking.objects.filter(
+        room_id__in=room_ids.tolist(), status="active",
+        start_date__lt=end_date, end_date__gt=start_date,
+    ).values_list('room_id', 'start_date', 'end_date'))
+    if not stays:
+        return 0
+    # prices are only needed over the nights booked
+    span_start: date = max(start_date, min(booked_start for _, booked_start, _ in stays))
+    span_end: date = min(end_date, max(booked_end for _, _, booked_end in stays))
+    prices: np.ndarray = price_matrix(room_ids, capacities, base_prices, span_start, span_end)
+    row_of_room: dict[int, int] = {int(room_id): row for row, room_id in enumerate(room_ids)}
+
+    revenue: dict[tuple[int, date], int] = {}
+    for room_id, booked_start, booked_end in stays:
+        for night in nights(max(booked_start, span_start), min(booked_end, span_end)):
+            revenue[room_id, night] = prices[row_of_room[room_id], (night - span_start).days]
+    RoomDailyRollup.objects.bulk_create(
+        [RoomDailyRollup(room_id=room_id, date=night, occupied=True, revenue=from_cents(cents))
+         for (room_id, night), cents in revenue.items()],
+        batch_size=5000)
+    return len(revenue)
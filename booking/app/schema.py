@@ -0,0 +1,100 @@
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+SCHEMA_RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+# Query parameters changing the schema, which the artifact is not built for.
+DYNAMIC_SCHEMA_PARAMS: tuple[str, ...] = ('lang', 'version')
+
+# Rendered schema bytes and their ETag per format, loaded once per process.
+_compiled: dict[str, tuple[bytes, str]] = {}
+
+
+def generate_schema() -> dict:
+    """Introspect all views and build the OpenAPI schema.
+
+    Returns:
+        dict: the OpenAPI schema
+    """
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def render_schema(schema: dict) -> dict[str, bytes]:
+    """Render the schema in every served format.
+
+    Args:
+        schema (dict): the OpenAPI schema
+
+    Returns:
+        dict[str, bytes]: rendered schema per format
+    """
+    return {fmt: renderer().render(schema, renderer_context={})
+            for fmt, renderer in SCHEMA_RENDERERS.items()}
+
+
+def artifact_path(fmt: str) -> Path:
+    """Return the path of the precompiled schema artifact for a format."""
+    return Path(settings.SCHEMA_ARTIFACT_DIR) / f'openapi.{fmt}'
+
+
+def etag(content: bytes) -> str:
+    return '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def load_schema(fmt: str) -> tuple[bytes, str]:
+    """Return the precompiled schema, reading the artifact on first use.
+    The schema is generated in memory if no artifact was built.
+
+    Args:
+        fmt (str): yaml or json
+
+    Returns:
+        tuple[bytes, str]: the rendered schema and its ETag
+    """
+    if fmt not in _compiled:
+        path: Path = artifact_path(fmt)
+        if path.exists():
+            content: bytes = path.read_bytes()
+            _compiled[fmt] = (content, etag(content))
+        else:
+            _compiled.update({name: (content, etag(content))
+                              for name, content in render_schema(generate_schema()).items()})
+    return _compiled[fmt]
+
+
+class PrecompiledSchemaView(SpectacularAPIView):
+    """
+    Serve the OpenAPI schema from the build artifact when
+    `PRECOMPILED_SCHEMA` is enabled, with long-lived caching headers.
+    Falls back to per-request introspection otherwise, and for
+    requests of another `lang` or `version` of the schema.
+    """
+
+    def _get_schema_response(self, request):
+        if not settings.PRECOMPILED_SCHEMA or any(
+                param in request.GET for param in DYNAMIC_SCHEMA_PARAMS):
+            return super()._get_schema_response(request)
+
+        renderer, media_type = self.perform_content_negotiation(request)
+        content, tag = load_schema(renderer.format)
+
+        if request.headers.get('If-None-Match') == tag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=media_type)
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = tag
+        patch_cache_control(response, public=True,
+                            max_age=settings.SCHEMA_CACHE_MAX_AGE)
+        return response
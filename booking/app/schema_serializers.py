@@ -5,15 +5,49 @@ class BookingCancelResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
 
 
+class BookingBulkCancelResponseSerializer(serializers.Serializer):
+    cancelled = serializers.ListField(child=serializers.UUIDField())
+    count = serializers.IntegerField()
+
+
 class UserCreatedResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
 
 
 class BookingCreateRequestSerializer(serializers.Serializer):
-    room = serializers.IntegerField(help_text="ID of the room to be booked")
+    room = serializers.IntegerField(
+        required=False, help_text="ID of the room to be booked")
+    room_type = serializers.IntegerField(
+        required=False, help_text="ID of the room type to book instead of a room")
     start_date = serializers.DateField(help_text="Start date of the booking")
     end_date = serializers.DateField(help_text="End date of the booking")
 
 
 class BookingFailedCreateResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
+
+
+class OccupancyResponseSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    room_nights = serializers.IntegerField()
+    occupied_nights = serializers.IntegerField()
+    occupancy_rate = serializers.FloatField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class StayQuoteSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class RoomQuoteResponseSerializer(serializers.Serializer):
+    room = serializers.IntegerField()
+    quotes = StayQuoteSerializer(many=True)
+
+
+class RoomCombinationSerializer(serializers.Serializer):
+    rooms = serializers.ListField(child=serializers.IntegerField())
+    capacity = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -1,39 +1,226 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Room, Booking, CustomUser
+from datetime import date
+from .models import Room, RoomType, Booking, CustomUser, WaitlistEntry
+from .sharding import locate
 
 
-class RoomSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
     """
-    Serializer for the Room model.
+    Drop the readable fields not listed in the `fields` serializer context,
+    as requested with `?fields=`. Only applies to top-level serializers,
+    nested ones keep all of their fields.
     """
 
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested is None or self.field_name:
+            return fields
+        return {name: field for name, field in fields.items()
+                if name in requested or field.write_only}
+
+
+class ShardedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key of an object looked up on every shard.
+    """
+
+    def to_internal_value(self, data):
+        try:
+            return locate(self.get_queryset(), pk=data)
+        except self.get_queryset().model.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class RoomSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializer for the Room model. `next_available` is only output when
+    rooms are listed by how soon they are free.
+    """
+    next_available = serializers.DateField(read_only=True)
+
     class Meta:
         model = Room
-        fields = ['id', 'name', 'price_per_night', 'capacity']
+        fields = ['id', 'name', 'price_per_night', 'capacity', 'hotel', 'next_available']
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Booking model.
     """
     user = serializers.PrimaryKeyRelatedField(read_only=True)
-    room = serializers.PrimaryKeyRelatedField(
-        queryset=Room.objects.all(), write_only=True)
+    room = ShardedPrimaryKeyRelatedField(
+        queryset=Room.objects.all(), write_only=True, required=False)
+    room_type = serializers.PrimaryKeyRelatedField(
+        queryset=RoomType.objects.all(), required=False)
     room_detail = RoomSerializer(source='room', read_only=True)
 
     class Meta:
         model = Booking
-        fields = ['booking_number', 'user', 'room', 'room_detail',
+        fields = ['booking_number', 'user', 'room', 'room_type', 'room_detail',
                   'start_date', 'end_date', 'status']
 
-    def to_representation(self, instance):
+    def validate(self, attrs):
+        if 'room' not in attrs and 'room_type' not in attrs:
+            raise serializers.ValidationError(
+                "Provide a room or a room_type.")
+        return attrs
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the WaitlistEntry model. Without a room, any room with
+    the given minimum capacity and maximum price matches.
+    """
+    booking = serializers.SlugRelatedField(
+        slug_field='booking_number', read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['id', 'room', 'capacity', 'max_price', 'start_date', 'end_date',
+                  'auto_book', 'status', 'booking', 'created_at']
+        read_only_fields = ['status', 'created_at']
+
+    def validate(self, attrs):
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError(
+                "start_date must be before end_date.")
+        if attrs['start_date'] < date.today():
+            raise serializers.ValidationError(
+                "start_date must not be in the past.")
+        return attrs
+
+
+class BookingBulkCancelSerializer(serializers.Serializer):
+    """
+    Filters selecting the active bookings to cancel in bulk.
+    At least one filter must be given.
+    """
+    booking_numbers = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False)
+    room = ShardedPrimaryKeyRelatedField(
+        queryset=Room.objects.all(), required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(
+                "Provide booking_numbers, room or a date range.")
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        if start_date and end_date and start_date >= end_date:
+            raise serializers.ValidationError(
+                "start_date must be before end_date.")
+        return attrs
+
+    def get_queryset(self):
         """
-        Convert `booking_number` to string in the response.
+        Return the bookings selected by the validated filters.
+        Bookings overlapping the date range are selected.
         """
-        ret = super().to_representation(instance)
-        ret['booking_number'] = str(instance.booking_number)
-        return ret
+        queryset = Booking.objects.all()
+        if 'booking_numbers' in self.validated_data:
+            queryset = queryset.filter(
+                booking_number__in=self.validated_data['booking_numbers'])
+        if 'room' in self.validated_data:
+            queryset = queryset.filter(room=self.validated_data['room'])
+        if 'start_date' in self.validated_data:
+            queryset = queryset.filter(
+                end_date__gt=self.validated_data['start_date'])
+        if 'end_date' in self.validated_data:
+            queryset = queryset.filter(
+                start_date__lt=self.validated_data['end_date'])
+        return queryset
+
+
+class OccupancyQuerySerializer(serializers.Serializer):
+    """
+    Date range and optional room of an occupancy report.
+    """
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    room = ShardedPrimaryKeyRelatedField(
+        queryset=Room.objects.all(), required=False)
+
+    def validate(self, attrs):
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError(
+                "start_date must be before end_date.")
+        return attrs
+
+
+class StaySerializer(serializers.Serializer):
+    """
+    Dates of a stay to quote.
+    """
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError(
+                "start_date must be before end_date.")
+        return attrs
+
+
+class RoomQuoteRequestSerializer(serializers.Serializer):
+    """
+    Rooms and stays to quote. Room ids are checked by the view, which
+    reads the rooms in one query. The prices of every room on every day
+    spanned by the stays are held at once, so their number is bounded too.
+    """
+    MAX_ROOMS = 1000
+    MAX_STAYS = 100
+    MAX_SPAN_DAYS = 731
+    MAX_ROOM_DAYS = 100_000
+
+    rooms = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=MAX_ROOMS)
+    stays = StaySerializer(many=True, allow_empty=False)
+
+    def validate_stays(self, stays):
+        if len(stays) > self.MAX_STAYS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_STAYS} stays can be quoted at once.")
+        span = max(stay['end_date'] for stay in stays) - \
+            min(stay['start_date'] for stay in stays)
+        if span.days > self.MAX_SPAN_DAYS:
+            raise serializers.ValidationError(
+                f"Stays must fall within {self.MAX_SPAN_DAYS} days.")
+        return stays
+
+    def validate(self, attrs):
+        stays = attrs['stays']
+        span = max(stay['end_date'] for stay in stays) - \
+            min(stay['start_date'] for stay in stays)
+        if len(set(attrs['rooms'])) * span.days > self.MAX_ROOM_DAYS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_ROOM_DAYS} room days can be quoted at once, "
+                "quote fewer rooms or closer stays.")
+        return attrs
+
+
+class RoomCombinationQuerySerializer(StaySerializer):
+    """
+    Party size and dates of a search for room combinations.
+    """
+    MAX_PARTY_SIZE = 200
+    MAX_SPAN_DAYS = 731
+
+    party_size = serializers.IntegerField(min_value=1, max_value=MAX_PARTY_SIZE)
+    k = serializers.IntegerField(min_value=1, max_value=20, default=5)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if (attrs['end_date'] - attrs['start_date']).days > self.MAX_SPAN_DAYS:
+            raise serializers.ValidationError(
+                f"Stays must be at most {self.MAX_SPAN_DAYS} days long.")
+        return attrs
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -0,0 +1,297 @@
+"""
+Sharding of rooms and bookings by hotel.
+
+Each hotel's rooms, and the rows keyed by them (bookings, rates, rollups,
+next availability, waitlist entries and outbox events), are stored on one
+of the `ROOM_SHARDS` databases, picked by a consistent hash of the hotel
+id: adding a shard moves about 1/N of the hotels. With the default single
+`default` shard, the router sends everything to `default` as before.
+
+The router places a row from the instance it is given: a room by its
+hotel, a booking or rate by its room, and loaded rows stay on the shard
+they came from. Queries without an instance go to the shard pinned with
+`use_shard`, falling back to `default`. Receivers of booking and room
+changes run with the shard of the change pinned, so their own queries
+follow it. Requests that don't know the shard, like room searches and a
+guest's bookings, `fan_out` to every shard in parallel threads.
+
+Hotels, room types and users are reference data: they are written to
+`default` and copied to every shard after each save or delete, so foreign
+keys hold on each shard. Bulk writes of them send no signal: copy them
+with `replicate`. Room ids are drawn from the room sequence of `default`
+so they are unique across shards; rooms must be created with `save()`.
+
+The availability bitmap and the room catalog read a single database and
+are disabled with several shards. Bulk cancellation, analytics, room
+assignment, rollup rebuilds and the outbox dispatcher visit every shard.
+The admin of sharded models, the waitlist API, quotes and room
+combinations read `default` only, and are refused with several shards.
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import copy
+from functools import partial, wraps
+from typing import Callable, Optional, TypeVar
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.models import Model, QuerySet
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+T = TypeVar('T')
+
+# model labels, as the router is loaded before the models
+HOTEL = 'app.hotel'
+ROOM = 'app.room'
+SHARDED_MODELS: frozenset[str] = frozenset({
+    ROOM, 'app.booking', 'app.roomrate', 'app.roomdailyrollup',
+    'app.roomnextavailability', 'app.waitlistentry', 'app.outboxevent'})
+REPLICATED_MODELS: frozenset[str] = frozenset({HOTEL, 'app.roomtype', 'app.customuser'})
+
+# fan-outs of a process running at once, as many as the threads of a gunicorn worker
+CONCURRENT_FAN_OUTS = 4
+
+_pinned: ContextVar[Optional[str]] = ContextVar('pinned_shard', default=None)
+
+
+def point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent hash of hotel ids to database aliases, with `points`
+    virtual nodes per alias to spread the hotels evenly.
+    """
+
+    def __init__(self, aliases: list[str], points: int = 128):
+        self.aliases: list[str] = list(aliases)
+        ring: list[tuple[int, str]] = sorted(
+            (point(f'{alias}:{n}'), alias) for alias in self.aliases for n in range(points))
+        self.points: list[int] = [position for position, _ in ring]
+        self.nodes: list[str] = [alias for _, alias in ring]
+
+    def shard(self, key: object) -> str:
+        """Return the alias of the first node clockwise from the key."""
+        if len(self.aliases) == 1:
+            return self.aliases[0]
+        return self.nodes[bisect.bisect(self.points, point(str(key))) % len(self.points)]
+
+
+_ring: Optional[HashRing] = None
+
+
+def get_ring() -> HashRing:
+    """Return the hash ring of `settings.ROOM_SHARDS`."""
+    global _ring
+    if _ring is None:
+        _ring = HashRing(settings.ROOM_SHARDS)
+    return _ring
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the threads of this process querying the shards. They live as
+    long as the process, so their connections are kept as CONN_MAX_AGE allows.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=len(shard_aliases()) * CONCURRENT_FAN_OUTS,
+                                           thread_name_prefix='fan-out')
+        return _executor
+
+
+def forget_executor() -> None:
+    # threads don't survive a fork, the child starts its own
+    global _executor
+    _executor = None
+
+
+os.register_at_fork(after_in_child=forget_executor)
+
+
+@receiver(setting_changed)
+def reset_ring(setting, **kwargs) -> None:
+    global _ring
+    if setting == 'ROOM_SHARDS':
+        _ring = None
+        forget_executor()
+
+
+def shard_aliases() -> list[str]:
+    return get_ring().aliases
+
+
+def is_sharded() -> bool:
+    """Whether rooms are stored elsewhere than in `default` alone."""
+    return shard_aliases() != [DEFAULT_DB_ALIAS]
+
+
+def shard_for_hotel(hotel_id: Optional[int]) -> str:
+    """Return the shard of a hotel's rooms; rooms without a hotel hash as hotel 0."""
+    return get_ring().shard(hotel_id or 0)
+
+
+@contextmanager
+def use_shard(alias: Optional[str]):
+    """Send queries of sharded models without an instance to `alias`, if given."""
+    if alias is None:
+        yield
+        return
+    token = _pinned.set(alias)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def pin_using(func: Callable) -> Callable:
+    """Run a model signal receiver with the database of the signal pinned."""
+    @wraps(func)
+    def wrapper(sender, **kwargs):
+        with use_shard(kwargs.get('using')):
+            return func(sender, **kwargs)
+    return wrapper
+
+
+def shard_of(instance: Model) -> Optional[str]:
+    """Return the shard a sharded row, or a hotel's rooms, belong to, if known."""
+    label: str = instance._meta.label_lower
+    if label == HOTEL:
+        return shard_for_hotel(instance.pk) if instance.pk is not None else None
+    if label not in SHARDED_MODELS:
+        return None
+    aliases: list[str] = shard_aliases()
+    if not instance._state.adding and instance._state.db in aliases:
+        return instance._state.db
+    if label == ROOM:
+        return shard_for_hotel(instance.hotel_id)
+    room_field = next((field for field in instance._meta.concrete_fields if field.name == 'room'), None)
+    if room_field is not None and room_field.is_cached(instance) and instance.room is not None:
+        return shard_of(instance.room)
+    return instance._state.db if instance._state.db in aliases else None
+
+
+class ShardRouter:
+    """
+    Route sharded models to the shard of their hotel, see the module docstring.
+    """
+
+    def db_for_read(self, model: type[Model], **hints) -> Optional[str]:
+        if model._meta.label_lower not in SHARDED_MODELS:
+            return None
+        instance: Optional[Model] = hints.get('instance')
+        return (shard_of(instance) if instance is not None else None) or _pinned.get()
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints) -> Optional[bool]:
+        # reference rows exist on every database
+        if REPLICATED_MODELS & {obj1._meta.label_lower, obj2._meta.label_lower}:
+            return True
+        # an unsaved row is placed by its room when saved
+        if obj1._state.adding or obj2._state.adding:
+            return True
+        return None
+
+
+def fan_out(func: Callable[[str], T]) -> list[T]:
+    """Call `func(alias)` with each shard pinned, in parallel with several shards.
+
+    Args:
+        func (Callable): query to run on one shard, given its alias
+
+    Returns:
+        list: results in the order of `ROOM_SHARDS`
+    """
+    aliases: list[str] = shard_aliases()
+    if len(aliases) == 1 or _fan_out_thread.active:
+        # nested fan-outs run in their thread, so the pool never waits on itself
+        results: list[T] = []
+        for alias in aliases:
+            with use_shard(alias):
+                results.append(func(alias))
+        return results
+    return list(get_executor().map(partial(run_on_shard, func), aliases))
+
+
+class FanOutThread(threading.local):
+    active: bool = False
+
+
+_fan_out_thread = FanOutThread()
+
+
+def run_on_shard(func: Callable[[str], T], alias: str) -> T:
+    # like request threads, drop the connections that broke or outlived CONN_MAX_AGE
+    close_old_connections()
+    _fan_out_thread.active = True
+    try:
+        with use_shard(alias):
+            return func(alias)
+    finally:
+        _fan_out_thread.active = False
+        close_old_connections()
+
+
+def locate(queryset, **lookup) -> Model:
+    """Get the object matching `lookup` from whichever shard holds it, like `get()`."""
+    for found in fan_out(lambda alias: queryset.using(alias).filter(**lookup).first()):
+        if found is not None:
+            return found
+    raise queryset.model.DoesNotExist(f'{queryset.model._meta.object_name} matching query does not exist.')
+
+
+@receiver(pre_save)
+def allocate_room_id(sender, instance: Model, raw: bool = False, **kwargs) -> None:
+    if sender._meta.label_lower != ROOM or raw or instance.pk is not None or len(shard_aliases()) < 2:
+        return
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, %s))",
+                       [sender._meta.db_table, sender._meta.pk.column])
+        instance.pk = cursor.fetchone()[0]
+
+
+@receiver(post_save)
+def replicate_saved(sender, instance: Model, raw: bool = False, using: str = DEFAULT_DB_ALIAS,
+                    **kwargs) -> None:
+    if raw or using != DEFAULT_DB_ALIAS or sender._meta.label_lower not in REPLICATED_MODELS:
+        return
+    for alias in shard_aliases():
+        if alias != using:
+            copy(instance).save_base(using=alias, raw=True)
+
+
+def replicate(queryset: QuerySet) -> None:
+    """Copy reference rows written to `default` in bulk to every other shard.
+
+    Args:
+        queryset (QuerySet): the rows to copy; rows already copied are left as they are
+    """
+    rows: list[Model] = list(queryset.using(DEFAULT_DB_ALIAS))
+    for alias in shard_aliases():
+        if alias != DEFAULT_DB_ALIAS and rows:
+            queryset.model._base_manager.using(alias).bulk_create(rows, ignore_conflicts=True)
+
+
+@receiver(pre_delete)
+def replicate_deleted(sender, instance: Model, using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    # before the delete, so a hotel with rooms on a shard is protected everywhere
+    if using != DEFAULT_DB_ALIAS or sender._meta.label_lower not in REPLICATED_MODELS:
+        return
+    for alias in shard_aliases():
+        if alias != using:
+            sender._base_manager.using(alias).filter(pk=instance.pk).delete()
@@ -0,0 +1,107 @@
+from datetime import date
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from .models import Booking, Room
+from .sharding import use_shard
+
+
+class BookingChange(NamedTuple):
+    """
+    A booking whose date range was occupied or freed.
+
+    Attributes:
+        booking_number (UUID): The booking that changed.
+        user_id (int): The owner of the booking.
+        room_id (int): The room whose availability changed.
+        start_date (date): The first night of the changed range.
+        end_date (date): The checkout date of the changed range.
+        status (str): Status after the change: active (occupied) or cancelled (freed).
+    """
+    booking_number: UUID
+    user_id: int
+    room_id: int
+    start_date: date
+    end_date: date
+    status: str
+
+
+# Sent with `changes`, a list of BookingChange, whenever room availability
+# changes. Availability caches should listen to this instead of post_save,
+# because bulk operations write bookings without saving model instances.
+bookings_changed = Signal()
+
+# Sent with `entries`, a list of WaitlistEntry with auto_book disabled,
+# when a cancellation frees a room for their dates.
+waitlist_matched = Signal()
+
+
+def notify_bookings_changed(changes: list[BookingChange], using: Optional[str] = None) -> None:
+    """Tell availability caches which ranges changed.
+
+    Args:
+        changes (list[BookingChange]): changed bookings
+        using (str, optional): database of the bookings, pinned for the
+            receivers; by default the shard already pinned
+    """
+    if changes:
+        with use_shard(using):
+            bookings_changed.send(sender=Booking, changes=changes)
+
+
+def booking_change(booking: Booking, status: Optional[str] = None) -> BookingChange:
+    """Describe a booking instance as a BookingChange.
+
+    Args:
+        booking (Booking): the changed booking
+        status (str, optional): status to report instead of the booking's own
+
+    Returns:
+        BookingChange: the changed range
+    """
+    return BookingChange(booking.booking_number, booking.user_id, booking.room_id,
+                         booking.start_date, booking.end_date, status or booking.status)
+
+
+@receiver(pre_save, sender=Booking)
+def booking_saving(sender, instance: Booking, raw: bool = False, using: Optional[str] = None,
+                   **kwargs) -> None:
+    # Bookings loaded with deferred range fields read them before the update.
+    if raw or instance._state.adding or hasattr(instance, '_stored_range'):
+        return
+    instance._stored_range = Booking.objects.using(using).filter(pk=instance.pk).values_list(
+        *Booking.RANGE_FIELDS).first()
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance: Booking, created: bool = False,
+                  using: Optional[str] = None, **kwargs) -> None:
+    """
+    Report the saved range. An edit that moves an active booking to other
+    dates or another room first reports its old range as freed.
+    """
+    stored: Optional[tuple] = None if created else getattr(instance, '_stored_range', None)
+    changes: list[BookingChange] = []
+    if stored is not None:
+        room_id, start_date, end_date, status = stored
+        moved: bool = (room_id, start_date, end_date) != (
+            instance.room_id, instance.start_date, instance.end_date)
+        if moved and status == "active":
+            changes.append(BookingChange(instance.booking_number, instance.user_id,
+                                         room_id, start_date, end_date, "cancelled"))
+    changes.append(booking_change(instance))
+    instance.remember_stored_range()
+    notify_bookings_changed(changes, using)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance: Booking, origin=None, using: Optional[str] = None,
+                    **kwargs) -> None:
+    # Bookings deleted along with their room leave no availability to
+    # update, and caches must not write rows for the deleted room.
+    if isinstance(origin, Room) or getattr(origin, 'model', None) is Room:
+        return
+    notify_bookings_changed([booking_change(instance, status="cancelled")], using)
@@ -0,0 +1,6 @@
+from datetime import date, timedelta
+
+
+def day(offset: int) -> date:
+    """Return the date `offset` days from today."""
+    return date.today() + timedelta(days=offset)
@@ -0,0 +1,76 @@
+import pytest
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from app.admin import estimate_count
+from app.models import Booking, CustomUser, Room
+
+
+@pytest.fixture
+def bookings(superuser_client) -> list[Booking]:
+    users = [CustomUser.objects.create_user(email=f'guest{i}@example.com', password='12345')
+             for i in range(5)]
+    rooms = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2)
+             for i in range(5)]
+    return [Booking.objects.create(user=user, room=room, start_date=date.today(),
+                                   end_date=date.today() + timedelta(days=1))
+            for user, room in zip(users, rooms)]
+
+
+@pytest.fixture
+def superuser_client(client):
+    superuser: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='admin')
+    client.force_login(superuser)
+    return client
+
+
+@pytest.mark.django_db
+def test_booking_changelist_queries_do_not_grow_with_rows(superuser_client, bookings):
+    url = reverse('admin:app_booking_changelist')
+    with CaptureQueriesContext(connection) as few:
+        superuser_client.get(url)
+
+    user: CustomUser = CustomUser.objects.create_user(
+        email='another@example.com', password='12345')
+    for i in range(5):
+        Booking.objects.create(user=user, room=bookings[0].room, start_date=date.today() + timedelta(days=i + 1),
+                               end_date=date.today() + timedelta(days=i + 2))
+    with CaptureQueriesContext(connection) as many:
+        response = superuser_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(many) == len(few)
+
+
+@pytest.mark.django_db
+def test_booking_search_by_number_and_email(superuser_client, bookings):
+    url = reverse('admin:app_booking_changelist')
+
+    response = superuser_client.get(url, {'q': str(bookings[1].booking_number)})
+    assert list(response.context['cl'].result_list) == [bookings[1]]
+
+    response = superuser_client.get(url, {'q': 'guest2@example.com'})
+    assert list(response.context['cl'].result_list) == [bookings[2]]
+
+    response = superuser_client.get(url, {'q': 'Room 3'})
+    assert list(response.context['cl'].result_list) == [bookings[3]]
+
+
+@pytest.mark.django_db
+def test_estimated_count_used_above_threshold(superuser_client, bookings, settings):
+    settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 0
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE app_booking')
+
+    assert estimate_count(Booking.objects.all()) == len(bookings)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = superuser_client.get(reverse('admin:app_booking_changelist'))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not any('COUNT(*)' in query['sql'] for query in queries)
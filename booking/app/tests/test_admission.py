@@ -0,0 +1,105 @@
+import pytest
+from datetime import date, timedelta
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.admission import TokenBucket
+from app.models import CustomUser, Room
+
+
+def admission_config(**overrides) -> dict:
+    config = {
+        'USER_RATE': 0.01,
+        'USER_BURST': 5,
+        'GLOBAL_RATE': 0.01,
+        'GLOBAL_BURST': 100,
+        'MAX_CONCURRENT': 16,
+        'RETRY_AFTER': 1,
+    }
+    config.update(overrides)
+    return config
+
+
+def booking_data(room: Room, offset: int) -> dict:
+    return {
+        'room': room.id,
+        'start_date': date.today() + timedelta(days=offset),
+        'end_date': date.today() + timedelta(days=offset + 1)
+    }
+
+
+@pytest.fixture
+def client_and_room() -> tuple[APIClient, Room]:
+    client = APIClient()
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client.force_authenticate(user=user)
+    room: Room = Room.objects.create(
+        name="Room", price_per_night=100.00, capacity=2)
+    return client, room
+
+
+def test_token_bucket_refuses_when_empty():
+    bucket = TokenBucket(rate=1, capacity=2)
+
+    assert bucket.consume() == 0
+    assert bucket.consume() == 0
+    assert 0 < bucket.consume() <= 1
+
+
+@pytest.mark.django_db
+def test_user_throttled_with_retry_after(settings, client_and_room):
+    settings.BOOKING_ADMISSION = admission_config(USER_BURST=1)
+    client, room = client_and_room
+
+    response = client.post(reverse('booking-list'), booking_data(room, 0))
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.post(reverse('booking-list'), booking_data(room, 1))
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response['Retry-After']) > 0
+
+
+@pytest.mark.django_db
+def test_globally_throttled(settings, client_and_room):
+    settings.BOOKING_ADMISSION = admission_config(GLOBAL_BURST=1)
+    client, room = client_and_room
+
+    assert client.post(reverse('booking-list'),
+                       booking_data(room, 0)).status_code == status.HTTP_201_CREATED
+    assert client.post(reverse('booking-list'), booking_data(
+        room, 1)).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+@pytest.mark.django_db
+def test_overloaded_rejected_with_503(settings, client_and_room):
+    settings.BOOKING_ADMISSION = admission_config(MAX_CONCURRENT=0)
+    client, room = client_and_room
+
+    response = client.post(reverse('booking-list'), booking_data(room, 0))
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response['Retry-After'] == '1'
+
+
+@pytest.mark.django_db
+def test_admission_stats(settings, client_and_room):
+    settings.BOOKING_ADMISSION = admission_config(USER_BURST=1)
+    client, room = client_and_room
+    client.post(reverse('booking-list'), booking_data(room, 0))
+    client.post(reverse('booking-list'), booking_data(room, 1))
+
+    response = client.get(reverse('admission-stats'))
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    superuser: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='admin')
+    client.force_authenticate(user=superuser)
+    response = client.get(reverse('admission-stats'))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['in_flight'] == 0
+    assert response.data['admitted'] == 1
+    assert response.data['user_throttled'] == 1
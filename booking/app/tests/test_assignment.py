@@ -0,0 +1,127 @@
+import pytest
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.assignment import Stay, assign_rooms, optimize_room_type
+from app.models import Booking, CustomUser, OutboxEvent, Room, RoomDailyRollup, RoomType
+from conftest import day
+
+
+def test_assign_rooms_best_fit_closes_gaps():
+    """
+    Test that each stay goes to the room freed the latest before it starts.
+    """
+    stays = [Stay(1, day(1), day(3), 10), Stay(2, day(1), day(4), 20),
+             Stay(3, day(3), day(5), 20), Stay(4, day(4), day(6), 10)]
+
+    assert assign_rooms([10, 20], [], stays) == {1: 10, 2: 20, 3: 10, 4: 20}
+
+
+def test_assign_rooms_respects_pinned_stays():
+    pinned = [Stay(1, day(4), day(6), 10)]
+    movable = [Stay(2, day(1), day(2), 10), Stay(3, day(2), day(6), 20)]
+
+    assert assign_rooms([10, 20], [], movable) == {2: 10, 3: 10}
+    assert assign_rooms([10, 20], pinned, movable) == {2: 10, 3: 20}
+    assert assign_rooms([10], pinned, movable) is None
+
+
+@pytest.fixture
+def room_type() -> RoomType:
+    return RoomType.objects.create(name="Double", price_per_night=100.00, capacity=2)
+
+
+@pytest.fixture
+def guest() -> CustomUser:
+    return CustomUser.objects.create_user(email='guest@example.com', password='12345')
+
+
+@pytest.mark.django_db
+def test_book_by_room_type_assigns_best_fit_room(room_type, guest):
+    rooms = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2,
+                                 room_type=room_type) for i in range(3)]
+    Booking.objects.create(user=guest, room=rooms[0], start_date=day(1), end_date=day(2))
+    Booking.objects.create(user=guest, room=rooms[1], start_date=day(1), end_date=day(3))
+    Booking.objects.create(user=guest, room=rooms[2], start_date=day(3), end_date=day(5))
+    client = APIClient()
+    client.force_authenticate(user=guest)
+
+    response = client.post(reverse('booking-list'), {
+        'room_type': room_type.id, 'start_date': day(3), 'end_date': day(4)}, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED, response.data
+    assert response.data['room_type'] == room_type.id
+    assert response.data['room_detail']['id'] == rooms[1].id
+
+    response = client.post(reverse('booking-list'), {
+        'room_type': room_type.id, 'start_date': day(3), 'end_date': day(4)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['room_detail']['id'] == rooms[0].id
+
+    response = client.post(reverse('booking-list'), {
+        'room_type': room_type.id, 'start_date': day(3), 'end_date': day(4)}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_booking_requires_room_or_room_type(guest):
+    client = APIClient()
+    client.force_authenticate(user=guest)
+
+    response = client.post(reverse('booking-list'), {
+        'start_date': day(1), 'end_date': day(2)}, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_optimize_room_type_moves_bookings_made_by_type(room_type, guest):
+    """
+    Test that bookings made by type are repacked to close gaps, bookings of
+    specific rooms stay put, and rollups follow the moves.
+    """
+    first, second = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2,
+                                         room_type=room_type) for i in range(2)]
+    fixed = Booking.objects.create(user=guest, room=first, start_date=day(1), end_date=day(3))
+    Booking.objects.create(user=guest, room=second, start_date=day(1), end_date=day(2))
+    moved = Booking.objects.create(user=guest, room=second, room_type=room_type,
+                                   start_date=day(3), end_date=day(5))
+
+    result = optimize_room_type(room_type, dry_run=True)
+    assert (result.moved, result.gaps_before, result.gaps_after) == (1, 1, 0)
+    assert Booking.objects.get(pk=moved.pk).room == second
+
+    out = StringIO()
+    call_command('optimize_room_assignments', stdout=out)
+
+    assert 'Double: moved 1 of 3 bookings, gap nights 1 -> 0.' in out.getvalue()
+    moved.refresh_from_db()
+    fixed.refresh_from_db()
+    assert moved.room == first
+    assert fixed.room == first
+    assert RoomDailyRollup.objects.get(room=first, date=day(3)).occupied
+    assert not RoomDailyRollup.objects.get(room=second, date=day(3)).occupied
+    # consumers are told of the move, not of a cancellation
+    event: OutboxEvent = OutboxEvent.objects.get(booking_number=moved.booking_number,
+                                                 event_type='booking.moved')
+    assert (event.payload['room_id'], event.payload['previous']['room_id']) == (first.pk, second.pk)
+
+
+@pytest.mark.django_db
+def test_optimize_room_type_keeps_bookings_without_fewer_gaps(room_type, guest):
+    first, second = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2,
+                                         room_type=room_type) for i in range(2)]
+    Booking.objects.create(user=guest, room=first, start_date=day(1), end_date=day(2))
+    # the sweep would pick the first room, leaving a two night gap there instead
+    booking = Booking.objects.create(user=guest, room=second, room_type=room_type,
+                                     start_date=day(4), end_date=day(6))
+
+    result = optimize_room_type(room_type)
+
+    assert (result.moved, result.gaps_before, result.gaps_after) == (0, 0, 0)
+    assert Booking.objects.get(pk=booking.pk).room == second
+    assert not OutboxEvent.objects.filter(event_type='booking.moved').exists()
@@ -0,0 +1,147 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app import bitmap as bitmap_module
+from app.bitmap import AvailabilityBitmap, get_bitmap
+from app.models import Booking, CustomUser, Room
+from conftest import day
+
+
+@pytest.fixture
+def bitmap(settings, tmp_path) -> AvailabilityBitmap:
+    settings.AVAILABILITY_BITMAP = {
+        'ENABLED': True, 'PATH': tmp_path / 'availability.bitmap', 'DAYS': 60}
+    return get_bitmap()
+
+
+@pytest.mark.django_db
+def test_bitmap_matches_active_bookings(bitmap):
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    rooms = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2)
+             for i in range(3)]
+    Booking.objects.create(user=user, room=rooms[0], start_date=day(-3), end_date=day(2))
+    Booking.objects.create(user=user, room=rooms[0], start_date=day(9), end_date=day(17))
+    Booking.objects.create(user=user, room=rooms[1], start_date=day(55), end_date=day(70))
+    Booking.objects.create(user=user, room=rooms[2], start_date=day(4), end_date=day(6),
+                           status="cancelled")
+    bitmap.rebuild()
+
+    for room in rooms:
+        for start in range(0, 59, 3):
+            for nights in (1, 2, 5):
+                if start + nights > 64:
+                    continue
+                expected = Booking.objects.filter(
+                    room=room, status="active",
+                    start_date__lt=day(start + nights), end_date__gt=day(start)).exists()
+                assert bitmap.is_busy(room.pk, day(start), day(start + nights)) == expected
+    assert bitmap.busy_rooms(day(1), day(10)).tolist() == [rooms[0].pk]
+    assert bitmap.busy_rooms(day(2), day(9)).tolist() == []
+    # outside the bitmap: answered with SQL
+    assert bitmap.is_busy(rooms[1].pk, day(58), day(66)) is None
+    assert bitmap.busy_rooms(day(-1), day(1)) is None
+
+
+@pytest.mark.django_db
+def test_bitmap_follows_create_and_cancel(bitmap, tmp_path, django_capture_on_commit_callbacks):
+    """
+    Test that committed changes reach every process mapping the file,
+    and that the room list then filters availability without joining bookings.
+    """
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    other: Room = Room.objects.create(name="Other", price_per_night=100.00, capacity=2)
+    bitmap.rebuild()
+    worker = AvailabilityBitmap(tmp_path / 'availability.bitmap', 60)
+    assert worker.is_busy(room.pk, day(1), day(3)) is False
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(reverse('booking-list'), {
+            'room': room.id, 'start_date': day(1), 'end_date': day(3)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert worker.is_busy(room.pk, day(2), day(5)) is True
+    assert worker.is_busy(room.pk, day(3), day(5)) is False
+
+    with CaptureQueriesContext(connection) as queries:
+        listed = client.get(reverse('room-list'), {'start_date': day(0), 'end_date': day(2)})
+    assert [item['id'] for item in listed.data] == [other.id]
+    assert not any('app_booking' in query['sql'] for query in queries.captured_queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(reverse('booking-cancel', args=[response.data['booking_number']]))
+    assert worker.is_busy(room.pk, day(0), day(10)) is False
+    assert Room.objects.get(pk=room.pk).is_available(day(1), day(3))
+
+
+@pytest.mark.django_db
+def test_bitmap_reader_falls_back_while_written(bitmap):
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    bitmap.rebuild()
+    Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(3))
+
+    with bitmap.writing():
+        # sequence is odd: readers retry, then answer with SQL
+        assert bitmap.is_busy(room.pk, day(1), day(2)) is None
+        assert not room.is_available(day(1), day(2))
+    assert bitmap.is_busy(room.pk, day(1), day(2)) is False
+
+
+@pytest.mark.django_db
+def test_bitmap_grows_for_new_rooms(bitmap, monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(bitmap_module, 'SPARE_ROWS', 0)
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    bitmap.rebuild()
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    assert bitmap.is_busy(room.pk, day(1), day(2)) is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(3))
+    assert bitmap.is_busy(room.pk, day(1), day(2)) is True
+
+
+@pytest.mark.django_db
+def test_failed_refresh_marks_bitmap_stale(bitmap, monkeypatch, django_capture_on_commit_callbacks):
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    bitmap.rebuild()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(AvailabilityBitmap, '_write_ranges', fail)
+    with django_capture_on_commit_callbacks(execute=True):
+        Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(3))
+    # the stale bitmap is not read, availability comes from SQL
+    assert bitmap.is_busy(room.pk, day(1), day(2)) is None
+    assert not room.is_available(day(1), day(2))
+
+    monkeypatch.undo()
+    with django_capture_on_commit_callbacks(execute=True):
+        Booking.objects.create(user=user, room=room, start_date=day(5), end_date=day(6))
+    # the next refresh rebuilds it
+    assert bitmap.is_busy(room.pk, day(1), day(2)) is True
+    assert bitmap.is_busy(room.pk, day(5), day(6)) is True
+
+
+@pytest.mark.django_db
+def test_room_ids_bound_as_one_parameter():
+    rooms = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2)
+             for i in range(3)]
+    many: list[int] = [rooms[0].pk] + list(range(10 ** 6, 10 ** 6 + 70000))
+
+    assert list(Room.objects.with_ids(many).values_list('pk', flat=True)) == [rooms[0].pk]
+    assert sorted(Room.objects.with_ids(many, include=False).values_list('pk', flat=True)) == [
+        rooms[1].pk, rooms[2].pk]
@@ -0,0 +1,105 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room
+from conftest import day
+
+
+def list_bookings(client: APIClient, **params) -> tuple[list, int]:
+    """List bookings, returning the payload and the number of booking queries."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('booking-list'), params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.data, sum('app_booking' in query['sql'] for query in queries.captured_queries)
+
+
+@pytest.fixture
+def guest() -> tuple[CustomUser, APIClient]:
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return user, client
+
+
+@pytest.mark.django_db
+def test_booking_list_cached_until_create_and_cancel(guest):
+    user, client = guest
+    other: CustomUser = CustomUser.objects.create_user(
+        email='other@example.com', password='12345')
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(2))
+
+    payload, queries = list_bookings(client)
+    assert len(payload) == 1 and queries == 1
+    assert list_bookings(client) == (payload, 0)
+
+    # another user's bookings don't invalidate the list
+    Booking.objects.create(user=other, room=room, start_date=day(5), end_date=day(6))
+    assert list_bookings(client) == (payload, 0)
+
+    response = client.post(reverse('booking-list'), {
+        'room': room.id, 'start_date': day(3), 'end_date': day(4)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    payload, queries = list_bookings(client)
+    assert len(payload) == 2 and queries == 1
+
+    client.post(reverse('booking-cancel', args=[response.data['booking_number']]))
+    payload, queries = list_bookings(client)
+    assert len(payload) == 1 and queries == 1
+
+
+@pytest.mark.django_db
+def test_booking_list_cache_follows_edits_and_fields(guest):
+    user, client = guest
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    booking: Booking = Booking.objects.create(
+        user=user, room=room, start_date=day(1), end_date=day(2))
+
+    assert list_bookings(client, fields='booking_number')[0] == [
+        {'booking_number': str(booking.booking_number)}]
+    assert list_bookings(client)[0][0]['room_detail']['name'] == "Room"
+
+    # admin edits of the booking and of its room
+    booking.end_date = day(3)
+    booking.save()
+    room.name = "Suite"
+    room.save()
+    payload, queries = list_bookings(client)
+    assert payload[0]['end_date'] == str(day(3)) and payload[0]['room_detail']['name'] == "Suite"
+    assert queries == 1
+
+    room.delete()
+    assert list_bookings(client)[0] == []
+
+
+@pytest.mark.django_db
+def test_superuser_booking_list_not_cached():
+    admin: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='12345')
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    Booking.objects.create(user=admin, room=room, start_date=day(1), end_date=day(2),
+                           status="cancelled")
+
+    for _ in range(2):
+        payload, queries = list_bookings(client)
+        assert len(payload) == 1 and queries == 1
+
+
+@pytest.mark.django_db
+def test_booking_list_not_cached_without_shared_cache(guest, settings):
+    settings.SHARED_CACHE = False
+    user, client = guest
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(2))
+
+    for _ in range(2):
+        payload, queries = list_bookings(client)
+        assert len(payload) == 1 and queries == 1
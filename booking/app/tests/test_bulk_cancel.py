@@ -0,0 +1,116 @@
+import pytest
+from datetime import date, timedelta
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room
+from app.signals import bookings_changed
+
+
+@pytest.fixture
+def superuser_client() -> APIClient:
+    client = APIClient()
+    superuser: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='admin')
+    client.force_authenticate(user=superuser)
+    return client
+
+
+@pytest.mark.django_db
+def test_bulk_cancel_by_room_and_dates(superuser_client: APIClient):
+    """
+    Test that a superuser cancels all active bookings of a room in a date range.
+    """
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    room: Room = Room.objects.create(
+        name="Event Room", price_per_night=100.00, capacity=2)
+    other_room: Room = Room.objects.create(
+        name="Other Room", price_per_night=100.00, capacity=2)
+    today = date.today()
+
+    in_range = [Booking.objects.create(user=user, room=room, start_date=today + timedelta(days=i),
+                                       end_date=today + timedelta(days=i + 1)) for i in range(3)]
+    later: Booking = Booking.objects.create(
+        user=user, room=room, start_date=today + timedelta(days=10), end_date=today + timedelta(days=11))
+    other: Booking = Booking.objects.create(
+        user=user, room=other_room, start_date=today, end_date=today + timedelta(days=1))
+
+    received = []
+
+    def listener(sender, changes, **kwargs):
+        received.extend(changes)
+
+    bookings_changed.connect(listener)
+    try:
+        response = superuser_client.post(reverse('booking-bulk-cancel'), {
+            'room': room.id,
+            'start_date': today,
+            'end_date': today + timedelta(days=3)
+        }, format='json')
+    finally:
+        bookings_changed.disconnect(listener)
+
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert response.data['count'] == 3
+    assert set(response.data['cancelled']) == {
+        str(booking.booking_number) for booking in in_range}
+    assert {(change.room_id, change.start_date, change.status) for change in received} == {
+        (room.id, booking.start_date, 'cancelled') for booking in in_range}
+    assert Booking.objects.filter(status='cancelled').count() == 3
+    later.refresh_from_db()
+    other.refresh_from_db()
+    assert later.status == 'active'
+    assert other.status == 'active'
+
+
+@pytest.mark.django_db
+def test_bulk_cancel_by_booking_numbers_skips_cancelled(superuser_client: APIClient):
+    """
+    Test that already cancelled bookings are not reported again.
+    """
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    room: Room = Room.objects.create(
+        name="Room", price_per_night=100.00, capacity=2)
+    active: Booking = Booking.objects.create(
+        user=user, room=room, start_date=date.today(), end_date=date.today() + timedelta(days=1))
+    cancelled: Booking = Booking.objects.create(
+        user=user, room=room, start_date=date.today(), end_date=date.today() + timedelta(days=1),
+        status='cancelled')
+
+    response = superuser_client.post(reverse('booking-bulk-cancel'), {
+        'booking_numbers': [str(active.booking_number), str(cancelled.booking_number)]
+    }, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['cancelled'] == [str(active.booking_number)]
+
+
+@pytest.mark.django_db
+def test_bulk_cancel_requires_filter(superuser_client: APIClient):
+    response = superuser_client.post(
+        reverse('booking-bulk-cancel'), {}, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_bulk_cancel_forbidden_for_regular_user():
+    client = APIClient()
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client.force_authenticate(user=user)
+    room: Room = Room.objects.create(
+        name="Room", price_per_night=100.00, capacity=2)
+    booking: Booking = Booking.objects.create(
+        user=user, room=room, start_date=date.today(), end_date=date.today() + timedelta(days=1))
+
+    response = client.post(reverse('booking-bulk-cancel'),
+                           {'room': room.id}, format='json')
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    booking.refresh_from_db()
+    assert booking.status == 'active'
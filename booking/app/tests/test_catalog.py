@@ -0,0 +1,93 @@
+import random
+import pytest
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from app.catalog import get_catalog
+from app.models import Booking, CustomUser, Room
+from conftest import day
+
+
+@pytest.fixture
+def rooms() -> list[Room]:
+    rng = random.Random(0)
+    cache.clear()
+    return Room.objects.bulk_create([
+        Room(name=f"Room {i}", price_per_night=rng.choice((80, 99.99, 100, 120.50, 150)),
+             capacity=rng.randint(1, 4)) for i in range(40)])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [
+    {},
+    {'min_price': '99.99', 'max_price': '120.5'},
+    {'capacity': '3', 'ordering': '-price_per_night'},
+    {'min_price': '100', 'ordering': 'capacity', 'limit': '5', 'offset': '3'},
+    {'max_price': '100', 'ordering': '-capacity', 'limit': '50', 'fields': 'id,name'},
+])
+def test_catalog_matches_database(rooms, settings, params):
+    client = APIClient()
+    from_database = client.get(reverse('room-list'), params).data
+
+    settings.ROOM_CATALOG_SNAPSHOT = True
+    cache.clear()
+    client.get(reverse('room-list'))
+    with CaptureQueriesContext(connection) as queries:
+        from_catalog = client.get(reverse('room-list'), params).data
+
+    assert from_catalog == from_database
+    # the catalog is loaded: only the rooms listed are read, by id
+    assert len(queries.captured_queries) == 1
+    assert 'price_per_night" >=' not in queries.captured_queries[0]['sql']
+
+
+@pytest.mark.django_db
+def test_catalog_reloaded_on_room_changes(rooms, settings):
+    settings.ROOM_CATALOG_SNAPSHOT = True
+    client = APIClient()
+    room: Room = rooms[0]
+    listed = client.get(reverse('room-list'), {'min_price': '1000'}).data
+    assert listed == []
+
+    room.price_per_night = 1500
+    room.save()
+    listed = client.get(reverse('room-list'), {'min_price': '1000'}).data
+    assert [item['id'] for item in listed] == [room.id]
+
+    room.delete()
+    assert client.get(reverse('room-list'), {'min_price': '1000'}).data == []
+
+
+@pytest.mark.django_db
+def test_catalog_needs_shared_cache(rooms, settings):
+    settings.ROOM_CATALOG_SNAPSHOT = True
+    assert get_catalog() is not None
+    # workers could not tell each other of room changes
+    settings.SHARED_CACHE = False
+    assert get_catalog() is None
+
+
+@pytest.mark.django_db
+def test_catalog_with_dates_needs_bitmap(rooms, settings, tmp_path):
+    settings.ROOM_CATALOG_SNAPSHOT = True
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    Booking.objects.create(user=user, room=rooms[0], start_date=day(1), end_date=day(3))
+    client = APIClient()
+    params: dict = {'start_date': day(0), 'end_date': day(2), 'ordering': 'price_per_night'}
+
+    # without the bitmap, availability is filtered by the database
+    expected: list = client.get(reverse('room-list'), params).data
+    assert rooms[0].id not in [item['id'] for item in expected]
+
+    settings.AVAILABILITY_BITMAP = {
+        'ENABLED': True, 'PATH': tmp_path / 'availability.bitmap', 'DAYS': 30}
+    from app.bitmap import get_bitmap
+    get_bitmap().rebuild()
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(reverse('room-list'), params).data == expected
+    assert not any('app_booking' in query['sql'] for query in queries.captured_queries)
@@ -0,0 +1,118 @@
+import pytest
+from datetime import date, timedelta
+from itertools import combinations
+
+import numpy as np
+from django.urls import reverse
+from hypothesis import given, settings, strategies as st
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.combinations import candidate_rooms, cheapest_combinations, room_classes, room_combinations
+from app.models import Booking, CustomUser, Room, RoomRate
+from app.pricing import quote_catalog, room_catalog
+
+
+def brute_force(rooms: list[tuple[int, int, int]], party_size: int, k: int) -> list[tuple[int, int]]:
+    """(total, room count) of the k cheapest distinct minimal combinations."""
+    found: set = set()
+    for size in range(1, len(rooms) + 1):
+        for combination in combinations(rooms, size):
+            capacity: int = sum(room[1] for room in combination)
+            if capacity >= party_size and capacity - min(room[1] for room in combination) < party_size:
+                found.add(tuple(sorted((room[1], room[2]) for room in combination)))
+    return sorted((sum(price for _, price in signature), len(signature)) for signature in found)[:k]
+
+
+@given(rooms=st.lists(st.tuples(st.integers(1, 4), st.sampled_from([50, 80, 100, 120])),
+                      max_size=8),
+       party_size=st.integers(1, 12), k=st.integers(1, 6))
+@settings(max_examples=200, deadline=None)
+def test_cheapest_combinations_match_brute_force(rooms, party_size, k):
+    rooms = [(room_id, capacity, price) for room_id, (capacity, price) in enumerate(rooms, 1)]
+    classes = room_classes(*(np.array(column, dtype=np.int64).reshape(-1)
+                             for column in zip(*rooms))) if rooms else []
+
+    found = cheapest_combinations(classes, party_size, k)
+
+    assert [(combination.total, len(combination.room_ids)) for combination in found] == \
+        brute_force(rooms, party_size, k)
+    capacity_of: dict[int, int] = {room_id: capacity for room_id, capacity, _ in rooms}
+    for combination in found:
+        capacities = [capacity_of[room_id] for room_id in combination.room_ids]
+        assert len(set(combination.room_ids)) == len(combination.room_ids)
+        assert sum(capacities) == combination.capacity >= party_size
+        assert sum(capacities) - min(capacities) < party_size
+
+
+@pytest.mark.django_db
+def test_room_combinations_for_available_rooms():
+    """
+    Test that a party of 9 gets combinations of free rooms, priced with the
+    rate calendar, cheapest first.
+    """
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    start_date: date = date.today() + timedelta(days=1)
+    end_date: date = start_date + timedelta(days=2)
+    suite = Room.objects.create(name="Suite", price_per_night=300.00, capacity=6)
+    family = Room.objects.create(name="Family", price_per_night=150.00, capacity=4)
+    doubles = [Room.objects.create(name=f"Double {i}", price_per_night=100.00, capacity=2)
+               for i in range(3)]
+    booked = Room.objects.create(name="Booked", price_per_night=10.00, capacity=10)
+    Booking.objects.create(user=user, room=booked, start_date=start_date, end_date=end_date)
+    RoomRate.objects.create(room=family, start_date=start_date, end_date=end_date,
+                            price_per_night=90.00)
+
+    response = APIClient().get(reverse('room-combinations'), {
+        'party_size': 9, 'start_date': start_date, 'end_date': end_date, 'k': 3})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {'rooms': [suite.id, family.id], 'capacity': 10, 'total': '780.00'},
+        {'rooms': [family.id, doubles[0].id, doubles[1].id, doubles[2].id],
+         'capacity': 10, 'total': '780.00'},
+        {'rooms': [suite.id, doubles[0].id, doubles[1].id], 'capacity': 10, 'total': '1000.00'},
+    ]
+
+
+@pytest.mark.django_db
+def test_room_combinations_price_candidate_rooms_only():
+    """
+    Test that only the cheapest rooms of each capacity a combination can use,
+    and rooms with a rate of their own, are priced, without losing a combination.
+    """
+    start_date: date = date.today() + timedelta(days=1)
+    end_date: date = start_date + timedelta(days=3)
+    rooms: list[Room] = [Room.objects.create(name=f"Room {i}", price_per_night=100 + i,
+                                             capacity=1 + i % 3)
+                         for i in range(60)]
+    RoomRate.objects.create(room=rooms[-1], start_date=start_date, end_date=end_date,
+                            price_per_night=20.00)
+    RoomRate.objects.create(capacity=3, start_date=start_date, end_date=start_date + timedelta(days=1),
+                            price_per_night=50.00)
+
+    candidates: set[int] = set(candidate_rooms(4, start_date, end_date, 2).values_list('pk', flat=True))
+
+    # capacity 1: 4 + 1 rooms, capacity 2: 2 + 1, capacity 3: 2 + 1, and the rated room
+    assert len(candidates) == 5 + 3 + 3 + 1
+    assert rooms[-1].pk in candidates
+    catalog = room_catalog(Room.objects.order_by('pk'))
+    room_ids, totals = quote_catalog(catalog, [(start_date, end_date)])
+    assert room_combinations(4, start_date, end_date, 2) == \
+        cheapest_combinations(room_classes(room_ids, catalog[:, 1], totals[:, 0]), 4, 2)
+
+
+@pytest.mark.django_db
+def test_room_combinations_validation():
+    response = APIClient().get(reverse('room-combinations'), {
+        'party_size': 0, 'start_date': date.today(), 'end_date': date.today()})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.data) == {'party_size'}
+
+    response = APIClient().get(reverse('room-combinations'), {
+        'party_size': 2, 'start_date': date.today(), 'end_date': date.today()})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.data) == {'non_field_errors'}
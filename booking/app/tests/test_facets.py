@@ -0,0 +1,77 @@
+import pytest
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room
+from conftest import day
+
+
+@pytest.fixture
+def rooms() -> list[Room]:
+    cache.clear()
+    return Room.objects.bulk_create([
+        Room(name=f"Room {i}", price_per_night=price, capacity=capacity)
+        for i, (price, capacity) in enumerate([
+            (40, 1), (49.99, 2), (50, 2), (80, 2), (99.99, 3), (120.50, 3), (150, 4), (160, 4)])])
+
+
+def list_rooms(params: dict) -> tuple[dict, int]:
+    """List rooms, returning the payload and the number of queries."""
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get(reverse('room-list'), params)
+    assert response.status_code == 200
+    return response.data, len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_facets_of_filtered_available_rooms(rooms):
+    user: CustomUser = CustomUser.objects.create_user(email='testuser@example.com', password='12345')
+    Booking.objects.create(user=user, room=rooms[6], start_date=day(1), end_date=day(3))
+    params: dict = {'capacity': '2', 'start_date': day(2), 'end_date': day(4)}
+
+    plain, queries = list_rooms(params)
+    payload, facet_queries = list_rooms({**params, 'facets': 'true'})
+
+    assert payload['results'] == plain
+    # counted with one grouped query
+    assert facet_queries == queries + 1
+    assert payload['facets'] == {
+        'price': [{'min': 0, 'max': 50, 'count': 1}, {'min': 50, 'max': 100, 'count': 3},
+                  {'min': 100, 'max': 150, 'count': 1}, {'min': 150, 'max': 200, 'count': 1}],
+        'capacity': [{'capacity': 2, 'count': 3}, {'capacity': 3, 'count': 2},
+                     {'capacity': 4, 'count': 1}],
+    }
+
+
+@pytest.mark.django_db
+def test_facets_count_every_page(rooms):
+    payload, _ = list_rooms({'facets': 'true', 'limit': 2, 'ordering': 'price_per_night'})
+
+    assert payload['count'] == len(rooms)
+    assert len(payload['results']) == 2
+    assert sum(bucket['count'] for bucket in payload['facets']['price']) == len(rooms)
+    assert list_rooms({'facets': 'true', 'min_price': 1000})[0] == {
+        'results': [], 'facets': {'price': [], 'capacity': []}}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [
+    {'facets': 'true'},
+    {'facets': 'true', 'min_price': '49.99', 'max_price': '150', 'ordering': '-capacity'},
+    {'facets': 'true', 'capacity': '3', 'limit': '1'},
+])
+def test_catalog_facets_match_database(rooms, settings, params):
+    from_database, _ = list_rooms(params)
+
+    settings.ROOM_CATALOG_SNAPSHOT = True
+    cache.clear()
+    list_rooms({})
+    from_catalog, queries = list_rooms(params)
+
+    assert from_catalog == from_database
+    # only the listed rooms are read, the facets come from the catalog
+    assert queries == 1
@@ -0,0 +1,74 @@
+import pytest
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.hashing import get_hasher_pool
+from app.models import CustomUser
+
+
+@pytest.mark.django_db
+def test_registration_hashes_in_process_pool():
+    response = APIClient().post(reverse('register'), {
+        'email': 'Guest@EXAMPLE.com', 'password': 'correct horse'}, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    user: CustomUser = CustomUser.objects.get(email='Guest@example.com')
+    assert user.check_password('correct horse')
+    assert get_hasher_pool().executor is not None
+    assert get_hasher_pool().pending == 0
+
+
+@pytest.mark.django_db
+def test_registration_rejected_when_hashing_overloaded(settings):
+    settings.PASSWORD_HASHING = {'WORKERS': 1, 'MAX_PENDING': 0, 'RETRY_AFTER': 2}
+
+    response = APIClient().post(reverse('register'), {
+        'email': 'guest@example.com', 'password': 'correct horse'}, format='json')
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response['Retry-After'] == '2'
+    assert not CustomUser.objects.exists()
+
+
+@pytest.mark.django_db
+def test_provision_users_from_csv(tmp_path):
+    CustomUser.objects.create_user(email='existing@example.com', password='12345')
+    csv_file = tmp_path / 'users.csv'
+    csv_file.write_text('first@example.com,secret one\n'
+                        'second@Example.com\n'
+                        'existing@example.com,other\n'
+                        'not an email\n'
+                        'first@example.com,duplicate\n')
+    out = StringIO()
+
+    call_command('provision_users', str(csv_file), '--workers', '2', '--batch-size', '1',
+                 stdout=out, stderr=StringIO())
+
+    assert out.getvalue().strip() == 'Created 2 users, skipped 1 existing and 1 invalid.'
+    assert CustomUser.objects.get(email='first@example.com').check_password('secret one')
+    assert not CustomUser.objects.get(email='second@example.com').has_usable_password()
+    assert CustomUser.objects.get(email='existing@example.com').check_password('12345')
+
+
+@pytest.mark.django_db
+def test_provision_users_counts_inserted_rows(tmp_path):
+    csv_file = tmp_path / 'users.csv'
+    csv_file.write_text('first@example.com\nsecond@example.com\n')
+    out = StringIO()
+    bulk_create = CustomUser.objects.bulk_create
+
+    def register_meanwhile(users, **kwargs):
+        # a user registers between the check for existing emails and the insert
+        CustomUser.objects.create_user(email='second@example.com', password='12345')
+        return bulk_create(users, **kwargs)
+
+    with mock.patch.object(CustomUser.objects, 'bulk_create', side_effect=register_meanwhile):
+        call_command('provision_users', str(csv_file), '--workers', '1', stdout=out)
+
+    assert out.getvalue().strip() == 'Created 1 users, skipped 0 existing and 0 invalid.'
+    assert CustomUser.objects.get(email='second@example.com').check_password('12345')
@@ -0,0 +1,121 @@
+import pytest
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.idempotency import cache_key_for
+from app.models import Booking, CustomUser, Room
+
+
+@pytest.fixture
+def client() -> APIClient:
+    cache.clear()
+    client = APIClient()
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def room() -> Room:
+    return Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+
+
+def booking_data(room: Room) -> dict:
+    return {
+        'room': room.id,
+        'start_date': date.today(),
+        'end_date': date.today() + timedelta(days=1)
+    }
+
+
+@pytest.mark.django_db
+def test_create_retry_replays_first_response(client, room):
+    first = client.post(reverse('booking-list'), booking_data(room),
+                        HTTP_IDEMPOTENCY_KEY='create-1')
+    retry = client.post(reverse('booking-list'), booking_data(room),
+                        HTTP_IDEMPOTENCY_KEY='create-1')
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert retry.content == first.content
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert Booking.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_key_reused_for_different_request(client, room):
+    client.post(reverse('booking-list'), booking_data(room),
+                HTTP_IDEMPOTENCY_KEY='create-1')
+    data = booking_data(room)
+    data['end_date'] = date.today() + timedelta(days=2)
+
+    response = client.post(reverse('booking-list'), data,
+                           HTTP_IDEMPOTENCY_KEY='create-1')
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.django_db
+def test_keys_are_scoped_per_user(client, room):
+    client.post(reverse('booking-list'), booking_data(room),
+                HTTP_IDEMPOTENCY_KEY='create-1')
+    other = APIClient()
+    other.force_authenticate(user=CustomUser.objects.create_user(
+        email='other@example.com', password='12345'))
+
+    response = other.post(reverse('booking-list'), booking_data(room),
+                          HTTP_IDEMPOTENCY_KEY='create-1')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'Idempotent-Replayed' not in response
+
+
+@pytest.mark.django_db
+def test_cancel_retry_replays_success(client, room):
+    booking: Booking = Booking.objects.create(
+        user=CustomUser.objects.get(email='testuser@example.com'), room=room,
+        start_date=date.today(), end_date=date.today() + timedelta(days=1))
+    url = reverse('booking-cancel', args=[booking.booking_number])
+
+    first = client.post(url, HTTP_IDEMPOTENCY_KEY='cancel-1')
+    retry = client.post(url, HTTP_IDEMPOTENCY_KEY='cancel-1')
+
+    assert first.status_code == status.HTTP_200_OK
+    assert retry.status_code == status.HTTP_200_OK
+    assert retry.content == first.content
+    assert client.post(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_in_flight_duplicate_gets_conflict(client, room, settings):
+    """
+    Test that a retry waits for the in-flight request and gives up with 409.
+    """
+    settings.IDEMPOTENCY = {**settings.IDEMPOTENCY, 'WAIT': 0.1}
+    user: CustomUser = CustomUser.objects.get(email='testuser@example.com')
+    cache.add(cache_key_for(user.pk, 'create-1') + ':lock', True)
+
+    response = client.post(reverse('booking-list'), booking_data(room),
+                           HTTP_IDEMPOTENCY_KEY='create-1')
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert Booking.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_keys_ignored_without_shared_cache(client, room, settings):
+    settings.SHARED_CACHE = False
+    first = client.post(reverse('booking-list'), booking_data(room),
+                        HTTP_IDEMPOTENCY_KEY='create-1')
+    retry = client.post(reverse('booking-list'), booking_data(room),
+                        HTTP_IDEMPOTENCY_KEY='create-1')
+
+    assert first.status_code == status.HTTP_201_CREATED
+    # executed again, and refused as the room is taken
+    assert retry.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'Idempotent-Replayed' not in retry
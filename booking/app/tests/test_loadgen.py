@@ -0,0 +1,47 @@
+import json
+import pytest
+from io import StringIO
+
+from django.core.management import call_command
+
+from app.loadgen import LoadError, parse_mix, percentile
+from app.models import Booking, CustomUser, Room
+
+
+def test_percentile_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+
+    assert [percentile(values, q) for q in (50, 95, 99, 100)] == [50.0, 95.0, 99.0, 100.0]
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0.0
+    with pytest.raises(LoadError):
+        parse_mix({'search': 1, 'browse': 1})
+    with pytest.raises(LoadError):
+        parse_mix({'search': 0})
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loadtest_command_reports_mixed_workload(live_server, tmp_path):
+    """
+    Test a short run of every operation against a live server, with the
+    report written as JSON.
+    """
+    Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    mix = tmp_path / 'mix.json'
+    mix.write_text(json.dumps({'search': 4, 'login': 1, 'refresh': 1, 'book': 2, 'cancel': 2}))
+    output = tmp_path / 'report.json'
+
+    call_command('loadtest', live_server.url, '--mix', str(mix), '--rate', '40',
+                 '--duration', '1', '--warmup', '0', '--users', '3', '--create-users',
+                 '--connections', '4', '--seed', '1', '--output', str(output), stdout=StringIO())
+
+    report: dict = json.loads(output.read_text())
+    assert CustomUser.objects.filter(email__startswith='loadtest-').count() == 3
+    assert report['requests'] == 40 and report['error_rate'] == 0
+    assert set(report['operations']) == {'search', 'login', 'refresh', 'book', 'cancel'}
+    search: dict = report['operations']['search']
+    assert search['statuses'] == {'200': search['requests']}
+    assert 0 < search['latency_ms']['p50'] <= search['latency_ms']['p99'] <= search['latency_ms']['max']
+    booked: int = report['operations']['book']['statuses'].get('201', 0)
+    assert Booking.objects.count() == booked
+    assert Booking.objects.filter(status="cancelled").count() == report['operations']['cancel']['requests']
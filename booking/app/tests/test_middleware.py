@@ -0,0 +1,38 @@
+import pytest
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.middleware import LeanAuthenticationMiddleware, LeanSessionMiddleware
+
+
+def test_session_and_auth_skipped_for_api_paths():
+    """
+    Test that API requests bypass the session and authentication middleware.
+    """
+    seen = {}
+
+    def view(request):
+        seen['session'] = hasattr(request, 'session')
+        seen['user'] = hasattr(request, 'user')
+        return HttpResponse()
+
+    middleware = LeanSessionMiddleware(LeanAuthenticationMiddleware(view))
+
+    middleware(RequestFactory().get('/app/rooms/'))
+    assert seen == {'session': False, 'user': False}
+
+    middleware(RequestFactory().get('/admin/'))
+    assert seen == {'session': True, 'user': True}
+
+
+@pytest.mark.django_db
+def test_admin_keeps_csrf_and_sessions():
+    client = APIClient()
+
+    response = client.get('/admin/login/')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert 'csrftoken' in response.cookies
@@ -0,0 +1,86 @@
+import pytest
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room, RoomNextAvailability
+from app.next_availability import next_starts
+from conftest import day
+
+
+def next_available(room: Room) -> dict[int, date]:
+    return dict(RoomNextAvailability.objects.filter(room=room).values_list('nights', 'next_start'))
+
+
+def test_next_starts_first_fit_per_stay_length():
+    bookings = [(day(-2), day(1)), (day(2), day(4)), (day(7), day(8))]
+
+    assert next_starts(bookings, day(0)) == {
+        1: day(1), 2: day(4), 3: day(4), 4: day(8), 5: day(8), 6: day(8), 7: day(8)}
+    assert next_starts([], day(0)) == dict.fromkeys(range(1, 8), day(0))
+
+
+@pytest.mark.django_db
+def test_next_availability_follows_create_and_cancel():
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    assert next_available(room) == dict.fromkeys(range(1, 8), day(0))
+
+    response = client.post(reverse('booking-list'), {
+        'room': room.id, 'start_date': day(0), 'end_date': day(2)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert next_available(room) == dict.fromkeys(range(1, 8), day(2))
+
+    client.post(reverse('booking-cancel', args=[response.data['booking_number']]))
+    assert next_available(room) == dict.fromkeys(range(1, 8), day(0))
+
+
+@pytest.mark.django_db
+def test_room_list_ordered_by_next_available():
+    """
+    Test that rooms are listed soonest free first for a stay length,
+    in one query.
+    """
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    free, busy, gap = [Room.objects.create(name=name, price_per_night=100.00, capacity=2)
+                       for name in ("Free", "Busy", "Gap")]
+    Booking.objects.create(user=user, room=busy, start_date=day(0), end_date=day(10))
+    Booking.objects.create(user=user, room=gap, start_date=day(0), end_date=day(1))
+    Booking.objects.create(user=user, room=gap, start_date=day(3), end_date=day(4))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get(reverse('room-list'), {'stay_nights': 3})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(queries) == 1
+    assert [(room['id'], room['next_available']) for room in response.data] == [
+        (free.id, str(day(0))), (gap.id, str(day(4))), (busy.id, str(day(10)))]
+
+    response = APIClient().get(reverse('room-list'), {'stay_nights': 2, 'free_by': day(1)})
+    assert [room['id'] for room in response.data] == [free.id, gap.id]
+
+    response = APIClient().get(reverse('room-list'))
+    assert 'next_available' not in response.data[0]
+
+
+@pytest.mark.django_db
+def test_refresh_stale_next_availability():
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    fresh: Room = Room.objects.create(name="Fresh", price_per_night=100.00, capacity=2)
+    RoomNextAvailability.objects.filter(room=room).update(next_start=day(-3))
+
+    out = StringIO()
+    call_command('refresh_next_availability', stdout=out)
+
+    assert 'Refreshed next availability of 1 rooms.' in out.getvalue()
+    assert next_available(room) == next_available(fresh) == dict.fromkeys(range(1, 8), day(0))
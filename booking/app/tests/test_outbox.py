@@ -0,0 +1,156 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, OutboxEvent, Room
+from app.outbox import FileSink, dispatch_batch, drain
+from conftest import day
+
+
+@pytest.fixture
+def room() -> Room:
+    return Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+
+
+@pytest.fixture
+def user() -> CustomUser:
+    return CustomUser.objects.create_user(email='testuser@example.com', password='12345')
+
+
+class Collector(BaseHTTPRequestHandler):
+    """Records POSTed batches, answering with the server's `status`."""
+
+    def do_POST(self):
+        self.server.batches.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def collector():
+    server = HTTPServer(('127.0.0.1', 0), Collector)
+    server.batches, server.status = [], 200
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+def test_events_written_with_booking_changes(room, user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    response = client.post(reverse('booking-list'), {
+        'room': room.id, 'start_date': day(1), 'end_date': day(3)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    client.post(reverse('booking-cancel', args=[response.data['booking_number']]))
+
+    events = list(OutboxEvent.objects.order_by('pk'))
+    assert [event.event_type for event in events] == ['booking.active', 'booking.cancelled']
+    assert events[0].payload == {
+        'booking_number': response.data['booking_number'], 'user_id': user.id,
+        'room_id': room.id, 'start_date': day(1).isoformat(), 'end_date': day(3).isoformat(),
+        'status': 'active'}
+
+    # a rolled back change leaves no event
+    with pytest.raises(RuntimeError), transaction.atomic():
+        Booking.objects.create(user=user, room=room, start_date=day(5), end_date=day(6))
+        raise RuntimeError
+    assert OutboxEvent.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_edited_booking_recorded_as_moved(room, user):
+    other: Room = Room.objects.create(name="Other", price_per_night=100.00, capacity=2)
+    booking: Booking = Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(3))
+    booking.room = other
+    booking.end_date = day(2)
+    booking.save()
+
+    event: OutboxEvent = OutboxEvent.objects.order_by('pk').last()
+    assert OutboxEvent.objects.count() == 2
+    assert event.event_type == 'booking.moved'
+    assert event.payload['room_id'] == other.id and event.payload['end_date'] == day(2).isoformat()
+    assert event.payload['previous'] == {
+        'room_id': room.id, 'start_date': day(1).isoformat(), 'end_date': day(3).isoformat()}
+
+
+@pytest.mark.django_db
+def test_dispatch_to_file_in_batches(room, user, tmp_path: Path):
+    bookings = [Booking.objects.create(user=user, room=room, start_date=day(n), end_date=day(n + 1))
+                for n in range(5)]
+    path: Path = tmp_path / 'events.jsonl'
+
+    stats = drain(FileSink(path), batch_size=2)
+    assert (stats.events, stats.batches) == (5, 3)
+    assert stats.lag(100) >= stats.lag(50) >= 0
+
+    lines: list[dict] = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line['booking_number'] for line in lines] == [str(b.booking_number) for b in bookings]
+    assert lines == sorted(lines, key=lambda line: line['id'])
+    assert not OutboxEvent.objects.filter(dispatched_at__isnull=True).exists()
+    assert drain(FileSink(path)).events == 0
+
+
+@pytest.mark.django_db
+def test_dispatch_to_http(room, user, collector):
+    Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(2))
+    url: str = f'http://127.0.0.1:{collector.server_port}/events'
+
+    collector.status = 500
+    with pytest.raises(CommandError):
+        call_command('dispatch_outbox', url)
+    assert OutboxEvent.objects.filter(dispatched_at__isnull=True).count() == 1
+
+    collector.status = 204
+    call_command('dispatch_outbox', url)
+    assert [len(batch) for batch in collector.batches] == [1, 1]
+    assert collector.batches[0] == collector.batches[1]
+    assert not OutboxEvent.objects.filter(dispatched_at__isnull=True).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_dispatchers_skip_locked_events(room, user, tmp_path: Path):
+    for n in range(4):
+        Booking.objects.create(user=user, room=room, start_date=day(n), end_date=day(n + 1))
+    locked, release = threading.Event(), threading.Event()
+
+    class BlockingSink(FileSink):
+        def send(self, events):
+            super().send(events)
+            locked.set()
+            release.wait(10)
+
+    def dispatch() -> None:
+        try:
+            dispatch_batch(BlockingSink(tmp_path / 'first.jsonl'), 2)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=dispatch)
+    thread.start()
+    try:
+        assert locked.wait(10)
+        # the first dispatcher's batch is locked, the second takes the next one
+        assert dispatch_batch(FileSink(tmp_path / 'second.jsonl'), 2) == 2
+        assert dispatch_batch(FileSink(tmp_path / 'second.jsonl'), 2) == 0
+    finally:
+        release.set()
+        thread.join()
+
+    first = [json.loads(line)['id'] for line in (tmp_path / 'first.jsonl').read_text().splitlines()]
+    second = [json.loads(line)['id'] for line in (tmp_path / 'second.jsonl').read_text().splitlines()]
+    assert len(first) == len(second) == 2 and set(first).isdisjoint(second)
+    assert not OutboxEvent.objects.filter(dispatched_at__isnull=True).exists()
@@ -0,0 +1,131 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Room, RoomRate
+from app.pricing import from_cents, quote_stays
+from app.serializers import RoomQuoteRequestSerializer
+
+# A Monday, so that weekday masks are easy to follow
+MONDAY = date(2030, 1, 7)
+
+
+@pytest.fixture
+def rooms() -> list[Room]:
+    return [
+        Room.objects.create(name="Single", price_per_night=100.00, capacity=1),
+        Room.objects.create(name="Double", price_per_night=150.00, capacity=2),
+        Room.objects.create(name="Suite", price_per_night=300.00, capacity=2),
+    ]
+
+
+def naive_total(room: Room, start_date: date, end_date: date) -> Decimal:
+    """Per-night reference implementation of the rate precedence."""
+    total = Decimal(0)
+    night = start_date
+    while night < end_date:
+        price = room.price_per_night
+        rates = [rate for rate in RoomRate.objects.all()
+                 if rate.start_date <= night < rate.end_date and rate.weekdays & (1 << night.weekday())
+                 and (rate.room_id == room.pk or (rate.room_id is None and rate.capacity in (None, room.capacity)))]
+        if rates:
+            price = max(rates, key=lambda rate: (
+                2 if rate.room_id else 1 if rate.capacity is not None else 0,
+                rate.priority, rate.pk)).price_per_night
+        total += Decimal(price)
+        night += timedelta(days=1)
+    return total
+
+
+@pytest.mark.django_db
+def test_quotes_apply_rate_precedence(rooms):
+    RoomRate.objects.create(start_date=MONDAY, end_date=MONDAY + timedelta(days=28),
+                            weekdays=RoomRate.WEEKEND, price_per_night=200.00)
+    RoomRate.objects.create(capacity=2, start_date=MONDAY + timedelta(days=3),
+                            end_date=MONDAY + timedelta(days=10), price_per_night=180.00)
+    RoomRate.objects.create(room=rooms[2], start_date=MONDAY, end_date=MONDAY + timedelta(days=5),
+                            price_per_night=250.00)
+    stays = [(MONDAY, MONDAY + timedelta(days=7)),
+             (MONDAY + timedelta(days=4), MONDAY + timedelta(days=6)),
+             (MONDAY + timedelta(days=20), MONDAY + timedelta(days=30))]
+
+    room_ids, totals = quote_stays(Room.objects.order_by('pk'), stays)
+
+    assert list(room_ids) == [room.pk for room in rooms]
+    for room, room_totals in zip(rooms, totals):
+        assert [from_cents(total) for total in room_totals] == [
+            naive_total(room, start_date, end_date) for start_date, end_date in stays]
+
+
+@pytest.mark.django_db
+def test_quote_endpoint(rooms):
+    client = APIClient()
+    RoomRate.objects.create(start_date=MONDAY, end_date=MONDAY + timedelta(days=7),
+                            weekdays=RoomRate.WEEKEND, price_per_night=120.00)
+
+    response = client.post(reverse('room-quote'), {
+        'rooms': [rooms[0].id],
+        'stays': [{'start_date': MONDAY + timedelta(days=3), 'end_date': MONDAY + timedelta(days=6)}]
+    }, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == [{
+        'room': rooms[0].id,
+        'quotes': [{'start_date': MONDAY + timedelta(days=3), 'end_date': MONDAY + timedelta(days=6),
+                    'total': '340.00'}]
+    }]
+
+
+@pytest.mark.django_db
+def test_quote_endpoint_rejects_invalid_stays(rooms):
+    client = APIClient()
+
+    response = client.post(reverse('room-quote'), {
+        'rooms': [rooms[0].id],
+        'stays': [{'start_date': MONDAY, 'end_date': MONDAY}]
+    }, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # rooms must be listed, and bound the days priced with the stays
+    response = client.post(reverse('room-quote'), {
+        'stays': [{'start_date': MONDAY, 'end_date': MONDAY + timedelta(days=1)}]
+    }, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'rooms' in response.data
+
+    response = client.post(reverse('room-quote'), {
+        'rooms': list(range(1, RoomQuoteRequestSerializer.MAX_ROOMS + 1)),
+        'stays': [{'start_date': MONDAY, 'end_date': MONDAY + timedelta(days=101)}]
+    }, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_quote_endpoint_reads_rooms_at_once(rooms):
+    client = APIClient()
+    stays: list[dict] = [{'start_date': MONDAY, 'end_date': MONDAY + timedelta(days=1)}]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(reverse('room-quote'), {
+            'rooms': [room.id for room in rooms], 'stays': stays}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert [quote['room'] for quote in response.data] == sorted(room.id for room in rooms)
+    # the rooms, then the rates
+    assert len(queries.captured_queries) == 2
+
+    response = client.post(reverse('room-quote'), {
+        'rooms': [rooms[0].id, 999999, 999998], 'stays': stays}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == {'rooms': ["Rooms 999998, 999999 do not exist."]}
+
+    response = client.post(reverse('room-quote'), {
+        'rooms': list(range(1, RoomQuoteRequestSerializer.MAX_ROOMS + 2)), 'stays': stays},
+        format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,103 @@
+import time
+from pathlib import Path
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.models import CustomUser, RequestProfile, Room
+from app.profiling import StackSampler
+
+
+@pytest.fixture
+def profile_dir(settings, tmp_path) -> Path:
+    settings.PROFILING = {**settings.PROFILING, 'DIR': tmp_path}
+    return tmp_path
+
+
+def jwt_client(user: CustomUser) -> APIClient:
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def busy_wait(seconds: float) -> None:
+    end: float = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stack_sampler_collapses_stacks():
+    with StackSampler(0.001) as sampler:
+        busy_wait(0.05)
+
+    assert sampler.stacks
+    stack, count = sampler.collapsed().splitlines()[0].rsplit(' ', 1)
+    assert stack.endswith('test_profiling.busy_wait')
+    assert int(count) > 0
+
+
+@pytest.mark.django_db
+def test_superuser_profiles_request_with_header(profile_dir):
+    """
+    Test that a superuser's JWT request with X-Profile writes the SQL log
+    and is listed under the URL name.
+    """
+    superuser: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='admin')
+    Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+
+    response = jwt_client(superuser).get(reverse('room-list'), HTTP_X_PROFILE='1')
+
+    assert response.status_code == status.HTTP_200_OK
+    profile: RequestProfile = RequestProfile.objects.get()
+    assert profile.url_name == 'room-list'
+    assert profile.trigger == 'header'
+    assert profile.status_code == 200
+    assert profile.query_count >= 1
+    assert Path(profile.stacks_file).parent == profile_dir
+    assert 'app_room' in Path(profile.sql_file).read_text()
+
+
+@pytest.mark.django_db
+def test_header_ignored_for_regular_user(profile_dir):
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+
+    jwt_client(user).get(reverse('room-list'), HTTP_X_PROFILE='1')
+    APIClient().get(reverse('room-list'), HTTP_X_PROFILE='1',
+                    HTTP_AUTHORIZATION='Bearer invalid')
+
+    assert not RequestProfile.objects.exists()
+    assert not any(profile_dir.iterdir())
+
+
+@pytest.mark.django_db
+def test_requests_sampled_at_rate(settings, profile_dir):
+    settings.PROFILING = {**settings.PROFILING, 'SAMPLE_RATE': 1}
+
+    APIClient().get(reverse('room-list'))
+
+    assert RequestProfile.objects.get().trigger == 'sample'
+
+
+@pytest.mark.django_db
+def test_admin_lists_profiles_and_serves_files(profile_dir, client: Client):
+    superuser: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='admin')
+    jwt_client(superuser).get(reverse('room-list'), HTTP_X_PROFILE='1')
+    profile: RequestProfile = RequestProfile.objects.get()
+    client.force_login(superuser)
+
+    response = client.get(reverse('admin:app_requestprofile_changelist'),
+                          {'url_name': 'room-list'})
+    assert response.status_code == status.HTTP_200_OK
+    assert profile.path in response.content.decode()
+
+    response = client.get(reverse('admin:app_requestprofile_file', args=[profile.pk, 'sql']))
+    assert response.status_code == status.HTTP_200_OK
+    assert b''.join(response.streaming_content) == Path(profile.sql_file).read_bytes()
@@ -0,0 +1,78 @@
+import logging
+import pytest
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room
+from app.querylog import NPlusOneError, QueryLog, normalize
+
+
+def test_normalize_replaces_literals_and_in_lists():
+    assert normalize('SELECT * FROM "app_room" WHERE "app_room"."id" IN (%s, %s,\n %s) '
+                     "AND name = 'It''s' LIMIT 21") == \
+        'SELECT * FROM "app_room" WHERE "app_room"."id" IN (...) AND name = ? LIMIT ?'
+
+
+@pytest.mark.django_db
+def test_query_log_reports_repeated_templates_with_call_site():
+    rooms = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2)
+             for i in range(10)]
+
+    with QueryLog() as log:
+        for room in rooms:
+            room.is_available(date.today(), date.today() + timedelta(days=1))
+
+    [repeated] = log.repeated(10)
+    assert repeated.count == 10
+    [(site, count)] = repeated.call_sites
+    assert site.startswith('app/models.py')
+    assert 'in is_available <- app/tests/test_querylog.py' in site
+    assert count == 10
+
+
+@pytest.mark.django_db
+def test_room_availability_filter_runs_one_query():
+    """
+    Test that filtering rooms by availability no longer runs a query per room.
+    """
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    rooms = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2)
+             for i in range(15)]
+    today = date.today()
+    Booking.objects.create(user=user, room=rooms[0], start_date=today,
+                           end_date=today + timedelta(days=2))
+    Booking.objects.create(user=user, room=rooms[1], start_date=today,
+                           end_date=today + timedelta(days=2), status='cancelled')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get(reverse('room-list'), {
+            'start_date': today + timedelta(days=1),
+            'end_date': today + timedelta(days=3)
+        })
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(queries) == 1
+    assert {room['id'] for room in response.data} == {room.id for room in rooms[1:]}
+
+
+@pytest.mark.django_db
+def test_middleware_raises_on_repeated_queries(settings):
+    settings.QUERY_LOG = {**settings.QUERY_LOG, 'N_PLUS_ONE_THRESHOLD': 1}
+
+    with pytest.raises(NPlusOneError, match='GET /app/rooms/'):
+        APIClient().get(reverse('room-list'))
+
+
+@pytest.mark.django_db
+def test_slow_queries_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger='app.querylog'), QueryLog(slow_query_ms=0):
+        Room.objects.count()
+
+    assert 'Slow query' in caplog.text
+    assert 'test_querylog.py' in caplog.text
@@ -0,0 +1,90 @@
+import io
+import pytest
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room
+from app.renderers import ORJSONParser, ORJSONRenderer
+from app.serializers import BookingSerializer, RoomSerializer
+
+
+@pytest.mark.django_db
+def test_orjson_renderer_matches_json_renderer_on_lists():
+    """
+    Test that room and booking lists render to the same bytes as JSONRenderer.
+    """
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    rooms = [Room.objects.create(name=f"Room «{i}»", price_per_night=Decimal('99.90') + i,
+                                 capacity=i % 4 + 1) for i in range(20)]
+    for i, room in enumerate(rooms):
+        Booking.objects.create(user=user, room=room, start_date=date.today() + timedelta(days=i),
+                               end_date=date.today() + timedelta(days=i + 2))
+
+    for data in (RoomSerializer(Room.objects.all(), many=True).data,
+                 BookingSerializer(Booking.objects.select_related('room'), many=True).data):
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_orjson_renderer_matches_json_renderer_on_python_types():
+    data = {
+        'uuid': uuid4(),
+        'decimal': Decimal('12.50'),
+        'date': date(2024, 2, 29),
+        'datetime': datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        'naive': datetime(2024, 1, 1, 12, 30),
+        'offset': datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=2))),
+        'time': time(8, 15),
+        'timedelta': timedelta(hours=1),
+        'lazy': gettext_lazy('This field is required.'),
+        'separators': 'line\u2028paragraph\u2029',
+        'unicode': 'Zürich 東京 😀',
+        'nested': [{1: (True, None, 0.5, -3)}],
+        'bytes': b'raw',
+    }
+
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert ORJSONRenderer().render(None) == b''
+    assert ORJSONRenderer().render(data, 'application/json; indent=4') == \
+        JSONRenderer().render(data, 'application/json; indent=4')
+
+
+def test_orjson_parser_matches_json_parser():
+    body = '{"room": 1, "name": "Zürich", "dates": ["2024-01-01"], "nested": {"a": null}}'
+
+    parsed = ORJSONParser().parse(io.BytesIO(body.encode()))
+
+    assert parsed == JSONParser().parse(io.BytesIO(body.encode()))
+    assert ORJSONParser().parse(io.BytesIO(body.encode('utf-16')),
+                                parser_context={'encoding': 'utf-16'}) == parsed
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(b'{"room": NaN}'))
+
+
+@pytest.mark.django_db
+def test_booking_number_rendered_as_string():
+    client = APIClient()
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client.force_authenticate(user=user)
+    room: Room = Room.objects.create(
+        name="Room", price_per_night=100.00, capacity=2)
+
+    response = client.post(reverse('booking-list'), {
+        'room': room.id,
+        'start_date': date.today(),
+        'end_date': date.today() + timedelta(days=1)
+    }, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()['booking_number'] == str(
+        Booking.objects.get().booking_number)
@@ -0,0 +1,147 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room, RoomDailyRollup, RoomRate
+
+
+@pytest.fixture
+def user() -> CustomUser:
+    return CustomUser.objects.create_user(email='testuser@example.com', password='12345')
+
+
+def occupied_nights(room: Room) -> list[date]:
+    return list(RoomDailyRollup.objects.filter(room=room, occupied=True)
+                .order_by('date').values_list('date', flat=True))
+
+
+@pytest.mark.django_db
+def test_rollups_follow_create_and_cancel(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    room: Room = Room.objects.create(
+        name="Room", price_per_night=120.00, capacity=2)
+    today = date.today()
+
+    response = client.post(reverse('booking-list'), {
+        'room': room.id,
+        'start_date': today,
+        'end_date': today + timedelta(days=2)
+    })
+    assert response.status_code == status.HTTP_201_CREATED
+    assert occupied_nights(room) == [today, today + timedelta(days=1)]
+    assert RoomDailyRollup.objects.get(room=room, date=today).revenue == Decimal('120.00')
+
+    client.post(reverse('booking-cancel', args=[response.data['booking_number']]))
+    assert occupied_nights(room) == []
+    assert RoomDailyRollup.objects.get(room=room, date=today).revenue == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_rollups(user):
+    room: Room = Room.objects.create(
+        name="Room", price_per_night=100.00, capacity=2)
+    today = date.today()
+    Booking.objects.create(user=user, room=room, start_date=today,
+                           end_date=today + timedelta(days=3))
+    Booking.objects.create(user=user, room=room, start_date=today + timedelta(days=5),
+                           end_date=today + timedelta(days=6), status='cancelled')
+    incremental: list[date] = occupied_nights(room)
+
+    RoomDailyRollup.objects.all().delete()
+    call_command('rebuild_rollups')
+
+    assert occupied_nights(room) == incremental
+
+
+@pytest.mark.django_db
+def test_occupancy_analytics(user):
+    client = APIClient()
+    rooms = [Room.objects.create(name=f"Room {i}", price_per_night=100.00, capacity=2)
+             for i in range(2)]
+    today = date.today()
+    Booking.objects.create(user=user, room=rooms[0], start_date=today,
+                           end_date=today + timedelta(days=2))
+    params = {'start_date': today, 'end_date': today + timedelta(days=4)}
+
+    client.force_authenticate(user=user)
+    response = client.get(reverse('occupancy-analytics'), params)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    superuser: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='admin')
+    client.force_authenticate(user=superuser)
+    response = client.get(reverse('occupancy-analytics'), params)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['room_nights'] == 8
+    assert response.data['occupied_nights'] == 2
+    assert response.data['occupancy_rate'] == 0.25
+    assert response.data['revenue'] == Decimal('200.00')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_room_deleted_with_bookings(user):
+    """
+    Test that deleting a room with bookings does not write rollups for it.
+    """
+    room: Room = Room.objects.create(
+        name="Room", price_per_night=120.00, capacity=2)
+    Booking.objects.create(user=user, room=room, start_date=date.today(),
+                           end_date=date.today() + timedelta(days=2))
+
+    room.delete()
+
+    assert not RoomDailyRollup.objects.exists()
+
+
+@pytest.mark.django_db
+def test_editing_a_booking_frees_its_old_nights(user):
+    rooms: list[Room] = [Room.objects.create(name=f"Room {n}", price_per_night=100.00, capacity=2)
+                         for n in range(2)]
+    today = date.today()
+    booking: Booking = Booking.objects.create(user=user, room=rooms[0], start_date=today,
+                                              end_date=today + timedelta(days=4))
+
+    booking = Booking.objects.get(pk=booking.pk)
+    booking.end_date = today + timedelta(days=1)
+    booking.save()
+    assert occupied_nights(rooms[0]) == [today]
+
+    booking.room = rooms[1]
+    booking.start_date = today + timedelta(days=2)
+    booking.end_date = today + timedelta(days=3)
+    booking.save()
+    assert occupied_nights(rooms[0]) == []
+    assert occupied_nights(rooms[1]) == [today + timedelta(days=2)]
+
+    # loaded without its dates, the stored range is read before the update
+    booking = Booking.objects.only('pk').get(pk=booking.pk)
+    booking.start_date = today + timedelta(days=5)
+    booking.end_date = today + timedelta(days=6)
+    booking.save()
+    assert occupied_nights(rooms[1]) == [today + timedelta(days=5)]
+
+
+@pytest.mark.django_db
+def test_rollup_revenue_applies_rates(user):
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    today = date.today()
+    RoomRate.objects.create(room=room, start_date=today + timedelta(days=1),
+                            end_date=today + timedelta(days=2), price_per_night=150.00)
+    Booking.objects.create(user=user, room=room, start_date=today,
+                           end_date=today + timedelta(days=3))
+
+    def revenue() -> list[Decimal]:
+        return list(RoomDailyRollup.objects.filter(room=room, occupied=True)
+                    .order_by('date').values_list('revenue', flat=True))
+
+    assert revenue() == [Decimal('100.00'), Decimal('150.00'), Decimal('100.00')]
+    RoomDailyRollup.objects.all().delete()
+    call_command('rebuild_rollups')
+    assert revenue() == [Decimal('100.00'), Decimal('150.00'), Decimal('100.00')]
@@ -0,0 +1,102 @@
+import pytest
+
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app import schema
+
+
+@pytest.fixture
+def precompiled(settings, tmp_path):
+    settings.PRECOMPILED_SCHEMA = True
+    settings.SCHEMA_ARTIFACT_DIR = tmp_path
+    schema._compiled.clear()
+    yield tmp_path
+    schema._compiled.clear()
+
+
+def test_schema_artifact_matches_code(precompiled):
+    """
+    Test that a freshly compiled artifact passes the check
+    and a stale one fails it.
+    """
+    call_command('compileschema')
+    call_command('compileschema', '--check')
+
+    (precompiled / 'openapi.yaml').write_text('openapi: 3.0.3\n')
+    with pytest.raises(CommandError):
+        call_command('compileschema', '--check')
+
+
+def test_built_schema_artifact_is_current():
+    """
+    Test that the artifact built in the configured directory, e.g. in a
+    mounted source tree, still matches the code it would be served for.
+    """
+    if not schema.artifact_path('yaml').exists():
+        pytest.skip("No schema artifact was built")
+    call_command('compileschema', '--check')
+
+
+def test_precompiled_schema_served_with_cache_headers(precompiled):
+    call_command('compileschema')
+    client = APIClient()
+
+    response = client.get(reverse('schema'))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == (precompiled / 'openapi.yaml').read_bytes()
+    assert 'max-age=86400' in response['Cache-Control']
+
+    response = client.get(reverse('schema'), HTTP_ACCEPT='application/vnd.oai.openapi+json')
+    assert response.content == (precompiled / 'openapi.json').read_bytes()
+
+    response = client.get(reverse('schema'), HTTP_ACCEPT='application/vnd.oai.openapi+json',
+                          HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_precompiled_schema_hashed_once(precompiled):
+    call_command('compileschema')
+    client = APIClient()
+
+    with mock.patch.object(schema, 'etag', wraps=schema.etag) as etag:
+        tags: set[str] = {client.get(reverse('schema'))['ETag'] for _ in range(3)}
+
+    assert len(tags) == 1
+    assert etag.call_count == 1
+
+
+def test_precompiled_schema_generated_once_without_artifact(precompiled):
+    """
+    Test that without an artifact the schema is generated in memory on first use.
+    """
+    client = APIClient()
+
+    response = client.get(reverse('schema'))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == schema.render_schema(schema.generate_schema())['yaml']
+    assert not (precompiled / 'openapi.yaml').exists()
+
+
+def test_precompiled_schema_not_served_for_lang_or_version(precompiled):
+    """
+    Test that requests for a language or version of the schema are introspected
+    rather than served the artifact built without them.
+    """
+    call_command('compileschema')
+    (precompiled / 'openapi.yaml').write_text('openapi: 3.0.3\n')
+    client = APIClient()
+
+    for query in ({'lang': 'de'}, {'version': 'v2'}):
+        response = client.get(reverse('schema'), query)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content != (precompiled / 'openapi.yaml').read_bytes()
+        assert 'max-age=86400' not in response.get('Cache-Control', '')
@@ -0,0 +1,214 @@
+import pytest
+from collections import Counter
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Hotel, OutboxEvent, Room, RoomDailyRollup
+from app.outbox import FileSink, drain
+from app.sharding import HashRing, fan_out, shard_aliases, shard_for_hotel
+from conftest import day
+
+# The shard tests need several databases: ROOM_SHARDS=shard0,shard1 pytest ...
+sharded = pytest.mark.skipif(len(settings.ROOM_SHARDS) < 2,
+                             reason="ROOM_SHARDS names a single database")
+all_databases = pytest.mark.django_db(transaction=True, databases='__all__')
+
+
+def test_hash_ring_spreads_hotels_and_moves_few_when_growing():
+    ring = HashRing(['shard0', 'shard1', 'shard2'])
+    placement: dict[int, str] = {hotel_id: ring.shard(hotel_id) for hotel_id in range(3000)}
+    assert min(Counter(placement.values()).values()) > 750
+    assert HashRing(['shard0', 'shard1', 'shard2']).shard(42) == placement[42]
+
+    grown = HashRing(['shard0', 'shard1', 'shard2', 'shard3'])
+    moved: list[int] = [hotel_id for hotel_id, alias in placement.items()
+                        if grown.shard(hotel_id) != alias]
+    # only the hotels taken over by the new shard move
+    assert {grown.shard(hotel_id) for hotel_id in moved} == {'shard3'}
+    assert 0.15 < len(moved) / len(placement) < 0.35
+
+
+@pytest.fixture
+def hotels() -> list[Hotel]:
+    """One hotel on each shard, in the order of ROOM_SHARDS."""
+    by_shard: dict[str, Hotel] = {}
+    while len(by_shard) < len(shard_aliases()):
+        hotel: Hotel = Hotel.objects.create(name=f"Hotel {len(by_shard)}")
+        by_shard.setdefault(shard_for_hotel(hotel.pk), hotel)
+    return [by_shard[alias] for alias in shard_aliases()]
+
+
+@pytest.fixture
+def guest() -> tuple[CustomUser, APIClient]:
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return user, client
+
+
+@sharded
+@all_databases
+def test_rooms_stored_on_their_hotel_shard(hotels, guest):
+    user, _ = guest
+    rooms: list[Room] = [Room.objects.create(hotel=hotel, name=f"Room {n}", price_per_night=100,
+                                             capacity=2)
+                         for n, hotel in enumerate(hotels * 2)]
+
+    assert len({room.pk for room in rooms}) == len(rooms)
+    for alias, hotel in zip(shard_aliases(), hotels):
+        assert set(Room.objects.using(alias).values_list('pk', flat=True)) == {
+            room.pk for room in rooms if room.hotel_id == hotel.pk}
+        # reference rows are copied, so foreign keys hold on each shard
+        assert CustomUser.objects.using(alias).filter(pk=user.pk).exists()
+        assert Hotel.objects.using(alias).filter(pk=hotel.pk).exists()
+
+
+@sharded
+@all_databases
+def test_room_search_merges_shards(hotels, guest):
+    _, client = guest
+    prices = [Decimal('80.00'), Decimal('120.00'), Decimal('95.00'), Decimal('150.00'),
+              Decimal('60.00'), Decimal('120.00')]
+    rooms: list[Room] = [Room.objects.create(hotel=hotels[n % len(hotels)], name=f"Room {n}",
+                                             price_per_night=price, capacity=2 + n % 2)
+                         for n, price in enumerate(prices)]
+    by_price: list[int] = [room.pk for room in sorted(rooms, key=lambda r: (-r.price_per_night, r.pk))]
+
+    response = client.get(reverse('room-list'), {'ordering': '-price_per_night'})
+    assert [room['id'] for room in response.data] == by_price
+
+    response = client.get(reverse('room-list'), {
+        'ordering': '-price_per_night', 'limit': 2, 'offset': 1, 'fields': 'id'})
+    assert response.data['count'] == len(rooms)
+    assert [room['id'] for room in response.data['results']] == by_price[1:3]
+
+    response = client.get(reverse('room-list'), {'capacity': 3, 'facets': 'true'})
+    assert [room['id'] for room in response.data['results']] == sorted(
+        room.pk for room in rooms if room.capacity >= 3)
+    # facet counts are summed over the shards
+    assert response.data['facets']['price'] == [
+        {'min': 100, 'max': 150, 'count': 2}, {'min': 150, 'max': 200, 'count': 1}]
+
+    booked: Room = rooms[1]
+    response = client.post(reverse('booking-list'), {
+        'room': booked.pk, 'start_date': day(1), 'end_date': day(3)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    response = client.get(reverse('room-list'), {'start_date': day(2), 'end_date': day(4)})
+    assert [room['id'] for room in response.data] == sorted(
+        room.pk for room in rooms if room != booked)
+
+
+@sharded
+@all_databases
+def test_bookings_written_and_read_on_the_room_shard(hotels, guest, tmp_path):
+    user, client = guest
+    rooms: list[Room] = [Room.objects.create(hotel=hotel, name=f"Room {n}", price_per_night=100,
+                                             capacity=2)
+                         for n, hotel in enumerate(hotels)]
+    booking_numbers: list[str] = []
+    for room in rooms:
+        response = client.post(reverse('booking-list'), {
+            'room': room.pk, 'start_date': day(1), 'end_date': day(2)}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        booking_numbers.append(response.data['booking_number'])
+
+    for alias, booking_number in zip(shard_aliases(), booking_numbers):
+        assert Booking.objects.using(alias).get().booking_number.hex == booking_number.replace('-', '')
+        assert OutboxEvent.objects.using(alias).get().event_type == 'booking.active'
+
+    response = client.get(reverse('booking-list'))
+    assert sorted(booking['booking_number'] for booking in response.data) == sorted(booking_numbers)
+
+    response = client.post(reverse('booking-cancel', args=[booking_numbers[-1]]))
+    assert response.status_code == status.HTTP_200_OK
+    assert Booking.objects.using(shard_aliases()[-1]).get().status == 'cancelled'
+    assert [booking['booking_number'] for booking in client.get(reverse('booking-list')).data] \
+        == booking_numbers[:-1]
+
+    stats = drain(FileSink(tmp_path / 'events.jsonl'))
+    assert stats.events == len(rooms) + 1
+
+
+@sharded
+@all_databases
+def test_default_only_features_refused_and_analytics_summed(hotels, tmp_path):
+    admin: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='12345')
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    rooms: list[Room] = [Room.objects.create(hotel=hotel, name=f"Room {n}", price_per_night=100,
+                                             capacity=2)
+                         for n, hotel in enumerate(hotels)]
+    for room in rooms:
+        Booking.objects.create(user=admin, room=room, start_date=day(1), end_date=day(3))
+
+    response = client.get(reverse('occupancy-analytics'), {'start_date': day(0), 'end_date': day(4)})
+    assert response.data['room_nights'] == 4 * len(rooms)
+    assert response.data['occupied_nights'] == 2 * len(rooms)
+    assert response.data['revenue'] == 200 * len(rooms)
+    response = client.get(reverse('occupancy-analytics'), {
+        'start_date': day(0), 'end_date': day(4), 'room': rooms[-1].pk})
+    assert response.data['occupied_nights'] == 2
+
+    assert client.get(reverse('waitlist')).status_code == status.HTTP_501_NOT_IMPLEMENTED
+    assert client.post(reverse('room-quote'), {
+        'rooms': [rooms[0].pk], 'stays': [{'start_date': day(1), 'end_date': day(2)}]},
+        format='json').status_code == status.HTTP_501_NOT_IMPLEMENTED
+    client.force_login(admin)
+    assert client.get('/admin/app/booking/').status_code == status.HTTP_403_FORBIDDEN
+
+    # users inserted in bulk are copied to the shards too
+    csv_file = tmp_path / 'users.csv'
+    csv_file.write_text('first@example.com,secret\n')
+    call_command('provision_users', str(csv_file), '--workers', '1', stdout=StringIO())
+    user: CustomUser = CustomUser.objects.get(email='first@example.com')
+    assert fan_out(lambda alias: CustomUser.objects.using(alias).filter(pk=user.pk).exists()) \
+        == [True] * len(hotels)
+
+
+@sharded
+@all_databases
+def test_bulk_cancel_by_room_on_any_shard(hotels, guest):
+    _, client = guest
+    rooms: list[Room] = [Room.objects.create(hotel=hotel, name=f"Room {n}", price_per_night=100,
+                                             capacity=2)
+                         for n, hotel in enumerate(hotels)]
+    for room in rooms:
+        response = client.post(reverse('booking-list'), {
+            'room': room.pk, 'start_date': day(1), 'end_date': day(2)}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+    admin: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='12345')
+    client.force_authenticate(user=admin)
+
+    response = client.post(reverse('booking-bulk-cancel'), {'room': rooms[-1].pk}, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['count'] == 1
+    assert Booking.objects.using(shard_aliases()[-1]).get().status == 'cancelled'
+    assert Booking.objects.using(shard_aliases()[0]).get().status == 'active'
+
+
+
+@sharded
+@all_databases
+def test_rollups_rebuilt_on_every_shard(hotels, guest):
+    user, _ = guest
+    for n, hotel in enumerate(hotels):
+        room: Room = Room.objects.create(hotel=hotel, name=f"Room {n}", price_per_night=100,
+                                         capacity=2)
+        Booking.objects.create(user=user, room=room, start_date=day(1), end_date=day(3))
+    for alias in shard_aliases():
+        RoomDailyRollup.objects.using(alias).all().delete()
+
+    call_command('rebuild_rollups', stdout=StringIO())
+
+    assert [RoomDailyRollup.objects.using(alias).filter(occupied=True).count()
+            for alias in shard_aliases()] == [2] * len(hotels)
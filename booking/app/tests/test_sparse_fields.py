@@ -0,0 +1,79 @@
+import pytest
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room
+
+
+@pytest.mark.django_db
+def test_room_list_sparse_fields():
+    client = APIClient()
+    room: Room = Room.objects.create(
+        name="Room A", price_per_night=100.00, capacity=2)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('room-list'), {
+                              'fields': 'id,price_per_night'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == [{'id': room.id, 'price_per_night': '100.00'}]
+    assert len(queries) == 1
+    assert '"name"' not in queries[0]['sql']
+    assert '"capacity"' not in queries[0]['sql']
+
+
+@pytest.mark.django_db
+def test_booking_list_sparse_fields_skip_room_join():
+    client = APIClient()
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client.force_authenticate(user=user)
+    room: Room = Room.objects.create(
+        name="Room A", price_per_night=100.00, capacity=2)
+    booking: Booking = Booking.objects.create(
+        user=user, room=room, start_date=date.today(), end_date=date.today() + timedelta(days=1))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('booking-list'), {
+                              'fields': 'booking_number,start_date,end_date'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == [{
+        'booking_number': str(booking.booking_number),
+        'start_date': str(booking.start_date),
+        'end_date': str(booking.end_date),
+    }]
+    assert len(queries) == 1
+    assert 'JOIN' not in queries[0]['sql']
+    assert '"status"' not in queries[0]['sql'].split('WHERE')[0]
+
+
+@pytest.mark.django_db
+def test_booking_list_joins_room_detail():
+    """
+    Test that the nested room is loaded with the bookings in one query.
+    """
+    client = APIClient()
+    user: CustomUser = CustomUser.objects.create_user(
+        email='testuser@example.com', password='12345')
+    client.force_authenticate(user=user)
+    for i in range(3):
+        room: Room = Room.objects.create(
+            name=f"Room {i}", price_per_night=100.00, capacity=2)
+        Booking.objects.create(user=user, room=room, start_date=date.today(),
+                               end_date=date.today() + timedelta(days=1))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('booking-list'), {
+                              'fields': 'booking_number,room_detail'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 3
+    assert set(response.data[0]) == {'booking_number', 'room_detail'}
+    assert response.data[0]['room_detail']['name'].startswith('Room')
+    assert len(queries) == 1
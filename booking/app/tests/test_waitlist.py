@@ -0,0 +1,132 @@
+import pytest
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.models import Booking, CustomUser, Room, WaitlistEntry
+from app.signals import waitlist_matched
+from conftest import day
+
+
+@pytest.fixture
+def guest() -> CustomUser:
+    return CustomUser.objects.create_user(email='guest@example.com', password='12345')
+
+
+@pytest.fixture
+def waiting() -> CustomUser:
+    return CustomUser.objects.create_user(email='waiting@example.com', password='12345')
+
+
+def cancel(booking: Booking) -> None:
+    client = APIClient()
+    client.force_authenticate(user=booking.user)
+    response = client.post(reverse('booking-cancel', args=[booking.booking_number]))
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_cancellation_books_waiting_entries_in_free_interval(guest, waiting):
+    """
+    Test that entries fitting in the freed interval are booked first come,
+    first served, and entries overlapping other bookings keep waiting.
+    """
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    Booking.objects.create(user=guest, room=room, start_date=day(1), end_date=day(3))
+    cancelled: Booking = Booking.objects.create(
+        user=guest, room=room, start_date=day(3), end_date=day(6))
+    Booking.objects.create(user=guest, room=room, start_date=day(8), end_date=day(9))
+
+    first = WaitlistEntry.objects.create(user=waiting, room=room, start_date=day(4), end_date=day(8))
+    overlapping = WaitlistEntry.objects.create(
+        user=waiting, room=room, start_date=day(5), end_date=day(7))
+    too_early = WaitlistEntry.objects.create(
+        user=waiting, room=room, start_date=day(2), end_date=day(4))
+    by_capacity = WaitlistEntry.objects.create(
+        user=waiting, capacity=2, max_price=120, start_date=day(3), end_date=day(4))
+    too_large = WaitlistEntry.objects.create(
+        user=waiting, capacity=3, start_date=day(3), end_date=day(4))
+
+    cancel(cancelled)
+
+    for entry in (first, overlapping, too_early, by_capacity, too_large):
+        entry.refresh_from_db()
+    assert first.status == 'booked'
+    assert (first.booking.room, first.booking.start_date, first.booking.end_date,
+            first.booking.user) == (room, day(4), day(8), waiting)
+    assert by_capacity.status == 'booked'
+    assert by_capacity.booking.room == room
+    assert overlapping.status == too_early.status == too_large.status == 'waiting'
+
+
+@pytest.mark.django_db
+def test_entries_without_auto_book_are_notified(guest, waiting):
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    booking: Booking = Booking.objects.create(
+        user=guest, room=room, start_date=day(1), end_date=day(3))
+    entry = WaitlistEntry.objects.create(
+        user=waiting, room=room, start_date=day(1), end_date=day(2), auto_book=False)
+    received = []
+
+    def listener(sender, entries, **kwargs):
+        received.extend(entries)
+
+    waitlist_matched.connect(listener)
+    try:
+        cancel(booking)
+    finally:
+        waitlist_matched.disconnect(listener)
+
+    entry.refresh_from_db()
+    assert entry.status == 'notified'
+    assert entry.booking is None
+    assert received == [entry]
+    assert not Booking.objects.filter(user=waiting).exists()
+
+
+@pytest.mark.django_db
+def test_bulk_cancel_frees_adjacent_ranges(guest, waiting):
+    superuser: CustomUser = CustomUser.objects.create_superuser(
+        email='admin@example.com', password='admin')
+    client = APIClient()
+    client.force_authenticate(user=superuser)
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+    for start in (1, 3):
+        Booking.objects.create(user=guest, room=room, start_date=day(start),
+                               end_date=day(start + 2))
+    entry = WaitlistEntry.objects.create(user=waiting, room=room, start_date=day(2), end_date=day(5))
+
+    client.post(reverse('booking-bulk-cancel'), {'room': room.id}, format='json')
+
+    entry.refresh_from_db()
+    assert entry.status == 'booked'
+
+
+@pytest.mark.django_db
+def test_join_and_leave_waitlist(waiting):
+    client = APIClient()
+    client.force_authenticate(user=waiting)
+    room: Room = Room.objects.create(name="Room", price_per_night=100.00, capacity=2)
+
+    response = client.post(reverse('waitlist'), {
+        'room': room.id, 'start_date': day(1), 'end_date': day(2)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['status'] == 'waiting'
+
+    response = client.post(reverse('waitlist'), {
+        'capacity': 2, 'start_date': day(2), 'end_date': day(1)}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get(reverse('waitlist'))
+    assert [entry['room'] for entry in response.data] == [room.id]
+
+    entry_id: int = response.data[0]['id']
+    other = APIClient()
+    other.force_authenticate(user=CustomUser.objects.create_user(
+        email='other@example.com', password='12345'))
+    assert other.delete(reverse('waitlist-entry', args=[entry_id])).status_code == \
+        status.HTTP_404_NOT_FOUND
+    assert client.delete(reverse('waitlist-entry', args=[entry_id])).status_code == \
+        status.HTTP_204_NO_CONTENT
+    assert not WaitlistEntry.objects.exists()
@@ -0,0 +1,19 @@
+import pytest
+
+from django.db import connection
+
+from app import schema
+from booking.warmup import warm_up
+
+
+@pytest.mark.django_db
+def test_warm_up_records_phase_timings(settings, tmp_path):
+    settings.PRECOMPILED_SCHEMA = True
+    settings.SCHEMA_ARTIFACT_DIR = tmp_path
+
+    timings = warm_up(close_connections=False)
+
+    assert set(timings) == {'resolve_urls', 'prime_connections', 'load_schema'}
+    assert all(ms >= 0 for ms in timings.values())
+    assert connection.connection is not None
+    schema._compiled.clear()
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import SimpleRouter
-from .views import BookingView, RoomListView, CreateUserView, ProtectedView
+from .views import (BookingView, RoomListView, CreateUserView, ProtectedView,
+                    AdmissionStatsView, OccupancyAnalyticsView, RoomQuoteView,
+                    WaitlistView, WaitlistEntryView, RoomCombinationView)
 
 router = SimpleRouter()
 # router.register(r'bookings', BookingView, basename='booking')
@@ -19,13 +21,24 @@ booking_detail = BookingView.as_view({
 booking_cancel = BookingView.as_view({
     'post': 'cancel'
 })
+booking_bulk_cancel = BookingView.as_view({
+    'post': 'bulk_cancel'
+})
 
 urlpatterns = [
     path('bookings/', booking_list, name='booking-list'),
+    path('bookings/cancel/', booking_bulk_cancel, name='booking-bulk-cancel'),
     path('bookings/<uuid:pk>/', booking_detail, name='booking-detail'),
     path('bookings/<uuid:pk>/cancel/', booking_cancel, name='booking-cancel'),
     path('rooms/', RoomListView.as_view(), name='room-list'),
+    path('rooms/quote/', RoomQuoteView.as_view(), name='room-quote'),
+    path('rooms/combinations/', RoomCombinationView.as_view(), name='room-combinations'),
+    path('waitlist/', WaitlistView.as_view(), name='waitlist'),
+    path('waitlist/<int:pk>/', WaitlistEntryView.as_view(), name='waitlist-entry'),
     path('register/', CreateUserView.as_view(), name='register'),
+    path('admission/', AdmissionStatsView.as_view(), name='admission-stats'),
+    path('analytics/occupancy/', OccupancyAnalyticsView.as_view(),
+         name='occupancy-analytics'),
     # TODO clean up test views
     path('protected/', ProtectedView.as_view(), name='protected'),
     path('', include(router.urls)),
@@ -1,26 +1,142 @@
-from uuid import UUID
+import heapq
+from collections import Counter
+from typing import Optional
 from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
 # from django.contrib.auth.models import User
-from django.shortcuts import get_object_or_404
-from django.db.models import QuerySet
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.db import transaction
+from django.db.models import F, Model, QuerySet, Count, Q, Sum
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAuthenticated
 from rest_framework import viewsets, generics, status, views
 from rest_framework.response import Response
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.request import Request
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.views import APIView
+from rest_framework.serializers import BaseSerializer
 
-from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
+from drf_spectacular.utils import (extend_schema, extend_schema_view, OpenApiParameter,
+                                   OpenApiTypes, OpenApiExample)
 
-from .models import Booking, Room, CustomUser
-from .serializers import RoomSerializer, BookingSerializer, UserSerializer
+from .models import Booking, Room, RoomType, CustomUser, RoomDailyRollup, WaitlistEntry
+from .serializers import (RoomSerializer, BookingSerializer, UserSerializer,
+                          BookingBulkCancelSerializer, OccupancyQuerySerializer,
+                          RoomQuoteRequestSerializer, WaitlistEntrySerializer,
+                          RoomCombinationQuerySerializer)
 from .schema_serializers import (UserCreatedResponseSerializer,
                                  BookingCreateRequestSerializer,
                                  BookingCancelResponseSerializer,
-                                 BookingFailedCreateResponseSerializer)
+                                 BookingBulkCancelResponseSerializer,
+                                 BookingFailedCreateResponseSerializer,
+                                 OccupancyResponseSerializer,
+                                 RoomQuoteResponseSerializer,
+                                 RoomCombinationSerializer)
+from .signals import BookingChange, notify_bookings_changed
+from .admission import BookingCreateThrottle, get_admission
+from .pricing import from_cents, quote_stays
+from .idempotency import IDEMPOTENCY_HEADER, idempotent
+from .assignment import best_fit_room
+from .combinations import Combination, room_combinations
+from .next_availability import MAX_NIGHTS
+from .bitmap import AvailabilityBitmap, get_bitmap
+from .booking_cache import booking_list_key
+from .catalog import ORDERINGS, RoomCatalog, get_catalog
+from .sharding import fan_out, is_sharded, locate, shard_aliases, use_shard
+from .facets import count_catalog_rooms, count_rooms, facets
 
 
-class BookingView(viewsets.ModelViewSet):
+FIELDS_PARAMETER = OpenApiParameter(
+    "fields", OpenApiTypes.STR, OpenApiParameter.QUERY,
+    description="Comma-separated list of the fields to return")
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    IDEMPOTENCY_HEADER, OpenApiTypes.STR, OpenApiParameter.HEADER,
+    description="Unique key of the operation; retries with the same key replay the first response")
+
+
+class ShardedUnsupported(APIException):
+    """
+    Raised by views that read the `default` database only while rooms are sharded.
+    """
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = 'Not available while rooms are sharded.'
+    default_code = 'sharded'
+
+
+class UnshardedOnlyMixin:
+    """
+    Refuse requests to a view that reads rooms from `default` only, when
+    they are stored on several shards.
+    """
+
+    def initial(self, request: Request, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        if is_sharded():
+            raise ShardedUnsupported()
+
+
+class SparseFieldsetViewMixin:
+    """
+    Support `?fields=` on read requests: the serializer only outputs the
+    requested fields, and the queryset only loads their columns and joins
+    the relations of the nested serializers that are still requested.
+    """
+
+    def get_requested_fields(self) -> Optional[list[str]]:
+        """Return the field names requested with `?fields=`, if any."""
+        if self.request.method not in ('GET', 'HEAD'):
+            return None
+        fields: str = self.request.query_params.get('fields', '')
+        return [name.strip() for name in fields.split(',') if name.strip()] or None
+
+    def get_serializer_context(self) -> dict:
+        context: dict = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
+    def sparse_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Narrow the queryset to the columns and joins of the serialized fields.
+
+        Args:
+            queryset (QuerySet): queryset to narrow
+
+        Returns:
+            QuerySet: queryset loading only what the serializer outputs
+        """
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        columns: list[str] = ['pk']
+        narrowable: bool = self.get_requested_fields() is not None
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, BaseSerializer):
+                queryset = queryset.select_related(field.source)
+                columns += [f'{field.source}__{nested.source}'
+                            for nested in field.fields.values() if not nested.write_only
+                            and self.is_model_field(field.Meta.model, nested.source)]
+            elif self.is_model_field(queryset.model, field.source):
+                columns.append(field.source)
+            else:
+                # computed field, the columns it reads are unknown
+                narrowable = False
+        return queryset.only(*columns) if narrowable else queryset
+
+    @staticmethod
+    def is_model_field(model: type[Model], name: str) -> bool:
+        return any(field.name == name and field.concrete
+                   for field in model._meta.get_fields())
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=[FIELDS_PARAMETER]),
+    retrieve=extend_schema(parameters=[FIELDS_PARAMETER]),
+)
+class BookingView(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     API view to create a new booking and list bookings of the authenticated user.
     """
@@ -43,10 +159,21 @@ class BookingView(viewsets.ModelViewSet):
         # We return 404 if a user tries to access someone else's booking
         # to avoid revealing unnecessary info about the booking's existence
         # following the principle of least privilege here :)
-        obj: Booking = get_object_or_404(queryset, **filter_kwargs)
+        try:
+            obj: Booking = locate(queryset, **filter_kwargs)
+        except Booking.DoesNotExist:
+            raise Http404
         self.check_object_permissions(self.request, obj)
         return obj
 
+    def get_throttles(self):
+        """
+        Apply the admission control throttle to booking creation only.
+        """
+        if self.action == 'create':
+            return [BookingCreateThrottle()]
+        return super().get_throttles()
+
     def get_queryset(self) -> QuerySet:
         """Return only user's own bookings.
 
@@ -54,8 +181,33 @@ class BookingView(viewsets.ModelViewSet):
             QuerySet: user's bookings
         """
         if self.request.user.is_superuser:
-            return Booking.objects.all()
-        return Booking.objects.filter(user=self.request.user, status="active")
+            queryset: QuerySet = Booking.objects.all()
+        else:
+            queryset = Booking.objects.filter(
+                user=self.request.user, status="active")
+        return self.sparse_queryset(queryset)
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """
+        List the bookings. The active bookings of regular users are served
+        from a per-user cache, invalidated whenever they change, if the
+        cache is shared by all workers.
+        """
+        if request.user.is_superuser or not settings.SHARED_CACHE:
+            return Response(self.get_serializer(self.list_bookings(), many=True).data)
+        cache_key: str = booking_list_key(request.user.pk, self.get_requested_fields())
+        payload: Optional[list] = cache.get(cache_key)
+        if payload is None:
+            serializer = self.get_serializer(self.list_bookings(), many=True)
+            payload = list(serializer.data)
+            cache.set(cache_key, payload, settings.BOOKING_LIST_CACHE_TTL)
+        return Response(payload)
+
+    def list_bookings(self) -> 'list[Booking]':
+        """Return the bookings to list, read from every shard in parallel."""
+        queryset: QuerySet = self.filter_queryset(self.get_queryset())
+        return [booking for bookings in fan_out(lambda alias: list(queryset.using(alias)))
+                for booking in bookings]
 
     @extend_schema(
         request=BookingCreateRequestSerializer,
@@ -68,7 +220,8 @@ class BookingView(viewsets.ModelViewSet):
                 required=True,
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.HEADER
-            )
+            ),
+            IDEMPOTENCY_KEY_PARAMETER
         ],
         examples=[
             OpenApiExample(
@@ -92,35 +245,50 @@ class BookingView(viewsets.ModelViewSet):
             )
         ]
     )
+    @idempotent
     def create(self, request, *args, **kwargs) -> Response:
         """
         Create a booking if the room is available.
+        Rejected with 503 when too many bookings are already being created.
+        Retries with the same `Idempotency-Key` replay the first response.
         """
-        serializer: BookingSerializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        with get_admission().slot():
+            serializer: BookingSerializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
 
-        # Get the room_id directly from the request data
-        room_id: str = request.data.get('room')
-        start_date: date = serializer.validated_data.get('start_date')
-        end_date: date = serializer.validated_data.get('end_date')
+            start_date: date = serializer.validated_data.get('start_date')
+            end_date: date = serializer.validated_data.get('end_date')
+            room_type: Optional[RoomType] = serializer.validated_data.get('room_type')
 
-        try:
-            room: Room = Room.objects.get(pk=room_id)
-        except Exception as exc:
-            return Response({"error": "Room not found."}, status=status.HTTP_400_BAD_REQUEST)
+            if start_date < end_date and start_date >= date.today():
+                if 'room' in serializer.validated_data:
+                    room: Optional[Room] = serializer.validated_data['room']
+                    with use_shard(room._state.db):
+                        available: bool = room.is_available(start_date, end_date)
+                    # a booking of a specific room is never moved by type
+                    room_type = None
+                else:
+                    # the first shard with a free room of the type
+                    room = next(filter(None, fan_out(
+                        lambda alias: best_fit_room(room_type, start_date, end_date))), None)
+                    available = room is not None
+            else:
+                available = False
 
-        if start_date < end_date and start_date >= date.today() and room.is_available(start_date, end_date):
-            serializer.save(user=self.request.user)
-            headers = self.get_success_headers(serializer.data)
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-        return Response({"error": "Room is not available for the selected dates."}, status=status.HTTP_400_BAD_REQUEST)
+            if available:
+                # the booking and its outbox event commit together, on the room's shard
+                with use_shard(room._state.db), transaction.atomic(using=room._state.db):
+                    serializer.save(user=self.request.user, room=room, room_type=room_type)
+                headers = self.get_success_headers(serializer.data)
+                return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+            return Response({"error": "Room is not available for the selected dates."}, status=status.HTTP_400_BAD_REQUEST)
 
     @extend_schema(
         responses={
             200: BookingCancelResponseSerializer,
             404: OpenApiTypes.OBJECT
         },
-        parameters=[],
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         examples=[
             OpenApiExample(
                 'Booking Cancelled Example',
@@ -139,25 +307,75 @@ class BookingView(viewsets.ModelViewSet):
         ]
     )
     @action(detail=True, methods=['post'])
+    @idempotent
     def cancel(self, request: Request, pk=None) -> Response:
         """
         Cancel a booking.
+        Retries with the same `Idempotency-Key` replay the first response.
         """
         booking: Booking = self.get_object()
         if request.user == booking.user or request.user.is_superuser:
             booking.status = 'cancelled'
-            booking.save()
+            with transaction.atomic(using=booking._state.db):
+                booking.save()
             return Response({'status': 'booking cancelled'}, status=status.HTTP_200_OK)
 
         return Response({'status': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
 
+    @extend_schema(
+        operation_id='app_bookings_bulk_cancel',
+        request=BookingBulkCancelSerializer,
+        responses={
+            200: BookingBulkCancelResponseSerializer,
+            400: OpenApiTypes.OBJECT,
+            403: OpenApiTypes.OBJECT
+        },
+        examples=[
+            OpenApiExample(
+                'Bulk Cancel Example',
+                summary='Cancel every active booking of a room in a date range',
+                request_only=True,
+                value={
+                    'room': 1,
+                    'start_date': '2023-01-01',
+                    'end_date': '2023-01-10'
+                }
+            )
+        ]
+    )
+    @action(detail=False, methods=['post'], url_path='cancel')
+    def bulk_cancel(self, request: Request) -> Response:
+        """
+        Cancel all active bookings matching the given filters at once.
+        Only available to superusers.
+        """
+        if not request.user.is_superuser:
+            return Response({'status': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BookingBulkCancelSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cancelled: list[tuple] = []
+        for alias in shard_aliases():
+            with use_shard(alias), transaction.atomic(using=alias):
+                rows: list[tuple] = serializer.get_queryset().cancel()
+                notify_bookings_changed(
+                    [BookingChange(*row, status="cancelled") for row in rows])
+            cancelled += rows
+
+        booking_numbers: list[str] = [str(row[0]) for row in cancelled]
+        return Response({'cancelled': booking_numbers, 'count': len(booking_numbers)},
+                        status=status.HTTP_200_OK)
+
 
-class RoomListView(generics.ListAPIView):
+class RoomListView(SparseFieldsetViewMixin, generics.ListAPIView):
     """
     API view to list and filter rooms based on price, capacity, and availability.
     """
     serializer_class = RoomSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # pages only with ?limit=, as before
+    pagination_class = LimitOffsetPagination
 
     @extend_schema(
         parameters=[
@@ -170,7 +388,21 @@ class RoomListView(generics.ListAPIView):
             OpenApiParameter("start_date", OpenApiTypes.DATE,
                              OpenApiParameter.QUERY),
             OpenApiParameter("end_date", OpenApiTypes.DATE,
-                             OpenApiParameter.QUERY)
+                             OpenApiParameter.QUERY),
+            OpenApiParameter("stay_nights", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                             description="Order rooms by the first date they are free for "
+                                         f"this many nights (1 to {MAX_NIGHTS})"),
+            OpenApiParameter("free_by", OpenApiTypes.DATE, OpenApiParameter.QUERY,
+                             description="With stay_nights, only rooms free for the stay "
+                                         "starting on or before this date"),
+            OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             enum=[f'{sign}{name}' for name in ORDERINGS for sign in ('', '-')],
+                             description="Sort rooms, unless ordered by stay_nights"),
+            OpenApiParameter("facets", OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                             description="Also return the price buckets and capacity counts "
+                                         "of all matching rooms, under `facets`, with the "
+                                         "rooms under `results`"),
+            FIELDS_PARAMETER
         ],
         responses={200: RoomSerializer(many=True)}
     )
@@ -183,12 +415,11 @@ class RoomListView(generics.ListAPIView):
         Returns:
             QuerySet: rooms filtered as requested
         """
-        queryset: QuerySet = Room.objects.all()
+        queryset: QuerySet = self.sparse_queryset(Room.objects.all())
         min_price: float = self.request.query_params.get('min_price')
         max_price: float = self.request.query_params.get('max_price')
         desired_capacity: int = self.request.query_params.get('capacity')
-        start_date_str: str = self.request.query_params.get('start_date')
-        end_date_str: str = self.request.query_params.get('end_date')
+        ordering: Optional[str] = self.request.query_params.get('ordering')
 
         if min_price is not None:
             queryset = queryset.filter(price_per_night__gte=min_price)
@@ -196,19 +427,382 @@ class RoomListView(generics.ListAPIView):
             queryset = queryset.filter(price_per_night__lte=max_price)
         if desired_capacity is not None:
             queryset = queryset.filter(capacity__gte=desired_capacity)
+        if ordering and ordering.lstrip('-') in ORDERINGS:
+            queryset = queryset.order_by(ordering, 'pk')
+        else:
+            queryset = queryset.order_by('pk')
 
         try:
-            start_date = datetime.strptime(
-                start_date_str, '%Y-%m-%d').date() if start_date_str else None
-            end_date = datetime.strptime(
-                end_date_str, '%Y-%m-%d').date() if end_date_str else None
+            start_date, end_date = self.requested_dates()
         except ValueError:
             return queryset
 
         if start_date and end_date:
-            queryset = [room for room in queryset if room.is_available(
-                start_date, end_date)]
-        return queryset
+            bitmap: Optional[AvailabilityBitmap] = get_bitmap()
+            busy: Optional[np.ndarray] = bitmap.busy_rooms(start_date, end_date) if bitmap else None
+            if busy is not None:
+                queryset = queryset.with_ids(busy.tolist(), include=False)
+            else:
+                queryset = queryset.available(start_date, end_date)
+        return self.filter_next_available(queryset)
+
+    def requested_dates(self) -> tuple[Optional[date], Optional[date]]:
+        """Parse `start_date` and `end_date`, raising ValueError if malformed."""
+        start_date_str: str = self.request.query_params.get('start_date')
+        end_date_str: str = self.request.query_params.get('end_date')
+        start_date = datetime.strptime(
+            start_date_str, '%Y-%m-%d').date() if start_date_str else None
+        end_date = datetime.strptime(
+            end_date_str, '%Y-%m-%d').date() if end_date_str else None
+        return start_date, end_date
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """
+        List rooms. With the room catalog enabled, price and capacity
+        filters and sorts run in memory, and only the rooms of the
+        requested page are loaded from the database. With sharded rooms,
+        every shard is searched in parallel. With `?facets=true`, the
+        response also holds the facets of every matching room.
+        """
+        with_facets: bool = request.query_params.get('facets') == 'true'
+        counts: Optional[Counter] = None
+        if is_sharded():
+            response, counts = self.list_shards(request, with_facets)
+        else:
+            catalog: Optional[RoomCatalog] = get_catalog()
+            room_ids: Optional[np.ndarray] = self.catalog_room_ids(catalog)
+            if room_ids is None:
+                response = super().list(request, *args, **kwargs)
+                if with_facets:
+                    counts = count_rooms(self.filter_queryset(self.get_queryset()))
+            else:
+                response = self.list_catalog(room_ids)
+                if with_facets:
+                    counts = count_catalog_rooms(catalog, room_ids)
+
+        if counts is not None:
+            # an unpaginated list becomes the results next to the facets
+            data: dict = response.data if isinstance(response.data, dict) else {
+                'results': response.data}
+            response.data = {**data, 'facets': facets(counts)}
+        return response
+
+    def list_catalog(self, room_ids: np.ndarray) -> Response:
+        """List the rooms selected from the catalog, loading only the requested page."""
+        page: Optional[list] = self.paginate_queryset(room_ids)
+        page_ids: list[int] = room_ids.tolist() if page is None else [int(pk) for pk in page]
+        rooms: dict[int, Room] = self.sparse_queryset(Room.objects.with_ids(page_ids)).in_bulk()
+        serializer = self.get_serializer(
+            [rooms[pk] for pk in page_ids if pk in rooms], many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    def list_shards(self, request: Request, with_facets: bool) -> tuple[Response, Optional[Counter]]:
+        """
+        Search every shard in parallel for the rooms up to the end of the
+        requested page, and merge them in the requested order. Returns the
+        response and, if requested, the facet counts summed over the shards.
+        """
+        filtered: QuerySet = self.filter_queryset(self.get_queryset())
+        # sort keys are annotated, so they are loaded with sparse fields too
+        order_by: list[str] = list(filtered.query.order_by)
+        queryset: QuerySet = filtered.annotate(**{f'merge_key_{n}': F(name.lstrip('-'))
+                                        for n, name in enumerate(order_by)})
+        limit: Optional[int] = self.paginator.get_limit(request)
+        offset: int = self.paginator.get_offset(request) if limit is not None else 0
+
+        def search(alias: str) -> tuple[list[Room], int, Optional[Counter]]:
+            rooms: QuerySet = queryset.using(alias)
+            counts: Optional[Counter] = count_rooms(filtered.using(alias)) if with_facets else None
+            if limit is None:
+                found: list[Room] = list(rooms)
+                return found, len(found), counts
+            return list(rooms[:offset + limit]), rooms.count(), counts
+
+        def merge_key(room: Room) -> tuple:
+            return tuple(-getattr(room, f'merge_key_{n}') if name.startswith('-')
+                         else getattr(room, f'merge_key_{n}') for n, name in enumerate(order_by))
+
+        results: list[tuple[list[Room], int, Optional[Counter]]] = fan_out(search)
+        rooms: list[Room] = list(heapq.merge(*(found for found, _, _ in results), key=merge_key))
+        counts: Optional[Counter] = None
+        if with_facets:
+            counts = sum((shard_counts for _, _, shard_counts in results), Counter())
+        if limit is None:
+            return Response(self.get_serializer(rooms, many=True).data), counts
+        # the page LimitOffsetPagination.paginate_queryset would have set
+        self.paginator.count = sum(count for _, count, _ in results)
+        self.paginator.limit, self.paginator.offset, self.paginator.request = limit, offset, request
+        return self.get_paginated_response(
+            self.get_serializer(rooms[offset:offset + limit], many=True).data), counts
+
+    def catalog_room_ids(self, catalog: Optional[RoomCatalog]) -> Optional[np.ndarray]:
+        """Select and sort the requested rooms with the room catalog.
+
+        Args:
+            catalog (RoomCatalog, optional): the room catalog, if enabled
+
+        Returns:
+            np.ndarray: ids of the rooms to list, or None when the catalog is
+            disabled or can't answer: ordering by next availability,
+            malformed parameters, or dates beyond the availability bitmap
+        """
+        params = self.request.query_params
+        if catalog is None or 'stay_nights' in params:
+            return None
+        try:
+            min_price: Optional[Decimal] = Decimal(params['min_price']) if 'min_price' in params else None
+            max_price: Optional[Decimal] = Decimal(params['max_price']) if 'max_price' in params else None
+            capacity: Optional[int] = int(params['capacity']) if 'capacity' in params else None
+            start_date, end_date = self.requested_dates()
+        except (ValueError, ArithmeticError):
+            return None
+
+        busy: Optional[np.ndarray] = None
+        if start_date and end_date:
+            bitmap: Optional[AvailabilityBitmap] = get_bitmap()
+            busy = bitmap.busy_rooms(start_date, end_date) if bitmap else None
+            if busy is None:
+                return None
+        ordering: Optional[str] = params.get('ordering')
+        return catalog.select(min_price, max_price, capacity, busy,
+                              ordering if ordering and ordering.lstrip('-') in ORDERINGS else None)
+
+    def filter_next_available(self, queryset: QuerySet) -> QuerySet:
+        """Order rooms by how soon they are free for `stay_nights` nights,
+        and keep those free by `free_by`, from RoomNextAvailability.
+
+        Args:
+            queryset (QuerySet): rooms to order
+
+        Returns:
+            QuerySet: rooms annotated with `next_available`, soonest first
+        """
+        try:
+            nights: int = int(self.request.query_params.get('stay_nights', ''))
+            free_by_str: str = self.request.query_params.get('free_by')
+            free_by: Optional[date] = datetime.strptime(
+                free_by_str, '%Y-%m-%d').date() if free_by_str else None
+        except ValueError:
+            return queryset
+        if not 1 <= nights <= MAX_NIGHTS:
+            return queryset
+
+        queryset = queryset.filter(next_availability__nights=nights).annotate(
+            next_available=F('next_availability__next_start'))
+        if free_by:
+            queryset = queryset.filter(next_available__lte=free_by)
+        return queryset.order_by('next_available', 'pk')
+
+
+class RoomCombinationView(UnshardedOnlyMixin, views.APIView):
+    """
+    API view to find the cheapest combinations of available rooms for a party
+    too large for a single room.
+    """
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("party_size", OpenApiTypes.INT,
+                             OpenApiParameter.QUERY, required=True),
+            OpenApiParameter("start_date", OpenApiTypes.DATE,
+                             OpenApiParameter.QUERY, required=True),
+            OpenApiParameter("end_date", OpenApiTypes.DATE,
+                             OpenApiParameter.QUERY, required=True),
+            OpenApiParameter("k", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                             description="Number of combinations to return, 5 by default")
+        ],
+        responses={200: RoomCombinationSerializer(many=True),
+                   400: OpenApiTypes.OBJECT}
+    )
+    def get(self, request: Request) -> Response:
+        """Return the k cheapest combinations of rooms available for the dates
+        whose total capacity covers the party, with their total price.
+
+        Args:
+            request (Request): party size and dates
+
+        Returns:
+            Response: HTTP status 200 with the combinations, cheapest first
+        """
+        serializer = RoomCombinationQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        combinations: list[Combination] = room_combinations(
+            serializer.validated_data['party_size'], serializer.validated_data['start_date'],
+            serializer.validated_data['end_date'], serializer.validated_data['k'])
+        return Response([
+            {'rooms': combination.room_ids, 'capacity': combination.capacity,
+             'total': str(from_cents(combination.total))}
+            for combination in combinations
+        ])
+
+
+class WaitlistView(UnshardedOnlyMixin, generics.ListCreateAPIView):
+    """
+    API view to join the cancellation waitlist and list the user's entries.
+    When a cancellation frees a matching room, the entry is booked or,
+    without `auto_book`, notified.
+    """
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self) -> QuerySet:
+        return WaitlistEntry.objects.filter(
+            user=self.request.user).select_related('booking').order_by('-created_at')
+
+    def perform_create(self, serializer: WaitlistEntrySerializer) -> None:
+        serializer.save(user=self.request.user)
+
+
+class WaitlistEntryView(UnshardedOnlyMixin, generics.RetrieveDestroyAPIView):
+    """
+    API view to show or leave a waitlist entry of the user.
+    """
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self) -> QuerySet:
+        return WaitlistEntry.objects.filter(
+            user=self.request.user).select_related('booking')
+
+
+class RoomQuoteView(UnshardedOnlyMixin, views.APIView):
+    """
+    API view to quote total stay prices for many rooms and stays at once.
+    """
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        request=RoomQuoteRequestSerializer,
+        responses={200: RoomQuoteResponseSerializer(many=True),
+                   400: OpenApiTypes.OBJECT},
+        examples=[
+            OpenApiExample(
+                "Quote Example",
+                summary="Quote two stays for two rooms",
+                value={
+                    "rooms": [1, 2],
+                    "stays": [
+                        {"start_date": "2023-01-01", "end_date": "2023-01-03"},
+                        {"start_date": "2023-01-06", "end_date": "2023-01-08"}
+                    ]
+                },
+                request_only=True,
+            )
+        ]
+    )
+    def post(self, request: Request) -> Response:
+        """Quote the total price of every stay in every requested room,
+        applying the rate calendar.
+
+        Args:
+            request (Request): rooms and stays to quote
+
+        Returns:
+            Response: HTTP status 200 with the quotes, 400 if the request is invalid
+        """
+        serializer = RoomQuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested: list[int] = serializer.validated_data['rooms']
+        rooms: QuerySet = Room.objects.order_by('pk').with_ids(requested)
+        stays: list[tuple[date, date]] = [(stay['start_date'], stay['end_date'])
+                                          for stay in serializer.validated_data['stays']]
+
+        room_ids, totals = quote_stays(rooms, stays)
+        missing: list[int] = sorted(set(requested) - set(room_ids.tolist()))
+        if missing:
+            return Response({'rooms': [f"Rooms {', '.join(map(str, missing))} do not exist."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response([
+            {
+                'room': int(room_id),
+                'quotes': [{'start_date': start_date, 'end_date': end_date, 'total': str(from_cents(total))}
+                           for (start_date, end_date), total in zip(stays, room_totals)]
+            }
+            for room_id, room_totals in zip(room_ids, totals)
+        ])
+
+
+class AdmissionStatsView(views.APIView):
+    """
+    Counters of the booking write path admission control, for superusers.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT, 403: OpenApiTypes.OBJECT})
+    def get(self, request: Request) -> Response:
+        """Return in-flight booking writes and admitted/rejected counters.
+
+        Args:
+            request (Request): superuser request
+
+        Returns:
+            Response: HTTP status 200 with the counters, 403 for other users
+        """
+        if not request.user.is_superuser:
+            return Response({'status': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(get_admission().stats())
+
+
+class OccupancyAnalyticsView(views.APIView):
+    """
+    Occupancy rate and revenue over a date range, read from the daily rollups.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("start_date", OpenApiTypes.DATE,
+                             OpenApiParameter.QUERY, required=True),
+            OpenApiParameter("end_date", OpenApiTypes.DATE,
+                             OpenApiParameter.QUERY, required=True),
+            OpenApiParameter("room", OpenApiTypes.INT,
+                             OpenApiParameter.QUERY)
+        ],
+        responses={200: OccupancyResponseSerializer,
+                   400: OpenApiTypes.OBJECT, 403: OpenApiTypes.OBJECT}
+    )
+    def get(self, request: Request) -> Response:
+        """Report occupancy and revenue of all rooms, or one room, for the nights
+        from start_date up to end_date.
+
+        Args:
+            request (Request): superuser request with the date range
+
+        Returns:
+            Response: HTTP status 200 with the report, 403 for other users
+        """
+        if not request.user.is_superuser:
+            return Response({'status': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = OccupancyQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start_date: date = serializer.validated_data['start_date']
+        end_date: date = serializer.validated_data['end_date']
+        room: Room = serializer.validated_data.get('room')
+
+        def shard_totals(alias: str) -> dict:
+            rollups: QuerySet = RoomDailyRollup.objects.using(alias).filter(
+                date__gte=start_date, date__lt=end_date)
+            if room:
+                rollups = rollups.filter(room=room)
+            return {'rooms': 1 if room else Room.objects.using(alias).count(),
+                    **rollups.aggregate(occupied_nights=Count('id', filter=Q(occupied=True)),
+                                        revenue=Sum('revenue'))}
+
+        # a room is read on its shard, all rooms on every shard
+        by_shard: list[dict] = [shard_totals(room._state.db)] if room else fan_out(shard_totals)
+        room_nights: int = sum(totals['rooms'] for totals in by_shard) * (end_date - start_date).days
+        occupied_nights: int = sum(totals['occupied_nights'] for totals in by_shard)
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'room_nights': room_nights,
+            'occupied_nights': occupied_nights,
+            'occupancy_rate': occupied_nights / room_nights if room_nights else 0.0,
+            'revenue': sum(totals['revenue'] or 0 for totals in by_shard),
+        })
 
 
 class CreateUserView(views.APIView):
@@ -222,7 +816,8 @@ class CreateUserView(views.APIView):
         request=UserSerializer,
         responses={
             201: UserCreatedResponseSerializer,
-            400: OpenApiTypes.OBJECT
+            400: OpenApiTypes.OBJECT,
+            503: OpenApiTypes.OBJECT
         },
         examples=[
             OpenApiExample(
@@ -247,11 +842,13 @@ class CreateUserView(views.APIView):
             request (Request): new user data 
 
         Returns:
-            Response: HTTP status 201 if successful, status 400 otherwise
+            Response: HTTP status 201 if successful, status 400 otherwise,
+            503 if too many registrations are waiting for password hashing
         """
         serializer: UserSerializer = UserSerializer(data=request.data)
         if serializer.is_valid():
-            CustomUser.objects.create_user(**serializer.validated_data)
+            # hashed in a process pool: this thread waits, but not holding the GIL
+            CustomUser.objects.create_user_in_pool(**serializer.validated_data)
             return Response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
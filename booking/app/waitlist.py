@@ -0,0 +1,120 @@
+"""
+Cancellation waitlist matching.
+
+When a cancellation frees a range of a room, the range is widened to the
+room's free interval between its neighbouring active bookings, and the
+waiting entries that fit inside it are served first come, first served:
+booked when `auto_book` is set, otherwise notified with `waitlist_matched`.
+Candidates are read with a range scan of the (room, status, start_date)
+index, bounded by the free interval, instead of scanning the waitlist.
+"""
+
+from datetime import date
+from typing import Optional
+
+from django.db import router, transaction
+from django.db.models import Count, Max, Min, Q, QuerySet
+from django.dispatch import receiver
+
+from .models import Booking, Room, WaitlistEntry
+from .signals import BookingChange, bookings_changed, waitlist_matched
+
+
+def free_interval(room_id: int, start_date: date, end_date: date) -> Optional[tuple[date, date]]:
+    """Widen a freed range to the nearest active bookings of the room.
+
+    Args:
+        room_id (int): the room
+        start_date (date): first night of the freed range
+        end_date (date): end of the freed range, excluded
+
+    Returns:
+        tuple[date, date]: start and end of the free interval, or None if
+        the range is still partly occupied
+    """
+    bounds: dict = Booking.objects.filter(room_id=room_id, status="active").aggregate(
+        before=Max('end_date', filter=Q(end_date__lte=start_date)),
+        after=Min('start_date', filter=Q(start_date__gte=end_date)),
+        overlapping=Count('pk', filter=Q(start_date__lt=end_date, end_date__gt=start_date)))
+    if bounds['overlapping']:
+        return None
+    return bounds['before'] or date.min, bounds['after'] or date.max
+
+
+def candidates(room: Room, freed_start: date, freed_end: date,
+               free_start: date, free_end: date) -> QuerySet:
+    """
+    Return the waiting entries for the room that overlap the freed range
+    and fit in the free interval, oldest first, locked for update.
+    """
+    matches_room: Q = Q(room=room) | Q(
+        Q(capacity__isnull=True) | Q(capacity__lte=room.capacity),
+        Q(max_price__isnull=True) | Q(max_price__gte=room.price_per_night),
+        room__isnull=True)
+    return WaitlistEntry.objects.filter(
+        matches_room, status="waiting",
+        start_date__gte=free_start, start_date__lt=freed_end,
+        end_date__gt=freed_start, end_date__lte=free_end,
+    ).order_by('created_at').select_for_update(skip_locked=True)
+
+
+def match_freed_range(room: Room, start_date: date, end_date: date) -> list[WaitlistEntry]:
+    """Serve the waiting entries that fit in a freed range of a room.
+
+    Args:
+        room (Room): the room with a cancelled booking
+        start_date (date): first night of the cancelled booking
+        end_date (date): end of the cancelled booking, excluded
+
+    Returns:
+        list[WaitlistEntry]: the booked and notified entries
+    """
+    start_date = max(start_date, date.today())
+    if start_date >= end_date:
+        return []
+    interval: Optional[tuple[date, date]] = free_interval(room.pk, start_date, end_date)
+    if interval is None:
+        return []
+    free_start, free_end = interval
+
+    matched: list[WaitlistEntry] = []
+    booked: list[tuple[date, date]] = []
+    for entry in candidates(room, start_date, end_date, max(free_start, date.today()), free_end):
+        if not entry.auto_book:
+            entry.status = "notified"
+        elif all(entry.end_date <= start or entry.start_date >= end for start, end in booked):
+            entry.booking = Booking.objects.create(
+                user_id=entry.user_id, room=room,
+                start_date=entry.start_date, end_date=entry.end_date)
+            entry.status = "booked"
+            booked.append((entry.start_date, entry.end_date))
+        else:
+            continue
+        matched.append(entry)
+
+    WaitlistEntry.objects.bulk_update(matched, ['status', 'booking'])
+    notified: list[WaitlistEntry] = [entry for entry in matched if entry.status == "notified"]
+    if notified:
+        waitlist_matched.send(sender=WaitlistEntry, entries=notified)
+    return matched
+
+
+@receiver(bookings_changed)
+def match_waitlist(sender, changes: list[BookingChange], **kwargs) -> None:
+    """
+    Serve the waitlist from the ranges freed by cancelled, shortened or
+    moved bookings. Deleted bookings are ignored, as their room may be
+    being deleted with them.
+    """
+    freed: list[BookingChange] = [change for change in changes if change.status == "cancelled"]
+    if not freed:
+        return
+    stored: set = set(Booking.objects.filter(
+        booking_number__in=[change.booking_number for change in freed],
+    ).values_list('booking_number', flat=True))
+    freed = [change for change in freed if change.booking_number in stored]
+    rooms: dict[int, Room] = Room.objects.in_bulk({change.room_id for change in freed})
+    with transaction.atomic(using=router.db_for_write(Booking)):
+        for change in freed:
+            if change.room_id in rooms:
+                match_freed_range(rooms[change.room_id], change.start_date, change.end_date)
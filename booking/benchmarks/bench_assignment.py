@@ -0,0 +1,62 @@
+"""
+Benchmark the room assignment sweep on a synthetic room type.
+
+Generates a year of fragmented bookings over many rooms, with short gaps
+between stays, and repacks them with `app.assignment.assign_rooms`.
+
+Usage:
+    python booking/benchmarks/bench_assignment.py [rooms] [days]
+"""
+
+import os
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "booking.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from app.assignment import Stay, assign_rooms, count_gap_nights  # noqa: E402
+
+
+def generate(rooms: int, days: int, seed: int = 0) -> list[Stay]:
+    """Fill each room with stays of 1 to 7 nights separated by 0 to 3 free nights."""
+    rng = random.Random(seed)
+    today: date = date.today()
+    stays: list[Stay] = []
+    for room_id in range(1, rooms + 1):
+        cursor: date = today + timedelta(days=rng.randint(0, 3))
+        while cursor < today + timedelta(days=days):
+            end: date = cursor + timedelta(days=rng.randint(1, 7))
+            stays.append(Stay(len(stays), cursor, end, room_id))
+            cursor = end + timedelta(days=rng.choice((0, 0, 1, 1, 2, 3)))
+    return stays
+
+
+def main() -> None:
+    rooms: int = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    days: int = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    stays: list[Stay] = generate(rooms, days)
+
+    start: float = perf_counter()
+    assignment = assign_rooms(list(range(1, rooms + 1)), [], stays)
+    elapsed: float = perf_counter() - start
+
+    repacked: list[Stay] = [stay._replace(room_id=assignment[stay.key]) for stay in stays]
+    moved: int = sum(stay.room_id != assignment[stay.key] for stay in stays)
+    print(f"{len(stays)} bookings over {rooms} rooms and {days} days")
+    print(f"  assignment:          {elapsed * 1e3:8.1f} ms")
+    print(f"  moved:               {moved:8d}")
+    for max_gap in (1, 2):
+        print(f"  gap nights <= {max_gap}:     "
+              f"{count_gap_nights(stays, max_gap):8d} -> {count_gap_nights(repacked, max_gap)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark room list filtering with the in-memory room catalog against the ORM.
+
+Fills a throwaway test database with 1k, 10k and 100k rooms and times a
+price and capacity search sorted by price, returning its first page of
+20 rooms and the total count: with SQL filters, sort and COUNT(*), and
+with the catalog's vectorized masks and only the page loaded by id.
+
+Usage:
+    python booking/benchmarks/bench_catalog.py [searches]
+"""
+
+import os
+import random
+import sys
+from decimal import Decimal
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "booking.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from app.catalog import get_catalog, invalidate_catalog  # noqa: E402
+from app.models import Room  # noqa: E402
+
+SIZES = (1000, 10000, 100000)
+PAGE = 20
+
+
+def searches(count: int, seed: int = 0) -> list[tuple[Decimal, Decimal, int]]:
+    rng = random.Random(seed)
+    return [(Decimal(rng.randrange(50, 150)), Decimal(rng.randrange(150, 300)), rng.randint(1, 4))
+            for _ in range(count)]
+
+
+def with_orm(min_price: Decimal, max_price: Decimal, capacity: int) -> tuple[int, list[Room]]:
+    rooms = Room.objects.filter(price_per_night__gte=min_price, price_per_night__lte=max_price,
+                                capacity__gte=capacity).order_by('price_per_night', 'pk')
+    return rooms.count(), list(rooms[:PAGE])
+
+
+def with_catalog(min_price: Decimal, max_price: Decimal, capacity: int) -> tuple[int, list[Room]]:
+    room_ids: list[int] = get_catalog().select(
+        min_price, max_price, capacity, ordering='price_per_night').tolist()
+    rooms: dict[int, Room] = Room.objects.with_ids(room_ids[:PAGE]).in_bulk()
+    return len(room_ids), [rooms[pk] for pk in room_ids[:PAGE]]
+
+
+def bench(search: Callable, queries: list[tuple]) -> float:
+    """Return the mean time per search in milliseconds."""
+    start: float = perf_counter()
+    for query in queries:
+        search(*query)
+    return (perf_counter() - start) / len(queries) * 1e3
+
+
+def main() -> None:
+    count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    queries = searches(count)
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    rng = random.Random(1)
+    try:
+        with override_settings(ROOM_CATALOG_SNAPSHOT=True):
+            for size in SIZES:
+                Room.objects.bulk_create([
+                    Room(name=f"Room {n}", price_per_night=Decimal(rng.randrange(5000, 30000)) / 100,
+                         capacity=rng.randint(1, 6))
+                    for n in range(Room.objects.count(), size)], batch_size=5000)
+                invalidate_catalog()
+                start: float = perf_counter()
+                get_catalog()
+                load: float = (perf_counter() - start) * 1e3
+
+                for query in queries[:3]:
+                    assert with_orm(*query) == with_catalog(*query)
+                print(f"{size} rooms, {count} searches, first page of {PAGE} and count")
+                print(f"  ORM:               {bench(with_orm, queries):8.2f} ms")
+                print(f"  catalog:           {bench(with_catalog, queries):8.2f} ms")
+                print(f"  catalog load:      {load:8.2f} ms (once per room change)")
+    finally:
+        runner.teardown_databases(databases)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the per-request cost of the middleware stack on API routes.
+
+Compares Django's default session/CSRF/auth/message middleware with the
+path-aware lean stack from `app.middleware`, on an API endpoint that
+rejects the request before touching the database. Both stacks are fixed
+here, without the profiling and query log middleware of the settings,
+so that only the lean replacements are measured.
+
+Usage:
+    python booking/benchmarks/bench_middleware.py [requests]
+"""
+
+import logging
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "booking.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+DEFAULT_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+LEAN_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "app.middleware.LeanSessionMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "app.middleware.LeanCsrfViewMiddleware",
+    "app.middleware.LeanAuthenticationMiddleware",
+    "app.middleware.LeanMessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+
+def bench(middleware: list[str], path: str, requests: int, rounds: int = 5) -> float:
+    """Return the best mean time per request over several rounds, in microseconds."""
+    with override_settings(MIDDLEWARE=middleware):
+        client = Client()
+        for _ in range(100):
+            client.get(path)
+        best: float = float("inf")
+        for _ in range(rounds):
+            start: float = perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            best = min(best, (perf_counter() - start) / requests * 1e6)
+        return best
+
+
+def main() -> None:
+    requests: int = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    setup_test_environment()
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+    path = "/app/protected/"
+
+    default: float = bench(DEFAULT_MIDDLEWARE, path, requests)
+    lean: float = bench(LEAN_MIDDLEWARE, path, requests)
+    print(f"{path} x {requests}")
+    print(f"  default middleware: {default:8.1f} us/request")
+    print(f"  lean middleware:    {lean:8.1f} us/request")
+    print(f"  saved:              {default - lean:8.1f} us/request ({(1 - lean / default) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark JSON rendering of large room and booking lists.
+
+Compares DRF's JSONRenderer with `app.renderers.ORJSONRenderer` on
+serialized lists of unsaved rooms and bookings, so no database is needed.
+
+Usage:
+    python booking/benchmarks/bench_renderers.py [items]
+"""
+
+import os
+import sys
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "booking.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer  # noqa: E402
+
+from app.models import Booking, Room  # noqa: E402
+from app.renderers import ORJSONRenderer  # noqa: E402
+from app.serializers import BookingSerializer, RoomSerializer  # noqa: E402
+
+
+def bench(renderer: BaseRenderer, data, rounds: int = 5) -> float:
+    """Return the best time to render `data` over several rounds, in milliseconds."""
+    best: float = float("inf")
+    for _ in range(rounds):
+        start: float = perf_counter()
+        renderer.render(data)
+        best = min(best, (perf_counter() - start) * 1e3)
+    return best
+
+
+def main() -> None:
+    items: int = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    today: date = date.today()
+    rooms = [Room(id=i, name=f"Room {i}", price_per_night=Decimal("80.00") + i % 50,
+                  capacity=i % 4 + 1) for i in range(1, items + 1)]
+    bookings = [Booking(booking_number=uuid.uuid4(), user_id=1, room=room,
+                        start_date=today + timedelta(days=i % 365),
+                        end_date=today + timedelta(days=i % 365 + 3))
+                for i, room in enumerate(rooms)]
+
+    for name, data in (("rooms", RoomSerializer(rooms, many=True).data),
+                       ("bookings", BookingSerializer(bookings, many=True).data)):
+        assert JSONRenderer().render(data) == ORJSONRenderer().render(data)
+        stdlib: float = bench(JSONRenderer(), data)
+        fast: float = bench(ORJSONRenderer(), data)
+        print(f"{name} x {items}")
+        print(f"  JSONRenderer:   {stdlib:8.2f} ms")
+        print(f"  ORJSONRenderer: {fast:8.2f} ms ({stdlib / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
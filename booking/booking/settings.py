@@ -20,6 +20,17 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson based drop-in replacements of JSONRenderer and JSONParser;
+    # use the rest_framework classes to switch back to the stdlib encoder.
+    'DEFAULT_RENDERER_CLASSES': (
+        'app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'app.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -29,6 +40,36 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Admission control of booking creation: token buckets per user and
+# globally (tokens per second, burst size) and a cap on concurrent writes.
+BOOKING_ADMISSION = {
+    'USER_RATE': float(os.getenv('BOOKING_USER_RATE', '1')),
+    'USER_BURST': int(os.getenv('BOOKING_USER_BURST', '5')),
+    'GLOBAL_RATE': float(os.getenv('BOOKING_GLOBAL_RATE', '200')),
+    'GLOBAL_BURST': int(os.getenv('BOOKING_GLOBAL_BURST', '400')),
+    'MAX_CONCURRENT': int(os.getenv('BOOKING_MAX_CONCURRENT', '16')),
+    'RETRY_AFTER': 1,
+}
+
+# Registrations hash passwords in a pool of WORKERS processes per server
+# worker, their request threads waiting. Past MAX_PENDING passwords waiting
+# for the pool, they are rejected with 503, to be retried after RETRY_AFTER
+# seconds.
+PASSWORD_HASHING = {
+    'WORKERS': int(os.getenv('PASSWORD_HASHING_WORKERS', '1')),
+    'MAX_PENDING': int(os.getenv('PASSWORD_HASHING_MAX_PENDING', '8')),
+    'RETRY_AFTER': 1,
+}
+
+# Responses to requests with an Idempotency-Key header are replayed for
+# TTL seconds. Concurrent retries wait up to WAIT seconds for the first
+# request, whose lock expires after LOCK_TIMEOUT seconds.
+IDEMPOTENCY = {
+    'TTL': 60 * 60 * 24,
+    'LOCK_TIMEOUT': 30,
+    'WAIT': 10,
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -45,6 +86,21 @@ AUTH_USER_MODEL = 'app.CustomUser'
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Serve /api/schema/ from the artifact built by `manage.py compileschema`
+# instead of introspecting the views on every request.
+PRECOMPILED_SCHEMA = os.getenv('PRECOMPILED_SCHEMA', '0') == '1'
+SCHEMA_ARTIFACT_DIR = os.getenv('SCHEMA_ARTIFACT_DIR', BASE_DIR / 'schema')
+SCHEMA_CACHE_MAX_AGE = 60 * 60 * 24
+
+# Requests are profiled at SAMPLE_RATE (0 to 1), and on demand when a
+# superuser sends the X-Profile header. The stacks are sampled every
+# INTERVAL seconds and written with the SQL log to DIR.
+PROFILING = {
+    'SAMPLE_RATE': float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    'INTERVAL': 0.001,
+    'DIR': Path(os.getenv('PROFILE_DIR', BASE_DIR / 'profiles')),
+}
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -75,15 +131,21 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "app.middleware.LeanSessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "app.middleware.LeanCsrfViewMiddleware",
+    "app.middleware.LeanAuthenticationMiddleware",
+    "app.middleware.ProfilingMiddleware",
+    "app.middleware.QueryLogMiddleware",
+    "app.middleware.LeanMessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# The session, CSRF, authentication and message middleware are skipped
+# for these JWT-only API paths and kept for /admin/.
+LEAN_MIDDLEWARE_EXEMPT_PATHS = ['/app/', '/api/']
+
 ROOT_URLCONF = "booking.urls"
 
 TEMPLATES = [
@@ -116,8 +178,81 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASS', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'db'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
+
+# Databases of the rooms and bookings, each hotel's on one of them by a
+# consistent hash of its id (see app/sharding.py). ROOM_SHARDS=shard0,shard1
+# adds the databases <DB_NAME>_shard0 and <DB_NAME>_shard1 on the same
+# server; by default everything stays in `default`.
+ROOM_SHARDS: list[str] = [alias for alias in os.getenv('ROOM_SHARDS', 'default').split(',') if alias]
+for alias in ROOM_SHARDS:
+    DATABASES.setdefault(alias, {**DATABASES['default'],
+                                 'NAME': f"{DATABASES['default']['NAME']}_{alias}"})
+DATABASE_ROUTERS = ['app.sharding.ShardRouter']
+
+# Admin changelists estimate row counts from PostgreSQL statistics
+# instead of running COUNT(*) for tables larger than this.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Daily occupancy rollups are kept for nights up to this many days ahead.
+ROLLUP_HORIZON_DAYS = 2 * 365
+
+# Room occupancy for DAYS nights from today in a memory-mapped file shared
+# by the workers of the host. Rebuild it daily with
+# `manage.py build_availability_bitmap`.
+AVAILABILITY_BITMAP = {
+    'ENABLED': os.getenv('AVAILABILITY_BITMAP', '0') == '1',
+    'PATH': Path(os.getenv('AVAILABILITY_BITMAP_PATH', BASE_DIR / 'availability.bitmap')),
+    'DAYS': int(os.getenv('AVAILABILITY_BITMAP_DAYS', '730')),
+}
+
+# Answer the price and capacity filters and sorts of the room list from
+# an in-memory snapshot of the rooms in each worker.
+ROOM_CATALOG_SNAPSHOT = os.getenv('ROOM_CATALOG_SNAPSHOT', '0') == '1'
+
+# Width of the price buckets of the room search facets (?facets=true),
+# in whole currency units.
+ROOM_FACET_PRICE_WIDTH = 50
+
+# Regular users' active booking lists are cached for up to this many
+# seconds, and invalidated when their bookings change.
+BOOKING_LIST_CACHE_TTL = 60 * 60 * 24
+
+# Development aid: log SQL templates repeated N_PLUS_ONE_THRESHOLD times in
+# one request (N+1 queries) and queries slower than SLOW_QUERY_MS. Off unless
+# QUERY_LOG=1 in development; the test suite enables it with RAISE, which
+# fails the request instead.
+QUERY_LOG = {
+    'ENABLED': os.getenv('QUERY_LOG', '0') == '1',
+    'N_PLUS_ONE_THRESHOLD': int(os.getenv('QUERY_LOG_N_PLUS_ONE_THRESHOLD', '10')),
+    'SLOW_QUERY_MS': float(os.getenv('QUERY_LOG_SLOW_QUERY_MS', '100')),
+    'RAISE': False,
+}
+
+# Cache shared by all workers when REDIS_URL is set, as in docker-compose,
+# per-process memory otherwise.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# The booking list cache, the room catalog and idempotency keys keep state
+# in the cache that every worker must see: they are turned off unless the
+# cache is shared. SHARED_CACHE=1 turns them on with a single process.
+SHARED_CACHE = os.getenv('SHARED_CACHE', '1' if os.getenv('REDIS_URL') else '0') == '1'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,71 @@
+"""
+Warm-up for production servers.
+
+Imports the project, resolves every URL pattern, connects once to each
+database and loads the OpenAPI schema before the server accepts traffic,
+so the first request does not pay for the imports and compilation.
+Database connections are per thread: request threads still open their
+own on first use.
+"""
+
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.urls import NoReverseMatch, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+# Duration of each warm-up phase in milliseconds, from the last warm_up() call.
+timings: dict[str, float] = {}
+
+
+def resolve_urls() -> None:
+    """Compile all URL patterns and reverse every named route without arguments."""
+    resolver = get_resolver()
+    for name in list(resolver.reverse_dict):
+        if isinstance(name, str):
+            try:
+                reverse(name)
+            except NoReverseMatch:
+                pass
+
+
+def prime_connections() -> None:
+    """
+    Connect to every configured database, which loads the driver and its
+    type information and stops startup early if a database is unreachable.
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def load_schema() -> None:
+    """Load the precompiled OpenAPI schema into memory."""
+    if settings.PRECOMPILED_SCHEMA:
+        from app.schema import SCHEMA_RENDERERS, load_schema as load
+        for fmt in SCHEMA_RENDERERS:
+            load(fmt)
+
+
+def warm_up(close_connections: bool = True) -> dict[str, float]:
+    """Run all warm-up phases and record how long each took.
+
+    Args:
+        close_connections (bool): close the primed connections afterwards,
+            required when the process forks workers that must not share sockets
+
+    Returns:
+        dict[str, float]: duration of each phase in milliseconds
+    """
+    timings.clear()
+    for phase in (resolve_urls, prime_connections, load_schema):
+        start: float = perf_counter()
+        phase()
+        timings[phase.__name__] = (perf_counter() - start) * 1000
+    if close_connections:
+        connections.close_all()
+    logger.info("Warm-up finished: %s", ", ".join(
+        f"{phase} {ms:.1f}ms" for phase, ms in timings.items()))
+    return timings
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "booking.settings")
 
 application = get_wsgi_application()
+
+# Set by the production server config to pay the import, URL resolving,
+# connection and schema costs before accepting traffic.
+if os.getenv("DJANGO_WARMUP", "0") == "1":
+    from booking.warmup import warm_up
+
+    warm_up()
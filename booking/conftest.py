@@ -0,0 +1,21 @@
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def shared_cache():
+    """
+    The test process is the only worker, so its memory cache is shared.
+    """
+    with override_settings(SHARED_CACHE=True):
+        yield
+
+
+@pytest.fixture(autouse=True, scope='session')
+def fail_on_n_plus_one():
+    """
+    Fail any test whose requests run N+1 queries.
+    """
+    with override_settings(QUERY_LOG={**settings.QUERY_LOG, 'ENABLED': True, 'RAISE': True}):
+        yield
@@ -0,0 +1,59 @@
+"""
+Gunicorn configuration for production.
+
+Run from the repository root with:
+    gunicorn -c booking/gunicorn.conf.py
+"""
+
+import multiprocessing
+import os
+import time
+
+_config_loaded = time.monotonic()
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = "booking.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Load the app and run the warm-up once in the master, then fork.
+preload_app = True
+raw_env = ["DJANGO_WARMUP=1"]
+
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Recycle workers gradually to bound memory growth, and let in-flight
+# requests finish on reload or shutdown.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+graceful_timeout = 30
+timeout = 30
+keepalive = 5
+
+accesslog = "-"
+
+
+def when_ready(server):
+    from booking import warmup
+
+    server.log.info("Startup took %.1fms (warm-up: %s)",
+                    (time.monotonic() - _config_loaded) * 1000,
+                    ", ".join(f"{phase} {ms:.1f}ms" for phase, ms in warmup.timings.items()))
+
+
+def post_fork(server, worker):
+    # Connections of the master were closed after warm-up; they are per
+    # thread, so each request thread of the worker opens its own.
+    worker.first_request_logged = False
+
+
+def pre_request(worker, req):
+    req.started = time.monotonic()
+
+
+def post_request(worker, req, environ, resp):
+    if not worker.first_request_logged:
+        worker.first_request_logged = True
+        worker.log.info("First request of worker %s took %.1fms: %s %s", worker.pid,
+                        (time.monotonic() - req.started) * 1000, req.method, req.path)